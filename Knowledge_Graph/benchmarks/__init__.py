@@ -0,0 +1 @@
+"""Offline benchmark harness with local stub services (not tests)."""
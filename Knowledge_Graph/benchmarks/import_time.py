@@ -0,0 +1,186 @@
+"""Import-time budget of the pipeline entry points.
+
+Run from the ``Knowledge_Graph`` directory::
+
+    python -m benchmarks.import_time --repeat 5 --fail-on-budget
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+cumulative import time of the module itself (interpreter startup excluded)
+is compared with its budget, using the median over ``--repeat`` runs. Each
+entry also lists heavy packages that importing the module must not load,
+which catches an eager import regardless of how fast the machine is.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Packages only some runs need: Chroma, the synchronous wikipedia client and
+# its HTML parsing, MongoDB drivers, and the visualization stack
+HEAVY = [
+    "chromadb",
+    "wikipedia",
+    "bs4",
+    "requests",
+    "motor",
+    "pymongo",
+    "networkx",
+    "pyvis",
+]
+
+# module -> (budget in ms, packages it must not load)
+BUDGETS: Dict[str, Tuple[float, List[str]]] = {
+    "src.main": (250, HEAVY + ["aiohttp", "redis", "numpy", "ollama"]),
+    "src.database": (50, HEAVY + ["redis", "numpy"]),
+    "src.knowledge_graph": (50, HEAVY + ["numpy"]),
+    "src.embeddings": (50, HEAVY + ["ollama", "numpy"]),
+    "src.knowledge_graph.graph_builder": (250, HEAVY),
+    "src.knowledge_graph.generate_kg": (250, HEAVY),
+    "src.data_collection.wikidata.sparql": (800, HEAVY),
+    "src.data_collection.wikipedia_.api": (800, HEAVY),
+    "src.embeddings.service": (1500, HEAVY),
+}
+
+# An import statement, not importlib.import_module, so -X importtime reports the module itself
+_PROBE = "import {module}; import json, sys; print(json.dumps(sorted(sys.modules)))"
+
+
+def _parse_importtime(stderr: str, module: str) -> Optional[float]:
+    """Return the cumulative import time (ms) of ``module`` from ``-X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    """Import ``module`` ``repeat`` times in fresh interpreters."""
+    env = {**os.environ, "PYTHONPATH": str(ROOT), "PYTHONDONTWRITEBYTECODE": "1"}
+    timings = []
+    loaded: List[str] = []
+    for _ in range(max(1, repeat)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        elapsed = _parse_importtime(proc.stderr, module)
+        if elapsed is not None:
+            timings.append(elapsed)
+        loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "median_ms": round(statistics.median(timings), 1) if timings else None,
+        "min_ms": round(min(timings), 1) if timings else None,
+        "loaded": loaded,
+    }
+
+
+def check(modules: List[str], repeat: int, scale: float) -> List[Dict[str, Any]]:
+    results = []
+    for module in modules:
+        budget, forbidden = BUDGETS[module]
+        budget *= scale
+        measured = measure(module, repeat)
+        if "error" in measured:
+            results.append(
+                {"module": module, "budget_ms": budget, "error": measured["error"]}
+            )
+            continue
+        top_level = {name.split(".")[0] for name in measured["loaded"]}
+        eager = sorted(pkg for pkg in forbidden if pkg in top_level)
+        over = measured["median_ms"] is not None and measured["median_ms"] > budget
+        results.append(
+            {
+                "module": module,
+                "median_ms": measured["median_ms"],
+                "min_ms": measured["min_ms"],
+                "budget_ms": budget,
+                "eager_imports": eager,
+                "ok": not over and not eager,
+            }
+        )
+    return results
+
+
+def _print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'module':<40} {'median ms':>10} {'budget ms':>10}  status")
+    for r in results:
+        if "error" in r:
+            print(
+                f"{r['module']:<40} {'-':>10} {r['budget_ms']:>10.0f}  error: {r['error']}"
+            )
+            continue
+        if r["ok"]:
+            status = "ok"
+        elif r["eager_imports"]:
+            status = "loads " + ", ".join(r["eager_imports"])
+        else:
+            status = "over budget"
+        print(
+            f"{r['module']:<40} {r['median_ms']:>10.1f} {r['budget_ms']:>10.0f}  {status}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--modules",
+        default=",".join(BUDGETS),
+        help="Comma-separated subset of the budgeted modules",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Fresh interpreters per module"
+    )
+    parser.add_argument(
+        "--budget-scale",
+        type=float,
+        default=1.0,
+        help="Multiply every time budget (slow machines)",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Write the JSON results to this file"
+    )
+    parser.add_argument(
+        "--fail-on-budget",
+        action="store_true",
+        help="Exit with status 1 when a budget is exceeded",
+    )
+    args = parser.parse_args(argv)
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    unknown = [m for m in modules if m not in BUDGETS]
+    if unknown:
+        parser.error(f"No budget for {', '.join(unknown)}")
+
+    results = check(modules, args.repeat, args.budget_scale)
+    _print_results(results)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": sys.version.split()[0], "results": results}, f, indent=2
+            )
+        print(f"Results written to {args.output}")
+
+    failed = [r for r in results if not r.get("ok")]
+    return 1 if failed and args.fail_on_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
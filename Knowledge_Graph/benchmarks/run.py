@@ -0,0 +1,468 @@
+"""Offline benchmarks of the pipeline stages driven by ``src.main``.
+
+Run from the ``Knowledge_Graph`` directory::
+
+    python -m benchmarks.run --sizes 1k,10k --latency-ms 5 --error-rate 0.01 \\
+        --output benchmarks/results/latest.json --baseline benchmarks/baseline.json
+
+The stub services (``stubs.py``) run in this process. Every (stage, size)
+pair runs in a fresh worker process pointed at the stubs, so module-level
+state does not leak between stages and peak RSS is measured per stage. The
+in-process topic cache and the embedding cache are disabled and Redis points
+at a closed port, so every run measures the uncached path.
+
+The report is JSON: per stage and size, the item count, median wall time,
+throughput, p50/p99 of the per-iteration wall time, peak RSS and, for the
+network stages, request counts and p50/p99 service time per stub service.
+With ``--baseline``, throughput, iteration p99 and peak RSS are compared
+against a stored report and changes beyond ``--tolerance`` are flagged.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import synthetic
+from .stubs import StubConfig, StubServices, percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+DOMAIN = "programming"
+STAGES = ["wikidata", "wikipedia", "kg_data", "graph", "export", "embedding"]
+# Stages that talk to the stub services
+NETWORK_STAGES = {"wikidata", "wikipedia", "embedding"}
+
+# (metric, direction): +1 when higher is better, -1 when lower is better
+COMPARED_METRICS = [("throughput", 1), ("iteration_p99_ms", -1), ("peak_rss_mb", -1)]
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = 1
+    if value.endswith("k"):
+        multiplier, value = 1000, value[:-1]
+    elif value.endswith("m"):
+        multiplier, value = 1_000_000, value[:-1]
+    return int(float(value) * multiplier)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Worker side: one stage, one size
+
+
+def _kg_data(topics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from src.config import KG_MAX_CATEGORY_SIZE, KG_MAX_TYPE_SIZE
+    from src.knowledge_graph.generate_kg import create_knowledge_graph_data
+
+    return create_knowledge_graph_data(
+        topics, max_category_size=KG_MAX_CATEGORY_SIZE, max_type_size=KG_MAX_TYPE_SIZE
+    )
+
+
+def _stage(name: str, size: int, args: argparse.Namespace) -> Tuple[Callable, Callable]:
+    """Return (setup, run) for a stage; ``run(setup())`` is timed and returns the item count."""
+
+    def enriched():
+        return synthetic.generate_topics(
+            size, args.seed, True, args.content_chars, DOMAIN
+        )
+
+    if name == "wikidata":
+        from src.data_collection.wikidata.sparql import get_topics_from_wikidata
+
+        async def run(_):
+            return len(await get_topics_from_wikidata(DOMAIN, limit=size))
+
+        return (lambda: None), run
+
+    if name == "wikipedia":
+        from src.data_collection.wikipedia_.api import enrich_with_wikipedia
+
+        async def run(topics):
+            return len(await enrich_with_wikipedia(topics, DOMAIN, save_to_mongo=False))
+
+        return (lambda: synthetic.generate_topics(size, args.seed, enriched=False)), run
+
+    if name == "kg_data":
+        # Imported here so the import is not part of the timed run
+        from src.knowledge_graph import generate_kg  # noqa: F401
+
+        return enriched, lambda topics: len(_kg_data(topics)["topics"])
+
+    if name == "graph":
+        from src.knowledge_graph import build_knowledge_graph
+
+        def run(topics):
+            return len(build_knowledge_graph(topics, compact=True).to_dict()["nodes"])
+
+        return enriched, run
+
+    if name == "export":
+        from src.knowledge_graph.visualize_graph import (
+            generate_graphml_and_save_as_html,
+        )
+
+        def run(data):
+            with tempfile.TemporaryDirectory() as out:
+                generate_graphml_and_save_as_html(data, save_dir=out)
+            return len(data["topics"])
+
+        return (lambda: _kg_data(enriched())), run
+
+    if name == "embedding":
+        from src.embeddings.service import process_topics_batch_async
+
+        def setup():
+            topics = enriched()
+            _kg_data(topics)  # adds content_for_embedding, as in the pipeline
+            return topics
+
+        async def run(topics):
+            await process_topics_batch_async(
+                topics, "benchmark_embeddings", args.chunk_size, args.chunk_overlap
+            )
+            return len(topics)
+
+        return setup, run
+
+    raise ValueError(f"Unknown stage: {name}")
+
+
+async def _run_worker(args: argparse.Namespace) -> Dict[str, Any]:
+    import logging
+
+    logging.disable(logging.INFO)
+    size = args.size
+    setup, run = _stage(args.stage, size, args)
+
+    durations = []
+    items = 0
+    setup_rss = 0.0
+    try:
+        for _ in range(args.repeat):
+            state = setup()
+            setup_rss = max(setup_rss, _peak_rss_mb())
+            started = time.perf_counter()
+            result = run(state)
+            if asyncio.iscoroutine(result):
+                result = await result
+            durations.append(time.perf_counter() - started)
+            items = result
+            del state
+    finally:
+        if args.stage in NETWORK_STAGES:
+            from src.data_collection.http_client import close_http_session
+            from src.data_collection.text_processing import close_text_pool
+
+            await close_http_session()
+            close_text_pool()
+
+    median = statistics.median(durations)
+    return {
+        "stage": args.stage,
+        "size": size,
+        "items": items,
+        "repeat": len(durations),
+        "seconds": round(median, 4),
+        "throughput": round(items / median, 2) if median > 0 else None,
+        "iteration_p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "iteration_p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "setup_rss_mb": round(setup_rss, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+# Orchestrator side
+
+
+def _worker_env(stubs: StubServices, workdir: str, use_redis: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Tunables the caller may override from the environment
+    env.setdefault("WIKIDATA_REQUESTS_PER_SECOND", "100000")
+    env.setdefault("WIKIPEDIA_REQUESTS_PER_SECOND", "100000")
+    env.setdefault("HTTP_DEFAULT_REQUESTS_PER_SECOND", "100000")
+    env.setdefault("HTTP_BACKOFF_BASE", "0.01")
+    env.setdefault("HTTP_BACKOFF_MAX", "0.1")
+    # Settings every run needs: stub endpoints, cold caches, scratch storage
+    env.update(stubs.urls)
+    env.update(
+        {
+            "TOPIC_CACHE_LRU_ITEMS": "0",
+            "EMBEDDING_CACHE_BACKEND": "none",
+            "VECTOR_STORE_BACKEND": "local",
+            "VECTOR_INDEX_DIR": os.path.join(workdir, "vector_index"),
+            "DATA_DIR": os.path.join(workdir, "output"),
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(ROOT), env.get("PYTHONPATH")])
+            ),
+        }
+    )
+    if not use_redis:
+        env["REDIS_HOST"] = "127.0.0.1"
+        env["REDIS_PORT"] = str(_closed_port())
+    return env
+
+
+async def _spawn_worker(
+    stage: str, size: int, args: argparse.Namespace, env: Dict[str, str], workdir: str
+) -> Dict[str, Any]:
+    result_file = os.path.join(workdir, f"{stage}_{size}.json")
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.run",
+        "--worker",
+        "--stage",
+        stage,
+        "--size",
+        str(size),
+        "--result-file",
+        result_file,
+        "--seed",
+        str(args.seed),
+        "--repeat",
+        str(args.repeat),
+        "--content-chars",
+        str(args.content_chars),
+        "--chunk-size",
+        str(args.chunk_size),
+        "--chunk-overlap",
+        str(args.chunk_overlap),
+    ]
+    output = None if args.verbose else asyncio.subprocess.DEVNULL
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=str(ROOT), env=env, stdout=output, stderr=output
+    )
+    code = await process.wait()
+    if code != 0 or not os.path.exists(result_file):
+        return {
+            "stage": stage,
+            "size": size,
+            "error": f"worker exited with status {code}",
+        }
+    with open(result_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="kg-bench-") as workdir:
+        for size in args.sizes:
+            stubs = StubServices(size, config, args.embed_dim, args.content_chars)
+            await stubs.start()
+            env = _worker_env(stubs, workdir, args.redis)
+            try:
+                for stage in args.stages:
+                    stubs.reset_stats()
+                    print(f"Running {stage} with {size} topics...", file=sys.stderr)
+                    result = await _spawn_worker(stage, size, args, env, workdir)
+                    if stage in NETWORK_STAGES:
+                        result["requests"] = stubs.stats()
+                    results.append(result)
+            finally:
+                await stubs.stop()
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": _git_commit(),
+            "settings": {
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "error_rate": args.error_rate,
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "content_chars": args.content_chars,
+                "embed_dim": args.embed_dim,
+                "chunk_size": args.chunk_size,
+                "chunk_overlap": args.chunk_overlap,
+            },
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[Dict[str, Any]]:
+    """Compare a report with a baseline report.
+
+    Returns:
+        One entry per compared metric of every (stage, size) present in both,
+        with the relative change and whether it is a regression beyond
+        ``tolerance``
+    """
+    previous = {
+        (r["stage"], r["size"]): r
+        for r in baseline.get("results", [])
+        if "error" not in r
+    }
+    comparison = []
+    for result in report["results"]:
+        before = previous.get((result["stage"], result["size"]))
+        if before is None or "error" in result:
+            continue
+        for metric, direction in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            comparison.append(
+                {
+                    "stage": result["stage"],
+                    "size": result["size"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": round(change, 4),
+                    "regression": change * direction < -tolerance,
+                }
+            )
+    return comparison
+
+
+def _print_summary(report: Dict[str, Any]) -> None:
+    print(
+        f"{'stage':<10} {'size':>8} {'items/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8}"
+    )
+    for r in report["results"]:
+        if "error" in r:
+            print(f"{r['stage']:<10} {r['size']:>8} {r['error']}")
+            continue
+        print(
+            f"{r['stage']:<10} {r['size']:>8} {r['throughput'] or 0:>12.1f} "
+            f"{r['iteration_p50_ms']:>10.1f} {r['iteration_p99_ms']:>10.1f} {r['peak_rss_mb']:>8.1f}"
+        )
+    for c in report.get("comparison", []):
+        if c["regression"]:
+            print(
+                f"REGRESSION {c['stage']} size={c['size']} {c['metric']}: "
+                f"{c['baseline']} -> {c['current']} ({c['change']:+.1%})"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks of the knowledge graph pipeline"
+    )
+    parser.add_argument(
+        "--sizes", default="1k", help="Comma-separated topic counts, e.g. 1k,10k,100k"
+    )
+    parser.add_argument(
+        "--stages", default=",".join(STAGES), help=f"Comma-separated subset of {STAGES}"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Timed iterations per stage"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Stub latency per request"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="Extra random stub latency"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of stub requests failing with 503",
+    )
+    parser.add_argument(
+        "--content-chars", type=int, default=2000, help="Approximate article length"
+    )
+    parser.add_argument("--embed-dim", type=int, default=384)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument(
+        "--redis",
+        action="store_true",
+        help="Use the configured Redis instead of a cold cache",
+    )
+    parser.add_argument(
+        "--output", default=None, help="Write the JSON report to this file"
+    )
+    parser.add_argument("--baseline", default=None, help="Report to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Allowed relative regression"
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="Exit with status 1 on regressions",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show worker output")
+    # Internal: run one stage in this process
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--stage", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = asyncio.run(_run_worker(args))
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return 0
+
+    args.sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    report = asyncio.run(run_benchmarks(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.tolerance)
+
+    _print_summary(report)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    regressions = [c for c in report.get("comparison", []) if c["regression"]]
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Local stand-ins for the Wikidata SPARQL endpoint, the MediaWiki API and Ollama.
+
+All three services are served by one aiohttp application:
+
+- ``POST /sparql``: the topic list query and (batched) property queries
+- ``GET /w/api.php``: page metadata, full extracts, sections, links and search
+- ``POST /api/embed``: deterministic pseudo-random embeddings
+
+Answers come from the synthetic corpus in ``synthetic.py``. Every request
+waits ``latency_ms`` (plus up to ``jitter_ms``) and fails with a 503 at
+``error_rate``, and its service time is recorded per service.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from aiohttp import web
+
+from . import synthetic
+
+_VALUES_RE = re.compile(r"VALUES \?topic \{([^}]*)\}")
+_ENTITY_RE = re.compile(r"wd:(Q\d+)")
+_LIMIT_RE = re.compile(r"LIMIT\s+(\d+)")
+
+SERVICES = ("sparql", "mediawiki", "ollama")
+
+
+@dataclass
+class StubConfig:
+    """Latency and failure behaviour of the stub services."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (``q`` in 0-100) of ``values``, None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class StubServices:
+    """Serves the synthetic corpus of ``size`` topics over HTTP.
+
+    Args:
+        size: Number of topics in the corpus
+        config: Latency and error injection settings
+        embed_dim: Dimension of the returned embeddings
+        content_chars: Approximate article length of each page
+    """
+
+    def __init__(
+        self,
+        size: int,
+        config: Optional[StubConfig] = None,
+        embed_dim: int = 384,
+        content_chars: int = 2000,
+    ):
+        self.size = size
+        self.config = config or StubConfig()
+        self.embed_dim = embed_dim
+        self.content_chars = content_chars
+        self._random = random.Random(self.config.seed)
+        self._titles = {
+            synthetic.topic_title(i, self.config.seed): i for i in range(size)
+        }
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        self.reset_stats()
+
+    # Lifecycle
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL."""
+        app = web.Application(
+            middlewares=[self._middleware], client_max_size=64 * 1024**2
+        )
+        app.router.add_post("/sparql", self._sparql)
+        app.router.add_get("/w/api.php", self._mediawiki)
+        app.router.add_post("/api/embed", self._embed)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def urls(self) -> Dict[str, str]:
+        """Service URLs in the form the pipeline's configuration expects."""
+        return {
+            "WIKIDATA_ENDPOINT": f"{self.base_url}/sparql",
+            "WIKIPEDIA_API_URL": f"{self.base_url}/w/api.php",
+            "OLLAMA_BASE_URL": self.base_url,
+        }
+
+    # Statistics
+
+    def reset_stats(self) -> None:
+        self._latencies: Dict[str, List[float]] = {s: [] for s in SERVICES}
+        self._errors: Dict[str, int] = {s: 0 for s in SERVICES}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Request count, injected errors and p50/p99 service time (ms) per service."""
+        report = {}
+        for service in SERVICES:
+            latencies = self._latencies[service]
+            if not latencies:
+                continue
+            report[service] = {
+                "requests": len(latencies),
+                "errors": self._errors[service],
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p99_ms": round(percentile(latencies, 99), 3),
+            }
+        return report
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        service = {"/sparql": "sparql", "/w/api.php": "mediawiki"}.get(
+            request.path, "ollama"
+        )
+        started = time.perf_counter()
+        try:
+            delay = self.config.latency_ms + self._random.uniform(
+                0, self.config.jitter_ms
+            )
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+            if self._random.random() < self.config.error_rate:
+                self._errors[service] += 1
+                return web.json_response(
+                    {"error": "injected failure"},
+                    status=503,
+                    headers={"Retry-After": "0"},
+                )
+            return await handler(request)
+        finally:
+            self._latencies[service].append((time.perf_counter() - started) * 1000)
+
+    # SPARQL
+
+    def _topic(self, qid: str) -> Optional[Dict[str, Any]]:
+        i = int(qid[1:]) - 100000
+        if 0 <= i < self.size:
+            return synthetic.wikidata_topic(i, self.size, self.config.seed)
+        return None
+
+    @staticmethod
+    def _property_bindings(topic: Dict[str, Any]) -> List[Dict[str, Any]]:
+        bindings = []
+        for label, values in topic["properties"].items():
+            for value in values:
+                bindings.append(
+                    {
+                        "topic": {"value": topic["wikidata_url"]},
+                        "property": {
+                            "value": synthetic.ENTITY_URL + synthetic.PROPERTIES[label]
+                        },
+                        "propertyLabel": {"value": label},
+                        "value": {"value": value["url"]},
+                        "valueLabel": {"value": value["label"]},
+                    }
+                )
+        return bindings
+
+    async def _sparql(self, request: web.Request) -> web.Response:
+        query = (await request.post()).get("query", "")
+        values = _VALUES_RE.search(query)
+        limit = _LIMIT_RE.search(query)
+        if values:
+            ids = _ENTITY_RE.findall(values.group(1))
+        elif limit:
+            bindings = []
+            for i in range(min(int(limit.group(1)), self.size)):
+                topic = synthetic.wikidata_topic(i, self.size, self.config.seed)
+                bindings.append(
+                    {
+                        "topic": {"value": topic["wikidata_url"]},
+                        "topicLabel": {"value": topic["title"]},
+                        "description": {"value": topic["description"]},
+                        "topicType": {"value": topic["topic_type"]},
+                    }
+                )
+            return web.json_response({"results": {"bindings": bindings}})
+        else:
+            ids = _ENTITY_RE.findall(query)[:1]
+
+        bindings = []
+        for qid in ids:
+            topic = self._topic(qid)
+            if topic is not None:
+                bindings.extend(self._property_bindings(topic))
+        return web.json_response({"results": {"bindings": bindings}})
+
+    # MediaWiki
+
+    def _page(self, title: str) -> Optional[Dict[str, Any]]:
+        i = self._titles.get(title)
+        if i is None:
+            return None
+        return synthetic.wikipedia_page(
+            i, self.size, self.config.seed, self.content_chars
+        )
+
+    async def _mediawiki(self, request: web.Request) -> web.Response:
+        params = request.query
+        action = params.get("action")
+        if action == "parse":
+            page = self._page(params.get("page", ""))
+            if page is None:
+                return web.json_response({"error": {"info": "missingtitle"}})
+            sections = [{"line": heading} for heading in page["sections"]]
+            return web.json_response({"parse": {"sections": sections}})
+
+        if params.get("list") == "search":
+            return web.json_response({"query": {"search": []}})
+
+        titles = [t for t in params.get("titles", "").split("|") if t]
+        props = params.get("prop", "")
+        pages = []
+        for title in titles:
+            page = self._page(title)
+            if page is None:
+                pages.append({"title": title, "missing": True})
+                continue
+            raw: Dict[str, Any] = {"title": title}
+            if "info" in props:
+                raw["fullurl"] = page["url"]
+            if "extracts" in props:
+                raw["extract"] = (
+                    page["summary"] if "exintro" in params else page["content"]
+                )
+            if "categories" in props:
+                raw["categories"] = [
+                    {"title": f"Category:{c}"} for c in page["categories"]
+                ]
+            if "pageprops" in props:
+                raw["pageprops"] = {}
+            if "links" in props:
+                raw["links"] = []
+            pages.append(raw)
+        return web.json_response({"batchcomplete": True, "query": {"pages": pages}})
+
+    # Ollama
+
+    def _vector(self, text: str) -> List[float]:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        rng = np.random.default_rng(int.from_bytes(digest, "little"))
+        return rng.standard_normal(self.embed_dim, dtype=np.float32).round(6).tolist()
+
+    async def _embed(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        return web.json_response(
+            {
+                "model": body.get("model", ""),
+                "embeddings": [self._vector(t) for t in texts],
+            }
+        )
@@ -0,0 +1,226 @@
+"""Deterministic synthetic topics for the benchmarks.
+
+Topic ``i`` of a corpus depends only on ``(seed, i, size)``, so the stub
+services and the benchmark workers build identical data independently.
+Property references favour low topic indexes, which gives the graph a few
+hubs, and a few hub categories are shared by many topics, as on Wikipedia.
+"""
+
+import random
+from typing import Any, Dict, List
+
+ENTITY_URL = "http://www.wikidata.org/entity/"
+
+TOPIC_TYPES = [
+    "programming_language",
+    "programming_paradigm",
+    "software_framework",
+    "software_development",
+    "computer_programming",
+    "object_oriented_programming",
+]
+
+# Property label -> Wikidata property ID, for the relationship properties the
+# graph builder understands plus a few it ignores
+PROPERTIES = {
+    "instance of": "P31",
+    "subclass of": "P279",
+    "influenced by": "P737",
+    "developer": "P178",
+    "part of": "P361",
+    "has use": "P366",
+}
+
+_SYLLABLES = [
+    "ka",
+    "lo",
+    "mi",
+    "ra",
+    "ne",
+    "to",
+    "su",
+    "vi",
+    "do",
+    "pe",
+    "zu",
+    "ga",
+    "li",
+    "mo",
+    "ta",
+    "ve",
+    "bi",
+    "xo",
+    "fu",
+    "ce",
+]
+_WORDS = [
+    "the",
+    "a",
+    "of",
+    "and",
+    "to",
+    "in",
+    "is",
+    "that",
+    "for",
+    "as",
+    "with",
+    "language",
+    "program",
+    "type",
+    "system",
+    "memory",
+    "compiler",
+    "runtime",
+    "function",
+    "object",
+    "class",
+    "module",
+    "library",
+    "interface",
+    "value",
+    "syntax",
+    "semantics",
+    "paradigm",
+    "software",
+    "data",
+    "structure",
+    "algorithm",
+    "network",
+    "process",
+    "thread",
+    "version",
+    "standard",
+    "developed",
+    "designed",
+    "released",
+    "supports",
+    "provides",
+    "used",
+    "early",
+    "modern",
+    "popular",
+    "static",
+    "dynamic",
+    "concurrent",
+]
+_HEADINGS = [
+    "History",
+    "Design",
+    "Syntax",
+    "Semantics",
+    "Implementations",
+    "Usage",
+    "Reception",
+]
+
+# Share of property values pointing at entities outside the corpus
+EXTERNAL_REFERENCE_RATE = 0.3
+# A few hub categories shared by a fixed share of all topics; the others hold
+# about ten topics on average
+HUB_CATEGORIES = 10
+HUB_CATEGORY_RATE = 0.1
+
+
+def _rng(seed: int, i: int, stream: int = 0) -> random.Random:
+    return random.Random((seed * 1_000_003 + i) * 7 + stream)
+
+
+def topic_id(i: int) -> str:
+    return f"Q{100000 + i}"
+
+
+def topic_title(i: int, seed: int = 0) -> str:
+    rng = _rng(seed, i, 1)
+    name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+    return f"{name.capitalize()} {i}"
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(8, 20))
+    return " ".join(words).capitalize() + "."
+
+
+def wikidata_topic(i: int, size: int, seed: int = 0) -> Dict[str, Any]:
+    """Return topic ``i`` as ``get_topics_from_wikidata`` produces it."""
+    rng = _rng(seed, i)
+    properties: Dict[str, List[Dict[str, Any]]] = {}
+    for _ in range(rng.randint(1, 6)):
+        label = rng.choice(list(PROPERTIES))
+        if rng.random() < EXTERNAL_REFERENCE_RATE:
+            k = rng.randrange(max(10, size // 50))
+            value_id, value_label = f"Q{900000 + k}", f"Entity {k}"
+        else:
+            # Squaring skews references towards low indexes: a few hub topics
+            j = int(size * rng.random() ** 2)
+            value_id, value_label = topic_id(j), topic_title(j, seed)
+        values = properties.setdefault(label, [])
+        if not any(v["id"] == value_id for v in values):
+            values.append(
+                {"label": value_label, "url": ENTITY_URL + value_id, "id": value_id}
+            )
+
+    return {
+        "id": topic_id(i),
+        "title": topic_title(i, seed),
+        "wikidata_url": ENTITY_URL + topic_id(i),
+        "description": _sentence(rng).rstrip(".").lower(),
+        "topic_type": rng.choice(TOPIC_TYPES),
+        "properties": properties,
+    }
+
+
+def wikipedia_page(
+    i: int, size: int, seed: int = 0, content_chars: int = 2000
+) -> Dict[str, Any]:
+    """Return the Wikipedia fields of topic ``i`` as the enrichment step adds them."""
+    rng = _rng(seed, i, 2)
+    title = topic_title(i, seed)
+    categories = set()
+    for _ in range(rng.randint(3, 8)):
+        if rng.random() < HUB_CATEGORY_RATE:
+            categories.add(f"Category {rng.randrange(HUB_CATEGORIES)}")
+        else:
+            categories.add(
+                f"Category {HUB_CATEGORIES + rng.randrange(max(50, size // 2))}"
+            )
+    categories = sorted(categories)
+    sections = rng.sample(_HEADINGS, rng.randint(2, len(_HEADINGS)))
+
+    summary = " ".join(_sentence(rng) for _ in range(3))
+    parts = [summary]
+    per_section = max(1, content_chars // len(sections))
+    for heading in sections:
+        body = []
+        length = 0
+        while length < per_section:
+            sentence = _sentence(rng)
+            body.append(sentence)
+            length += len(sentence) + 1
+        parts.append(f"\n\n== {heading} ==\n" + " ".join(body))
+
+    return {
+        "url": "https://en.wikipedia.org/wiki/" + title.replace(" ", "_"),
+        "summary": summary,
+        "categories": categories,
+        "content": "".join(parts),
+        "sections": sections,
+    }
+
+
+def generate_topics(
+    size: int,
+    seed: int = 0,
+    enriched: bool = True,
+    content_chars: int = 2000,
+    domain: str = "programming",
+) -> List[Dict[str, Any]]:
+    """Generate ``size`` topics, with their Wikipedia fields when ``enriched``."""
+    topics = []
+    for i in range(size):
+        topic = wikidata_topic(i, size, seed)
+        if enriched:
+            topic.update(wikipedia_page(i, size, seed, content_chars))
+            topic["domain"] = domain
+        topics.append(topic)
+    return topics
@@ -0,0 +1,191 @@
+"""Durable per-stage checkpoints for resumable pipeline runs.
+
+A run directory holds ``checkpoints/run.json`` (run parameters and finished
+stages) and one append-only ``checkpoints/{stage}.jsonl`` per stage with a
+``{"id": ..., "payload": ...}`` record for every completed topic. Records are
+flushed on every append and fsynced once ``CHECKPOINT_FSYNC_RECORDS`` records
+or ``CHECKPOINT_FSYNC_INTERVAL`` seconds have accumulated, so a crash loses at
+most the last unsynced batch, which is simply redone on resume. A record cut
+off by a crash is dropped when the file is reopened.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from src.logger import get_logger
+from src.config import CHECKPOINT_FSYNC_RECORDS, CHECKPOINT_FSYNC_INTERVAL
+
+logger = get_logger(__name__)
+
+CHECKPOINT_DIR = "checkpoints"
+MANIFEST_FILE = "run.json"
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class StageCheckpoint:
+    """Append-only JSONL log of the topics a stage has completed.
+
+    Args:
+        path: Path of the JSONL file
+        fsync_records: Number of appended records per fsync
+        fsync_interval: Maximum seconds between fsyncs while appending
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        fsync_records: int = CHECKPOINT_FSYNC_RECORDS,
+        fsync_interval: float = CHECKPOINT_FSYNC_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.fsync_records = max(1, fsync_records)
+        self.fsync_interval = fsync_interval
+        self.completed: Dict[str, Any] = self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _load(self) -> Dict[str, Any]:
+        """Read completed records, truncating a partial last line."""
+        completed: Dict[str, Any] = {}
+        if not self.path.exists():
+            return completed
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                completed[record["id"]] = record.get("payload")
+                valid_bytes += len(line)
+        if valid_bytes < self.path.stat().st_size:
+            logger.warning(f"Dropping a partial record at the end of {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return completed
+
+    def __contains__(self, topic_id: str) -> bool:
+        return topic_id in self.completed
+
+    def __len__(self) -> int:
+        return len(self.completed)
+
+    def get(self, topic_id: str) -> Optional[Any]:
+        return self.completed.get(topic_id)
+
+    def append(self, records: Iterable[Tuple[str, Any]]) -> None:
+        """Record completed topics as ``(id, payload)`` pairs."""
+        count = 0
+        for topic_id, payload in records:
+            line = json.dumps(
+                {"id": topic_id, "payload": payload},
+                ensure_ascii=False,
+                separators=(",", ":"),
+                default=str,
+            )
+            self._file.write(line + "\n")
+            self.completed[topic_id] = payload
+            count += 1
+        if not count:
+            return
+        self._file.flush()
+        self._unsynced += count
+        if (
+            self._unsynced >= self.fsync_records
+            or time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.sync()
+
+    def sync(self) -> None:
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class RunCheckpoint:
+    """Checkpoints of one run directory: its parameters, finished stages and stage logs.
+
+    Args:
+        run_dir: The run's output directory
+        params: Run parameters (domain, limit, ...); stored on the first
+            open and returned from ``params`` when resuming
+    """
+
+    def __init__(
+        self, run_dir: Union[str, Path], params: Optional[Dict[str, Any]] = None
+    ):
+        self.run_dir = Path(run_dir)
+        self.directory = self.run_dir / CHECKPOINT_DIR
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.directory / MANIFEST_FILE
+        if self._manifest_path.exists():
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {"params": params or {}, "completed_stages": {}}
+            _write_json(self._manifest_path, self._manifest)
+        self._stages: Dict[str, StageCheckpoint] = {}
+
+    @classmethod
+    def resume(cls, run_dir: Union[str, Path]) -> "RunCheckpoint":
+        """Open the checkpoints of an existing run directory."""
+        if not (Path(run_dir) / CHECKPOINT_DIR / MANIFEST_FILE).exists():
+            raise ValueError(f"No checkpoints to resume in {run_dir}")
+        return cls(run_dir)
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self._manifest["params"]
+
+    def stage(self, name: str) -> StageCheckpoint:
+        """Return the (lazily opened) record log of a stage."""
+        checkpoint = self._stages.get(name)
+        if checkpoint is None:
+            checkpoint = self._stages[name] = StageCheckpoint(
+                self.directory / f"{name}.jsonl"
+            )
+            if checkpoint.completed:
+                logger.info(
+                    f"Resuming stage '{name}' with {len(checkpoint)} completed topics"
+                )
+        return checkpoint
+
+    def is_complete(self, name: str) -> bool:
+        return name in self._manifest["completed_stages"]
+
+    def stage_result(self, name: str) -> Optional[Any]:
+        """Return what ``complete`` recorded for a finished stage."""
+        return self._manifest["completed_stages"].get(name)
+
+    def complete(self, name: str, result: Any = True) -> None:
+        """Mark a stage as finished, syncing its record log first."""
+        if name in self._stages:
+            self._stages[name].sync()
+        self._manifest["completed_stages"][name] = result
+        _write_json(self._manifest_path, self._manifest)
+
+    def close(self) -> None:
+        for checkpoint in self._stages.values():
+            checkpoint.close()
+        self._stages.clear()
@@ -4,25 +4,127 @@ import os
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
 MONGO_DB = os.getenv("MONGO_DB", "my_kg_db")
 MONGO_COLLECTION = os.getenv("MONGO_COLLECTION", "my_kg_collection")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+# Number of upserts sent per bulk_write call
+MONGO_BULK_CHUNK_SIZE = int(os.getenv("MONGO_BULK_CHUNK_SIZE", 500))
+# Number of documents per page when streaming topics out of MongoDB
+MONGO_READ_BATCH_SIZE = int(os.getenv("MONGO_READ_BATCH_SIZE", 200))
 
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
+# Async cache client: socket timeout, and the circuit breaker that skips Redis
+# for REDIS_BREAKER_RESET seconds after REDIS_BREAKER_FAILURES failures in a row
+REDIS_ASYNC_TIMEOUT = float(os.getenv("REDIS_ASYNC_TIMEOUT", 1.0))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", 3))
+REDIS_BREAKER_RESET = float(os.getenv("REDIS_BREAKER_RESET", 30))
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+# Embedding requests: texts and characters per request, requests in flight, retries
+OLLAMA_EMBED_BATCH_SIZE = int(os.getenv("OLLAMA_EMBED_BATCH_SIZE", 32))
+OLLAMA_EMBED_MAX_BATCH_CHARS = int(os.getenv("OLLAMA_EMBED_MAX_BATCH_CHARS", 32000))
+OLLAMA_EMBED_CONCURRENCY = int(os.getenv("OLLAMA_EMBED_CONCURRENCY", 4))
+OLLAMA_EMBED_MAX_RETRIES = int(os.getenv("OLLAMA_EMBED_MAX_RETRIES", 3))
+# Embedding cache keyed by hash of (model, normalized text): "redis", "disk" or "none"
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "redis")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.sqlite3")
+# Seconds a cached embedding is kept (0 = forever) and most vectors kept on disk (0 = unbounded)
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", 30 * 86400))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500000))
+# Number of chunks held in memory and embedded together
+EMBEDDING_CHUNK_BUFFER_SIZE = int(os.getenv("EMBEDDING_CHUNK_BUFFER_SIZE", 256))
 
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma")
+# Upper bound on documents per Chroma write (also capped by Chroma's own limit)
+CHROMA_MAX_BATCH_SIZE = int(os.getenv("CHROMA_MAX_BATCH_SIZE", 5000))
+# Query vectors sent per Chroma query call
+CHROMA_QUERY_BATCH_SIZE = int(os.getenv("CHROMA_QUERY_BATCH_SIZE", 256))
+# Vector store used for embeddings: "chroma" or "local" (memory-mapped index)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "./vector_index")
+# Storage dtype ("float16" or "float32") and metric ("cosine", "l2" or "ip")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float16")
+VECTOR_INDEX_METRIC = os.getenv("VECTOR_INDEX_METRIC", "cosine")
+# Rows scored per matrix product during exact search
+VECTOR_INDEX_BLOCK_ROWS = int(os.getenv("VECTOR_INDEX_BLOCK_ROWS", 65536))
+# Worker threads running vector store I/O for the async facade
+VECTOR_STORE_WORKERS = int(os.getenv("VECTOR_STORE_WORKERS", 1))
 
 DEFAULT_DOMAIN = "programming"
 DATA_DIR = os.getenv("DATA_DIR", "./output")
+# Timing spans and counters, written to run_report.json in the output directory;
+# a non-zero METRICS_PROMETHEUS_PORT also serves them at /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_PROMETHEUS_PORT = int(os.getenv("METRICS_PROMETHEUS_PORT", 0))
+# Per-stage JSONL checkpoints of a run (see src/checkpoint.py) are fsynced every
+# CHECKPOINT_FSYNC_RECORDS records or CHECKPOINT_FSYNC_INTERVAL seconds
+CHECKPOINT_FSYNC_RECORDS = int(os.getenv("CHECKPOINT_FSYNC_RECORDS", 500))
+CHECKPOINT_FSYNC_INTERVAL = float(os.getenv("CHECKPOINT_FSYNC_INTERVAL", 2.0))
 REDIS_CACHE_EXPIRATION = 86400
 
+# Two-tier topic cache for the Wiki collectors: an in-process LRU (bounded by
+# entries, decoded payload bytes and age) in front of compressed Redis values
+TOPIC_CACHE_LRU_ITEMS = int(os.getenv("TOPIC_CACHE_LRU_ITEMS", 10000))
+TOPIC_CACHE_LRU_BYTES = int(os.getenv("TOPIC_CACHE_LRU_BYTES", 256 * 1024 * 1024))
+TOPIC_CACHE_LRU_TTL = float(os.getenv("TOPIC_CACHE_LRU_TTL", 600))
+# Payload codec: "auto" (zstd if installed, else zlib), "zstd", "zlib" or "none";
+# payloads smaller than TOPIC_CACHE_COMPRESS_MIN_BYTES are stored uncompressed
+TOPIC_CACHE_CODEC = os.getenv("TOPIC_CACHE_CODEC", "auto")
+TOPIC_CACHE_COMPRESS_MIN_BYTES = int(os.getenv("TOPIC_CACHE_COMPRESS_MIN_BYTES", 256))
+# Bump to switch to fresh keys after a change of the cached schema
+TOPIC_CACHE_VERSION = int(os.getenv("TOPIC_CACHE_VERSION", 1))
+
 WIKIDATA_ENDPOINT = os.getenv("WIKIDATA_ENDPOINT", "https://query.wikidata.org/sparql")
 WIKIDATA_USER_AGENT = os.getenv("WIKIDATA_USER_AGENT", "KnowledgeGraphBot/1.0 (your-email@example.com)")
 WIKIPEDIA_USER_AGENT = os.getenv("WIKIPEDIA_USER_AGENT", "KnowledgeGraphWikipediaBot/1.0 (your-email@example.com)")
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+# MediaWiki accepts at most 50 titles per query for regular clients
+WIKIPEDIA_TITLES_PER_REQUEST = min(int(os.getenv("WIKIPEDIA_TITLES_PER_REQUEST", 50)), 50)
+# Streaming enrichment pipeline: page workers in flight and Mongo flush size
+WIKIPEDIA_ENRICH_CONCURRENCY = int(os.getenv("WIKIPEDIA_ENRICH_CONCURRENCY", 16))
+ENRICH_WRITE_BATCH_SIZE = int(os.getenv("ENRICH_WRITE_BATCH_SIZE", 100))
+ENRICH_WRITE_FLUSH_INTERVAL = float(os.getenv("ENRICH_WRITE_FLUSH_INTERVAL", 5))
+# Article cleaning runs in a process pool off the event loop, a batch of
+# articles per task; 0 workers cleans inline
+TEXT_PROCESSING_WORKERS = int(os.getenv("TEXT_PROCESSING_WORKERS", min(4, os.cpu_count() or 1)))
+TEXT_PROCESSING_BATCH_SIZE = int(os.getenv("TEXT_PROCESSING_BATCH_SIZE", 25))
+# BeautifulSoup parser for the synchronous TOC helper: "html.parser" or "lxml"
+HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")
 DOMAIN = os.getenv("DOMAIN", "programming")
+
+# Shared HTTP client settings for all Wikidata / Wikipedia traffic
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 10))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 5))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 30))
+# Requests per second allowed per host; lowered automatically on 429/503
+WIKIDATA_REQUESTS_PER_SECOND = float(os.getenv("WIKIDATA_REQUESTS_PER_SECOND", 5))
+WIKIPEDIA_REQUESTS_PER_SECOND = float(os.getenv("WIKIPEDIA_REQUESTS_PER_SECOND", 10))
+HTTP_DEFAULT_REQUESTS_PER_SECOND = float(
+    os.getenv("HTTP_DEFAULT_REQUESTS_PER_SECOND", 10)
+)
+
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", 5))
+# Categories / topic types shared by more topics than this produce no
+# shared_category / same_type edges, which keeps hub buckets from adding
+# O(n^2) edges; 0 removes the cap
+KG_MAX_CATEGORY_SIZE = int(os.getenv("KG_MAX_CATEGORY_SIZE", 1000)) or None
+KG_MAX_TYPE_SIZE = int(os.getenv("KG_MAX_TYPE_SIZE", 1000)) or None
+# Number of entities whose properties are fetched in a single SPARQL request
+WIKIDATA_PROPERTIES_BATCH_SIZE = int(os.getenv("WIKIDATA_PROPERTIES_BATCH_SIZE", 50))
+# semantic_similarity edges from topic embeddings (kNN over cosine similarity)
+KG_SEMANTIC_EDGES = os.getenv("KG_SEMANTIC_EDGES", "false").lower() in ("1", "true", "yes")
+KG_SEMANTIC_K = int(os.getenv("KG_SEMANTIC_K", 10))
+KG_SEMANTIC_THRESHOLD = float(os.getenv("KG_SEMANTIC_THRESHOLD", 0.75))
+KG_SEMANTIC_APPROXIMATE = os.getenv("KG_SEMANTIC_APPROXIMATE", "false").lower() in ("1", "true", "yes")
+KG_SEMANTIC_N_PROBE = int(os.getenv("KG_SEMANTIC_N_PROBE", 8))
+# Similarity scores held in memory per block (float32), bounds kNN memory use
+KG_SEMANTIC_BLOCK_ELEMENTS = int(os.getenv("KG_SEMANTIC_BLOCK_ELEMENTS", 2**24))
+# Graph state versions saved as deltas between two full snapshots
+KG_STATE_SNAPSHOT_EVERY = int(os.getenv("KG_STATE_SNAPSHOT_EVERY", 10))
 
 # In src/config.py
 DOMAIN = "programming"
@@ -36,6 +138,13 @@ DOMAIN_COLORS = {
     }
 }
 
+# Graphs with more nodes than this are rendered in the large-graph HTML mode
+LARGE_GRAPH_NODE_THRESHOLD = int(os.getenv("LARGE_GRAPH_NODE_THRESHOLD", 2000))
+# Edges kept per node when pruning large graphs for display
+LARGE_GRAPH_TOP_K_EDGES = int(os.getenv("LARGE_GRAPH_TOP_K_EDGES", 5))
+# Target node count after degree-based aggregation
+LARGE_GRAPH_MAX_NODES = int(os.getenv("LARGE_GRAPH_MAX_NODES", 2000))
+
 # Define colors for each topic type
 TOPIC_TYPE_COLORS = {
     "programming_language": "#FF5733",
@@ -1,4 +1,12 @@
-# __init__.py for data_collection
-from .wiki_data_service import get_data_from_wiki, get_and_save_from_wiki
+# __init__.py for data_collection; submodules are imported on first use of their exports
+from src.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "get_data_from_wiki": ".wiki_data_service",
+        "get_and_save_from_wiki": ".wiki_data_service",
+    },
+)
 
 __all__ = ["get_data_from_wiki", "get_and_save_from_wiki"]
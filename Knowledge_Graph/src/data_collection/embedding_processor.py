@@ -1,15 +1,45 @@
 """Process topics from MongoDB to generate and store embeddings."""
 
 import asyncio
-from typing import List, Dict, Any, Optional
+import json
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+from bson import ObjectId
 
 from src.logger import get_logger
-from src.database.mongo import get_topics_from_mongo, store_topics_in_mongo
+from src.config import MONGO_READ_BATCH_SIZE
+from src.database.mongo import iter_topics_from_mongo, store_topics_in_mongo
 from src.embeddings.service import process_topics_batch_async
 
 logger = get_logger(__name__)
 
 
+# Only the fields needed to embed a topic and record its reference
+EMBEDDING_PROJECTION = {
+    "_id": 1,
+    "id": 1,
+    "title": 1,
+    "summary": 1,
+    "content_for_embedding": 1,
+    "embedding_id": 1,
+    "embedding_ids": 1,
+    "embedding_hash": 1,
+}
+
+
+def convert_objectid_to_str(obj):
+    if isinstance(obj, dict):
+        return {k: convert_objectid_to_str(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_objectid_to_str(elem) for elem in obj]
+    elif hasattr(obj, "oid"):  # Check if it's an ObjectId-like object
+        return str(obj.oid)  # Access the 'oid' attribute and convert to string
+    elif isinstance(obj, ObjectId):
+        return str(obj)
+    else:
+        return obj
+
+
 async def process_topics_to_embeddings(
     domain: str,
     collection_name: Optional[str] = None,
@@ -17,80 +47,102 @@ async def process_topics_to_embeddings(
     chunk_size: int = 500,
     chunk_overlap: int = 50,
     topics=None,
+    batch_size: int = MONGO_READ_BATCH_SIZE,
+    after_id: Any = None,
+    return_topics: bool = True,
 ) -> List[Dict[str, Any]]:
     """Process topics from MongoDB, generate embeddings, and store in ChromaDB.
 
+    Topics are streamed from MongoDB in pages of ``batch_size`` with only the
+    fields needed for embedding, so memory stays bounded by the page size.
+
     Args:
         domain: The domain of topics to process (e.g., "programming")
         collection_name: Name for the ChromaDB collection (defaults to f"{domain}_embeddings")
         limit: Maximum number of topics to process
-        chunk_size: Size of content chunks for embeddings
-        chunk_overlap: Overlap between chunks
+        chunk_size: Maximum characters per embedded chunk
+        chunk_overlap: Characters of overlap between consecutive chunks
+        topics: Topics to process instead of reading them from MongoDB
+        batch_size: Number of topics read and embedded per page
+        after_id: Resume after the topic with this MongoDB ``_id``
+        return_topics: Whether to collect and return every processed topic;
+            disable for large domains to keep memory constant
 
     Returns:
-        List of processed topics with embedding references
+        List of processed topics with embedding references (empty when
+        ``return_topics`` is False)
     """
     # Set default collection name based on domain if not provided
     if not collection_name:
         collection_name = f"{domain}_embeddings"
 
-    # Get topics from MongoDB
-    logger.info(
-        f"Retrieving {limit} {domain} topics from MongoDB for embedding generation"
-    )
     if topics is None:
-        topics = await get_topics_from_mongo(domain=domain, limit=limit)
-
-        if not topics:
-            logger.warning(f"No topics found in MongoDB for domain '{domain}'")
-            return []
-
-    logger.info(f"Processing {len(topics)} topics for embedding generation")
-
-    # Process topics to generate and store embeddings
-    # Use the async version directly since we're    n async context
-    processed_topics = await process_topics_batch_async(
-        topics=topics,
-        collection_name=collection_name,
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-    )
-
-    # Write to a file
-    import json
-    from bson import ObjectId
-
-    def convert_objectid_to_str(obj):
-        if isinstance(obj, dict):
-            return {k: convert_objectid_to_str(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_objectid_to_str(elem) for elem in obj]
-        elif hasattr(obj, "oid"):  # Check if it's an ObjectId-like object
-            return str(obj.oid)  # Access the 'oid' attribute and convert to string
-        elif isinstance(obj, ObjectId):
-            return str(obj)
-        else:
-            return obj
+        logger.info(
+            f"Streaming up to {limit} {domain} topics from MongoDB for embedding generation"
+        )
+        pages = iter_topics_from_mongo(
+            domain=domain,
+            batch_size=batch_size,
+            projection=EMBEDDING_PROJECTION,
+            after_id=after_id,
+            limit=limit,
+        )
+    else:
+        pages = _iter_pages(topics, batch_size)
 
-    processed_topics_serializable = convert_objectid_to_str(processed_topics)
+    processed_topics = []
+    processed_count = 0
 
+    # Write the processed topics as one JSON array, page by page
     with open(f"{collection_name}.json", "w") as f:
-        json.dump(processed_topics_serializable, f)
-
-    # Update topics in MongoDB with embedding references
-    logger.info(
-        f"Updating {len(processed_topics)} topics in MongoDB with embedding references"
-    )
-    success = await store_topics_in_mongo(topics=processed_topics, domain=domain)
-
-    if success:
-        logger.info("Successfully updated topics with embedding references in MongoDB")
+        f.write("[")
+        async for page in pages:
+            # Process topics to generate and store embeddings
+            processed_page = await process_topics_batch_async(
+                topics=page,
+                collection_name=collection_name,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+            )
+
+            for topic in convert_objectid_to_str(processed_page):
+                if processed_count:
+                    f.write(",")
+                json.dump(topic, f)
+                processed_count += 1
+
+            # Update topics in MongoDB with embedding references
+            success = await store_topics_in_mongo(topics=processed_page, domain=domain)
+            if success:
+                logger.info(
+                    f"Updated {len(processed_page)} topics in MongoDB with embedding references"
+                )
+            else:
+                logger.error(
+                    "Failed to update topics with embedding references in MongoDB"
+                )
+
+            if return_topics:
+                processed_topics.extend(processed_page)
+        f.write("]")
+
+    if not processed_count:
+        logger.warning(f"No topics found in MongoDB for domain '{domain}'")
     else:
-        logger.error("Failed to update topics with embedding references in MongoDB")
+        logger.info(f"Processed {processed_count} topics for embedding generation")
 
     return processed_topics
 
 
+async def _iter_pages(
+    topics: List[Dict[str, Any]], batch_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield an in-memory topic list in pages, like ``iter_topics_from_mongo``."""
+    batch_size = max(1, batch_size)
+    for i in range(0, len(topics), batch_size):
+        yield topics[i : i + batch_size]
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -121,6 +173,12 @@ if __name__ == "__main__":
     parser.add_argument(
         "--chunk-overlap", type=int, default=50, help="Overlap between chunks"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=MONGO_READ_BATCH_SIZE,
+        help="Number of topics read from MongoDB and embedded per page",
+    )
 
     args = parser.parse_args()
 
@@ -131,5 +189,7 @@ if __name__ == "__main__":
             limit=args.limit,
             chunk_size=args.chunk_size,
             chunk_overlap=args.chunk_overlap,
+            batch_size=args.batch_size,
+            return_topics=False,
         )
     )
@@ -0,0 +1,236 @@
+"""Shared asynchronous HTTP client for all Wikidata and Wikipedia traffic.
+
+A single pooled ``aiohttp.ClientSession`` is reused for the whole process so
+connections are kept alive, and every request goes through a per-host token
+bucket whose rate backs off on 429/503 responses and ``Retry-After`` headers.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from src.logger import get_logger
+from src.metrics import span, increment
+from src.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    WIKIDATA_ENDPOINT,
+    WIKIPEDIA_API_URL,
+    WIKIDATA_REQUESTS_PER_SECOND,
+    WIKIPEDIA_REQUESTS_PER_SECOND,
+    HTTP_DEFAULT_REQUESTS_PER_SECOND,
+)
+
+logger = get_logger(__name__)
+
+# Status codes that mean "slow down and try again"
+RETRY_STATUSES = {429, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_limiters: Dict[str, "TokenBucket"] = {}
+
+
+class TokenBucket:
+    """Token bucket rate limiter whose refill rate adapts to back-pressure.
+
+    The rate is halved whenever the server throttles us and grows back
+    additively on every successful response, up to the configured maximum.
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.2):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """Slow down after the server signalled overload.
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if any
+        """
+        now = time.monotonic()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._updated = now
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def recover(self) -> None:
+        """Speed back up after a successful response."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+def _host_rate(host: str) -> float:
+    """Return the configured requests-per-second budget for a host."""
+    if host == urlparse(WIKIDATA_ENDPOINT).hostname:
+        return WIKIDATA_REQUESTS_PER_SECOND
+    if host == urlparse(WIKIPEDIA_API_URL).hostname or host.endswith("wikipedia.org"):
+        return WIKIPEDIA_REQUESTS_PER_SECOND
+    return HTTP_DEFAULT_REQUESTS_PER_SECOND
+
+
+def get_rate_limiter(url: str) -> TokenBucket:
+    """Return the process-wide rate limiter for the host of ``url``."""
+    host = urlparse(url).hostname or ""
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = TokenBucket(_host_rate(host))
+        _limiters[host] = limiter
+    return limiter
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared pooled HTTP session, creating it on first use."""
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        # Sessions and limiters are bound to the loop that created them
+        _limiters.clear()
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+        _session_loop = loop
+        logger.debug("Shared HTTP session created")
+    return _session
+
+
+async def close_http_session() -> None:
+    """Close the shared HTTP session and release pooled connections."""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.debug("Shared HTTP session closed")
+    _session = None
+    _session_loop = None
+    _limiters.clear()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt."""
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2**attempt))
+
+
+async def request(
+    method: str,
+    url: str,
+    response_type: str = "json",
+    max_retries: int = HTTP_MAX_RETRIES,
+    **kwargs: Any,
+) -> Tuple[int, Any]:
+    """Send a rate-limited HTTP request with retries on transient failures.
+
+    Args:
+        method: HTTP method (e.g., "GET", "POST")
+        url: Request URL
+        response_type: "json" to decode the body as JSON, "text" for a string
+        max_retries: Number of retries after the first attempt
+        **kwargs: Passed through to ``aiohttp.ClientSession.request``
+
+    Returns:
+        Tuple of (HTTP status, decoded body or None if the status is not 200)
+
+    Raises:
+        aiohttp.ClientError or asyncio.TimeoutError once retries are exhausted
+    """
+    session = await get_http_session()
+    limiter = get_rate_limiter(url)
+    host = urlparse(url).hostname or ""
+
+    with span("http.request", host=host) as request_span:
+        for attempt in range(max_retries + 1):
+            await limiter.acquire()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status in RETRY_STATUSES and attempt < max_retries:
+                        retry_after = _parse_retry_after(
+                            response.headers.get("Retry-After")
+                        )
+                        if response.status in THROTTLE_STATUSES:
+                            limiter.throttle(retry_after)
+                        delay = max(retry_after or 0.0, _backoff_delay(attempt))
+                        increment("http.retries", host=host, reason=response.status)
+                        logger.warning(
+                            f"{method} {url} returned {response.status}; "
+                            f"retrying in {delay:.2f}s (attempt {attempt + 1}/{max_retries})"
+                        )
+                    else:
+                        if response.status != 200:
+                            return response.status, None
+
+                        limiter.recover()
+                        request_span.add(items=1, bytes=response.content_length or 0)
+                        if response_type == "text":
+                            return response.status, await response.text()
+                        return response.status, await response.json(content_type=None)
+                # Sleep only after the connection went back to the pool
+                await asyncio.sleep(delay)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= max_retries:
+                    raise
+                delay = _backoff_delay(attempt)
+                increment("http.retries", host=host, reason=type(e).__name__)
+                logger.warning(
+                    f"{method} {url} failed: {str(e)}; "
+                    f"retrying in {delay:.2f}s (attempt {attempt + 1}/{max_retries})"
+                )
+                await asyncio.sleep(delay)
+
+    # Unreachable: the last attempt either returns or raises
+    raise RuntimeError(f"Exhausted retries for {method} {url}")
@@ -0,0 +1,134 @@
+"""CPU-bound cleaning of Wikipedia article text, off the event loop.
+
+Each article is cleaned once: citation markers are stripped from ``content``
+and ``content_for_embedding`` (the same text on one line with whitespace
+collapsed) is derived from it in the same pass. ``normalize_topics`` sends
+batches of ``TEXT_PROCESSING_BATCH_SIZE`` articles to a shared process pool
+of ``TEXT_PROCESSING_WORKERS`` workers, so cleaning scales across cores while
+the event loop only does I/O.
+"""
+
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.logger import get_logger
+from src.metrics import span
+from src.config import TEXT_PROCESSING_WORKERS, TEXT_PROCESSING_BATCH_SIZE, HTML_PARSER
+
+logger = get_logger(__name__)
+
+_CITATION_RE = re.compile(r"\[\d+]")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def clean_article(content: str) -> Tuple[str, str]:
+    """Return (content without citation markers, whitespace-collapsed embedding text)."""
+    content = _CITATION_RE.sub("", content)
+    # str.split() splits on the same whitespace as \s+ and drops leading and
+    # trailing runs, so this matches re.sub(r"\s+", " ", ...).strip()
+    return content, " ".join(content.split())
+
+
+def normalize_for_embedding(content: str) -> str:
+    """Return the embedding text of an article (see ``clean_article``)."""
+    return clean_article(content)[1]
+
+
+def _clean_batch(contents: List[str]) -> List[Tuple[str, str]]:
+    return [clean_article(content) for content in contents]
+
+
+def parse_toc(html: str, parser: str = HTML_PARSER) -> List[str]:
+    """Return the section titles of a rendered Wikipedia page's table of contents.
+
+    Only the ``toc`` element is parsed. ``parser`` is any BeautifulSoup tree
+    builder; "lxml" is several times faster than "html.parser" when installed.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    soup = BeautifulSoup(html, features=parser, parse_only=SoupStrainer(id="toc"))
+    toc = soup.find(id="toc")
+    if not toc:
+        return []
+    return [li.a.text.strip() for li in toc.find_all("li") if li.a]
+
+
+def get_text_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared text processing pool, None when cleaning runs inline."""
+    global _pool
+    if _pool is None and TEXT_PROCESSING_WORKERS > 0:
+        # Workers are spawned, not forked, because the parent runs threads
+        # (event loop executors, the metrics server)
+        _pool = ProcessPoolExecutor(
+            max_workers=TEXT_PROCESSING_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.debug(
+            f"Text processing pool started with {TEXT_PROCESSING_WORKERS} workers"
+        )
+    return _pool
+
+
+def close_text_pool() -> None:
+    """Shut the shared text processing pool down."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        logger.debug("Text processing pool closed")
+
+
+async def normalize_topics(
+    topics: List[Dict[str, Any]], batch_size: int = TEXT_PROCESSING_BATCH_SIZE
+) -> None:
+    """Clean the articles of topics that have not been cleaned yet, in place.
+
+    Topics with a ``content_for_embedding`` field are skipped, so an article
+    is never cleaned twice.
+
+    Args:
+        topics: Topic dictionaries with a raw "content" field
+        batch_size: Articles per pool task
+    """
+    pending = [
+        t for t in topics if t.get("content") and "content_for_embedding" not in t
+    ]
+    if not pending:
+        return
+
+    pool = get_text_pool()
+    batch_size = max(1, batch_size)
+    batches = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+    with span("text.normalize", pooled=pool is not None) as normalize_span:
+        normalize_span.add(
+            items=len(pending), bytes=sum(len(t["content"]) for t in pending)
+        )
+        results = None
+        if pool is not None:
+            loop = asyncio.get_running_loop()
+            try:
+                results = await asyncio.gather(
+                    *[
+                        loop.run_in_executor(
+                            pool, _clean_batch, [t["content"] for t in batch]
+                        )
+                        for batch in batches
+                    ]
+                )
+            except BrokenProcessPool as e:
+                logger.warning(
+                    f"Text processing pool failed ({str(e)}); cleaning inline"
+                )
+                close_text_pool()
+        if results is None:
+            results = [_clean_batch([t["content"] for t in batch]) for batch in batches]
+
+    for batch, cleaned in zip(batches, results):
+        for topic, (content, content_for_embedding) in zip(batch, cleaned):
+            topic["content"] = content
+            topic["content_for_embedding"] = content_for_embedding
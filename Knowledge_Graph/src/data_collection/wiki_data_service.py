@@ -1,41 +1,117 @@
 from .wikidata.sparql import get_topics_from_wikidata
 from .wikipedia_.api import enrich_with_wikipedia
+from src.checkpoint import RunCheckpoint
 from src.logger import get_logger
-import json
+from typing import Optional
 
 logger = get_logger(__name__)
 
-async def get_data_from_wiki(domain: str, limit: int, save_to_mongo=True) -> list:
+
+def _restore_stage(checkpoint: RunCheckpoint, stage: str) -> list:
+    """Return the topics of a finished stage in their original order.
+
+    Topics missing from the stage log are skipped.
+    """
+    log = checkpoint.stage(stage)
+    topic_ids = checkpoint.stage_result(stage)
+    missing = [topic_id for topic_id in topic_ids if topic_id not in log]
+    if missing:
+        logger.warning(
+            f"{len(missing)} topics of stage '{stage}' are missing from its checkpoint"
+        )
+    return [log.get(topic_id) for topic_id in topic_ids if topic_id in log]
+
+
+def _complete_stage(checkpoint: RunCheckpoint, stage: str, topics: list) -> None:
+    """Mark a stage as finished if its log holds every topic.
+
+    Otherwise the stage is left open, so a resumed run fetches the missing
+    topics again instead of restoring an incomplete result.
+    """
+    log = checkpoint.stage(stage)
+    missing = [topic["id"] for topic in topics if topic["id"] not in log]
+    if missing:
+        logger.warning(
+            f"Stage '{stage}' left incomplete: {len(missing)} topics are not checkpointed"
+        )
+        return
+    checkpoint.complete(stage, [topic["id"] for topic in topics])
+
+
+async def get_data_from_wiki(
+    domain: str,
+    limit: int,
+    save_to_mongo=True,
+    checkpoint: Optional[RunCheckpoint] = None,
+) -> list:
     """
     Fetch and enrich topics from Wikidata and Wikipedia dynamically.
+
+    With a ``checkpoint``, finished stages are restored from the run directory
+    and unfinished ones skip the topics they already completed.
     """
+    if checkpoint is not None and checkpoint.is_complete("wikipedia"):
+        enriched_topics = _restore_stage(checkpoint, "wikipedia")
+        logger.info(f"Restored {len(enriched_topics)} enriched topics from checkpoint")
+        return enriched_topics
+
     # Fetch topics from Wikidata (using SPARQL)
-    topics = await get_topics_from_wikidata(domain=domain, limit=limit)
+    if checkpoint is not None and checkpoint.is_complete("wikidata"):
+        topics = _restore_stage(checkpoint, "wikidata")
+        logger.info(f"Restored {len(topics)} Wikidata topics from checkpoint")
+    else:
+        topics = await get_topics_from_wikidata(
+            domain=domain,
+            limit=limit,
+            checkpoint=checkpoint.stage("wikidata") if checkpoint is not None else None,
+        )
+        if topics and checkpoint is not None:
+            _complete_stage(checkpoint, "wikidata", topics)
     if not topics:
         logger.error(f"Failed to retrieve {domain} topics from Wikidata")
         return []
-    
+
     logger.info(f"Successfully retrieved {len(topics)} topics from Wikidata")
 
     # Enrich topics with Wikipedia data
-    enriched_topics = await enrich_with_wikipedia(topics, domain=domain, save_to_mongo=save_to_mongo)
+    enriched_topics = await enrich_with_wikipedia(
+        topics,
+        domain=domain,
+        save_to_mongo=save_to_mongo,
+        checkpoint=checkpoint.stage("wikipedia") if checkpoint is not None else None,
+    )
+    if enriched_topics and checkpoint is not None:
+        _complete_stage(checkpoint, "wikipedia", enriched_topics)
     if not enriched_topics:
         logger.error(f"Failed to enrich {domain} topics with Wikipedia data")
         return []
-    
-    logger.info(f"Successfully enriched {len(enriched_topics)} topics with Wikipedia data")
+
+    logger.info(
+        f"Successfully enriched {len(enriched_topics)} topics with Wikipedia data"
+    )
     return enriched_topics
 
-async def get_and_save_from_wiki(domain: str, limit: int, save_dir: str, save_to_mongo=True) -> list:
+
+async def get_and_save_from_wiki(
+    domain: str,
+    limit: int,
+    save_dir: str,
+    save_to_mongo=True,
+    checkpoint: Optional[RunCheckpoint] = None,
+) -> list:
     """
     Fetch and enrich topics from Wikidata and Wikipedia.
     File saving is disabled in this version.
     """
-    enriched_topics = await get_data_from_wiki(domain=domain, limit=limit, save_to_mongo=save_to_mongo)
+    enriched_topics = await get_data_from_wiki(
+        domain=domain, limit=limit, save_to_mongo=save_to_mongo, checkpoint=checkpoint
+    )
     if not enriched_topics:
         logger.error(f"Failed to enrich {domain} topics with Wikipedia data")
         return []
-    
+
     # File saving disabled; simply return the enriched topics.
-    logger.info("File saving for enriched topics is disabled. Returning enriched topics directly.")
+    logger.info(
+        "File saving for enriched topics is disabled. Returning enriched topics directly."
+    )
     return enriched_topics
@@ -1,5 +1,7 @@
 """SPARQL query templates for different domain knowledge graphs."""
 
+from typing import List
+
 from src.config import DOMAIN_CONFIGS
 
 # Properties we're interested in for all domains
@@ -94,3 +96,33 @@ def get_properties_query(topic_id: str) -> str:
       SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
     }}
     """
+
+
+def get_properties_batch_query(topic_ids: List[str]) -> str:
+    """Generate a SPARQL query for properties of several topics at once.
+
+    Args:
+        topic_ids: The Wikidata entity IDs (e.g., ["Q123", "Q456"])
+
+    Returns:
+        SPARQL query string returning properties bound to ?topic
+    """
+    property_ids = [f"wdt:{prop['id']}" for prop in TOPIC_PROPERTIES]
+    filter_clause = ", ".join(property_ids)
+    values_clause = " ".join(f"wd:{topic_id}" for topic_id in topic_ids)
+
+    return f"""
+    SELECT ?topic ?property ?propertyLabel ?value ?valueLabel
+    WHERE {{
+      VALUES ?topic {{ {values_clause} }}
+      ?topic ?prop ?value .
+      ?property wikibase:directClaim ?prop .
+      
+      # Filter for specific properties we're interested in
+      FILTER(?prop IN (
+        {filter_clause}
+      ))
+      
+      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en". }}
+    }}
+    """
@@ -1,30 +1,70 @@
 """Asynchronous Wikidata SPARQL API client."""
 
 import asyncio
-import aiohttp
-import json
 from src.logger import get_logger
-from src.database.redis import get_redis_client
+from src.metrics import span, timed, increment
+from ..http_client import request
+from src.database.topic_cache import get_topic_cache
+from src.checkpoint import StageCheckpoint
 from typing import List, Dict, Any, Optional
 from src.config import (
     WIKIDATA_ENDPOINT,
     WIKIDATA_USER_AGENT,
     DOMAIN,
-    BATCH_SIZE,
+    WIKIDATA_PROPERTIES_BATCH_SIZE,
+)
+from .queries import (
+    get_topic_query,
+    get_properties_query,
+    get_properties_batch_query,
+    DOMAIN_CONFIGS,
 )
-from .queries import get_topic_query, get_properties_query, DOMAIN_CONFIGS
 
 logger = get_logger(__name__)
 
 
+async def _run_sparql_query(query: str, kind: str):
+    """Execute a SPARQL query through the shared rate-limited HTTP client.
+
+    Args:
+        query: SPARQL query string
+        kind: Query kind reported in the metrics ("topics", "properties_batch", ...)
+
+    Returns:
+        Tuple of (HTTP status, decoded JSON results)
+    """
+    with span("sparql.query", kind=kind) as query_span:
+        status, results = await request(
+            "POST",
+            WIKIDATA_ENDPOINT,
+            headers={
+                "User-Agent": WIKIDATA_USER_AGENT,
+                "Accept": "application/sparql-results+json",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            data={"query": query},
+        )
+        if status == 200:
+            query_span.add(items=len(results["results"]["bindings"]))
+        return status, results
+
+
+@timed("stage.wikidata")
 async def get_topics_from_wikidata(
-    domain: str = DOMAIN, limit: int = 20
+    domain: str = DOMAIN,
+    limit: int = 20,
+    properties_batch_size: int = WIKIDATA_PROPERTIES_BATCH_SIZE,
+    checkpoint: Optional[StageCheckpoint] = None,
 ) -> List[Dict[str, Any]]:
     """Fetch domain-specific topics from Wikidata using SPARQL (async).
 
     Args:
         domain: Domain to fetch topics for (e.g., "programming", "mathematics")
         limit: Maximum number of topics to retrieve
+        properties_batch_size: Number of topics whose properties are fetched
+            per SPARQL request
+        checkpoint: Stage log of a resumable run; topics recorded in it are
+            not fetched again and every finished batch is appended to it
 
     Returns:
         List of topics with their properties
@@ -40,22 +80,11 @@ async def get_topics_from_wikidata(
     query = get_topic_query(domain, limit)
 
     try:
-        # Execute SPARQL query using aiohttp directly
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                WIKIDATA_ENDPOINT,
-                headers={
-                    "User-Agent": WIKIDATA_USER_AGENT,
-                    "Accept": "application/sparql-results+json",
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                data={"query": query},
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"SPARQL query failed with status {response.status}")
-                    return []
-
-                results = await response.json()
+        # Execute SPARQL query through the shared HTTP client
+        status, results = await _run_sparql_query(query, "topics")
+        if status != 200:
+            logger.error(f"SPARQL query failed with status {status}")
+            return []
     except Exception as e:
         logger.error(f"SPARQL query failed: {str(e)}")
         return []
@@ -80,35 +109,192 @@ async def get_topics_from_wikidata(
                 "properties": {},
             }
 
-    # Process topics in batches
     topic_ids = list(topics.keys())
-    redis_client = get_redis_client()
-
-    # Divide topics into batches
+    increment("wikidata.topics", len(topic_ids))
+    if checkpoint is not None:
+        for topic_id in topic_ids:
+            if topic_id in checkpoint:
+                topics[topic_id] = checkpoint.get(topic_id)
+        pending_ids = [t for t in topic_ids if t not in checkpoint]
+        logger.info(f"Properties: {len(topic_ids) - len(pending_ids)} from checkpoint")
+    else:
+        pending_ids = topic_ids
+
+    # One pipelined cache pass over every topic before any fetching
+    cached = await _get_cached_properties_many(domain, pending_ids)
+    for topic_id, properties in cached.items():
+        topics[topic_id]["properties"] = properties
+    missing_ids = [t for t in pending_ids if t not in cached]
+    logger.info(f"Properties: {len(cached)} cached, {len(missing_ids)} to fetch")
+    if checkpoint is not None:
+        checkpoint.append((topic_id, topics[topic_id]) for topic_id in cached)
+
+    # Fetch properties for several topics per request
+    properties_batch_size = max(1, properties_batch_size)
     batches = [
-        topic_ids[i : i + BATCH_SIZE] for i in range(0, len(topic_ids), BATCH_SIZE)
+        missing_ids[i : i + properties_batch_size]
+        for i in range(0, len(missing_ids), properties_batch_size)
     ]
 
-    for batch in batches:
-        # Process each batch concurrently with asyncio.gather
-        await asyncio.gather(
-            *[
-                get_topic_properties(topic_id, topics[topic_id], domain, redis_client)
-                for topic_id in batch
-            ]
-        )
-
-        # Sleep to avoid overwhelming the server
-        await asyncio.sleep(0.5)
+    async def fetch_batch(batch: List[str]) -> bool:
+        ok = await get_topics_properties_batch(batch, topics, domain, use_cache=False)
+        if ok and checkpoint is not None:
+            checkpoint.append((topic_id, topics[topic_id]) for topic_id in batch)
+        return ok
+
+    # Batches run concurrently; the shared client paces them to the endpoint's rate
+    results = await asyncio.gather(*[fetch_batch(batch) for batch in batches])
+
+    # Write everything fetched back in one pipeline
+    await _cache_properties_many(
+        domain,
+        {
+            topic_id: topics[topic_id]["properties"]
+            for batch, ok in zip(batches, results)
+            if ok
+            for topic_id in batch
+        },
+    )
+    logger.info(get_topic_cache("wikidata").report())
 
     return list(topics.values())
 
 
+def _add_property_binding(topic: Dict[str, Any], result: Dict[str, Any]) -> None:
+    """Add a single SPARQL property binding to a topic's properties.
+
+    Args:
+        topic: The topic dictionary to update
+        result: A binding with propertyLabel, value and valueLabel
+    """
+    property_label = result["propertyLabel"]["value"]
+    value_url = result["value"]["value"]
+    value_label = result["valueLabel"]["value"]
+
+    # Extract Wikidata ID if it's an entity
+    value_id = None
+    if "wikidata.org/entity/" in value_url:
+        value_id = value_url.split("/")[-1]
+
+    # Initialize property group if it doesn't exist
+    if property_label not in topic["properties"]:
+        topic["properties"][property_label] = []
+
+    # Create value object with label, URL and ID
+    value_object = {"label": value_label, "url": value_url}
+
+    if value_id:
+        value_object["id"] = value_id
+
+    # Add if not already present
+    if not any(
+        v.get("label") == value_label for v in topic["properties"][property_label]
+    ):
+        topic["properties"][property_label].append(value_object)
+
+
+def _cache_key(domain: str, topic_id: str) -> str:
+    return f"{domain}:{topic_id}"
+
+
+async def _get_cached_properties_many(
+    domain: str, topic_ids: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Read many topics' properties from the topic cache.
+
+    Args:
+        domain: The domain being processed
+        topic_ids: The Wikidata entity IDs
+
+    Returns:
+        Mapping of entity ID to cached properties for the cache hits
+    """
+    keys = {_cache_key(domain, t): t for t in topic_ids}
+    cached = await get_topic_cache("wikidata").get_many(keys)
+    return {keys[key]: properties for key, properties in cached.items()}
+
+
+async def _cache_properties_many(
+    domain: str, properties_by_id: Dict[str, Dict[str, Any]]
+) -> None:
+    """Write many topics' properties to the topic cache in one pipeline.
+
+    Args:
+        domain: The domain being processed
+        properties_by_id: Mapping of entity ID to its properties
+    """
+    await get_topic_cache("wikidata").set_many(
+        {
+            _cache_key(domain, topic_id): properties
+            for topic_id, properties in properties_by_id.items()
+        }
+    )
+
+
+async def get_topics_properties_batch(
+    topic_ids: List[str],
+    topics: Dict[str, Dict[str, Any]],
+    domain: str,
+    use_cache: bool = True,
+) -> bool:
+    """Get detailed properties for several topics with one SPARQL request (async).
+
+    Args:
+        topic_ids: The Wikidata entity IDs to fetch
+        topics: Mapping of entity ID to the topic dictionary to update
+        domain: The domain being processed
+        use_cache: Serve hits from Redis first and cache what was fetched
+
+    Returns:
+        True if successful, False otherwise
+    """
+    # Serve what we can from the cache first
+    missing_ids = list(topic_ids)
+    if use_cache:
+        cached = await _get_cached_properties_many(domain, topic_ids)
+        for topic_id, properties in cached.items():
+            topics[topic_id]["properties"] = properties
+        missing_ids = [t for t in topic_ids if t not in cached]
+
+    if not missing_ids:
+        return True
+
+    query = get_properties_batch_query(missing_ids)
+
+    try:
+        status, results = await _run_sparql_query(query, "properties_batch")
+        if status != 200:
+            logger.error(
+                f"Batch properties query failed with status {status} "
+                f"for {len(missing_ids)} topics"
+            )
+            return False
+
+        # Split the bindings back into each topic's properties
+        for result in results["results"]["bindings"]:
+            topic_id = result["topic"]["value"].split("/")[-1]
+            if topic_id in topics:
+                _add_property_binding(topics[topic_id], result)
+
+        if use_cache:
+            await _cache_properties_many(
+                domain, {t: topics[t]["properties"] for t in missing_ids}
+            )
+
+        return True
+
+    except Exception as e:
+        logger.error(
+            f"Error fetching properties for {len(missing_ids)} topics: {str(e)}"
+        )
+        return False
+
+
 async def get_topic_properties(
     topic_id: str,
     topic: Dict[str, Any],
     domain: str,
-    redis_client: Optional[Any] = None,
+    use_cache: bool = True,
 ) -> bool:
     """Get detailed properties for a specific topic (async).
 
@@ -116,88 +302,32 @@ async def get_topic_properties(
         topic_id: The Wikidata entity ID
         topic: The topic dictionary to update
         domain: The domain being processed
-        redis_client: Redis client for caching
+        use_cache: Serve a hit from Redis first and cache what was fetched
 
     Returns:
         True if successful, False otherwise
     """
-    # Check cache first if redis client is provided
-    if redis_client:
-        cache_key = f"wikidata:{domain}:{topic_id}"
-        cached_properties = redis_client.hgetall(cache_key)
-
-        if cached_properties:
-            # Retrieve properties from cache
-            properties = {}
-            for k, v in cached_properties.items():
-                key = k.decode("utf-8") if isinstance(k, bytes) else k
-                try:
-                    value = json.loads(v.decode("utf-8") if isinstance(v, bytes) else v)
-                    properties[key] = value
-                except (json.JSONDecodeError, TypeError):
-                    # Fallback for old format
-                    properties[key] = v.decode("utf-8") if isinstance(v, bytes) else v
-
-            topic["properties"] = properties
+    if use_cache:
+        cached = await _get_cached_properties_many(domain, [topic_id])
+        if topic_id in cached:
+            topic["properties"] = cached[topic_id]
             return True
 
-    # If not in cache or no redis client, fetch from Wikidata
+    # If not in cache, fetch from Wikidata
     query = get_properties_query(topic_id)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                WIKIDATA_ENDPOINT,
-                headers={
-                    "User-Agent": WIKIDATA_USER_AGENT,
-                    "Accept": "application/sparql-results+json",
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                data={"query": query},
-            ) as response:
-                if response.status != 200:
-                    logger.error(
-                        f"Properties query failed with status {response.status} for {topic_id}"
-                    )
-                    return False
-
-                results = await response.json()
+        status, results = await _run_sparql_query(query, "properties")
+        if status != 200:
+            logger.error(f"Properties query failed with status {status} for {topic_id}")
+            return False
 
         # Process the results into structured format
         for result in results["results"]["bindings"]:
-            property_label = result["propertyLabel"]["value"]
-            value_url = result["value"]["value"]
-            value_label = result["valueLabel"]["value"]
-
-            # Extract Wikidata ID if it's an entity
-            value_id = None
-            if "wikidata.org/entity/" in value_url:
-                value_id = value_url.split("/")[-1]
-
-            # Initialize property group if it doesn't exist
-            if property_label not in topic["properties"]:
-                topic["properties"][property_label] = []
-
-            # Create value object with label, URL and ID
-            value_object = {"label": value_label, "url": value_url}
-
-            if value_id:
-                value_object["id"] = value_id
-
-            # Add if not already present
-            if not any(
-                v.get("label") == value_label
-                for v in topic["properties"][property_label]
-            ):
-                topic["properties"][property_label].append(value_object)
-
-        # Cache properties if redis client is provided
-        if redis_client:
-            cache_key = f"wikidata:{domain}:{topic_id}"
-            cache_data = {}
-            for key, value in topic["properties"].items():
-                cache_data[key] = json.dumps(value)
-            redis_client.hset(cache_key, mapping=cache_data)
+            _add_property_binding(topic, result)
+
+        if use_cache:
+            await _cache_properties_many(domain, {topic_id: topic["properties"]})
 
         return True
 
@@ -1,62 +1,185 @@
-import requests
-import wikipedia
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import json
-import re
+import time
 from src.logger import get_logger
-from typing import List, Dict, Any
-from src.config import WIKIPEDIA_USER_AGENT, REDIS_CACHE_EXPIRATION, BATCH_SIZE
-from src.database.redis import get_redis_client
+from src.metrics import span, timed
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+from src.config import (
+    WIKIPEDIA_USER_AGENT,
+    WIKIPEDIA_TITLES_PER_REQUEST,
+    WIKIPEDIA_ENRICH_CONCURRENCY,
+    ENRICH_WRITE_BATCH_SIZE,
+    ENRICH_WRITE_FLUSH_INTERVAL,
+)
+from src.database.topic_cache import get_topic_cache
 from src.database.mongo import store_topics_in_mongo
+from src.checkpoint import StageCheckpoint
+from . import mediawiki
+from ..text_processing import clean_article, normalize_topics, parse_toc
 
 # Initialize the logger
 logger = get_logger(__name__)
 
-# Configure user-agent for all Wikipedia API requests
-wikipedia.set_user_agent(WIKIPEDIA_USER_AGENT)
+if TYPE_CHECKING:
+    import wikipedia
+
+# Synchronous ``wikipedia`` client, imported and configured on first use
+_wikipedia = None
+
+
+def _get_wikipedia():
+    """Import the ``wikipedia`` package used by the synchronous helpers and set its user agent."""
+    global _wikipedia
+    if _wikipedia is None:
+        import wikipedia
+
+        wikipedia.set_user_agent(WIKIPEDIA_USER_AGENT)
+        _wikipedia = wikipedia
+    return _wikipedia
+
+
+# Suffixes that identify the programming-related option on a disambiguation page
+DISAMBIGUATION_SUFFIXES = [
+    "programming",
+    "programming language",
+    "computer science",
+    "software",
+]
+
+
+# Marks the end of a pipeline queue
+_DONE = object()
+
+
+class _StageStats:
+    """Item count and busy time of one enrichment pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.started = time.monotonic()
+        self.finished = self.started
+
+    def record(self, items: int, elapsed: float) -> None:
+        self.items += items
+        self.busy += elapsed
+        self.finished = time.monotonic()
+
+    def report(self) -> str:
+        wall = max(self.finished - self.started, 1e-9)
+        return (
+            f"{self.name}: {self.items} topics in {wall:.2f}s "
+            f"({self.items / wall:.1f} topics/s, busy {self.busy:.2f}s)"
+        )
 
 
 # New async version
+@timed("stage.wikipedia")
 async def enrich_with_wikipedia(
-    topics: List[Dict[str, Any]], domain: str, save_to_mongo: bool
+    topics: List[Dict[str, Any]],
+    domain: str,
+    save_to_mongo: bool,
+    concurrency: int = WIKIPEDIA_ENRICH_CONCURRENCY,
+    write_batch_size: int = ENRICH_WRITE_BATCH_SIZE,
+    checkpoint: Optional[StageCheckpoint] = None,
 ) -> List[Dict[str, Any]]:
     """Enrich Wikidata topics with information from Wikipedia (async).
 
+    Topics stream through a pipeline: a lookup stage resolves page metadata for
+    up to ``WIKIPEDIA_TITLES_PER_REQUEST`` titles at a time, ``concurrency``
+    workers fetch page details one topic each, and a writer task flushes
+    finished topics to MongoDB in batches.
+
     Args:
         topics: List of topic dictionaries from Wikidata
         domain: The domain of topics (e.g., "programming")
         save_to_mongo: Whether to save the enriched topics to MongoDB
+        concurrency: Number of page workers running at the same time
+        write_batch_size: Number of finished topics per MongoDB write
+        checkpoint: Stage log of a resumable run; topics recorded in it are
+            restored instead of fetched, and every written batch is appended
 
     Returns:
         The same list of topics with added Wikipedia information
     """
     logger.info("Enriching topics with Wikipedia data (async mode)...")
 
-    redis_client = get_redis_client()
-
-    # Process topics in batches to control concurrency
-    batches = [topics[i : i + BATCH_SIZE] for i in range(0, len(topics), BATCH_SIZE)]
+    concurrency = max(1, concurrency)
 
-    for batch_idx, batch in enumerate(batches):
+    pending_topics = topics
+    if checkpoint is not None:
+        pending_topics = []
+        for topic in topics:
+            if topic["id"] in checkpoint:
+                topic.update(checkpoint.get(topic["id"]))
+            else:
+                pending_topics.append(topic)
         logger.info(
-            f"Processing batch {batch_idx + 1}/{len(batches)} ({len(batch)} topics)"
+            f"Restored {len(topics) - len(pending_topics)} enriched topics from checkpoint"
         )
 
-        # Create tasks for each topic in the batch
-        tasks = []
-        for topic in batch:
-            task = asyncio.create_task(async_enrich_single_topic(topic, redis_client))
-            tasks.append(task)
-
-        # Wait for all tasks in this batch to complete
-        await asyncio.gather(*tasks)
-
-        # Add domain to each topic
-        for topic in topics:
-            topic["domain"] = domain
-
+    # Bounded queues keep peak memory and in-flight work constant
+    topic_queue: asyncio.Queue = asyncio.Queue(maxsize=WIKIPEDIA_TITLES_PER_REQUEST * 2)
+    page_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    done_queue: asyncio.Queue = asyncio.Queue(maxsize=write_batch_size * 2)
+
+    lookup_stats = _StageStats("lookup")
+    fetch_stats = _StageStats("fetch")
+    write_stats = _StageStats("write")
+
+    async def produce():
+        for topic in pending_topics:
+            await topic_queue.put(topic)
+        await topic_queue.put(_DONE)
+
+    async def lookup():
+        finished = False
+        while not finished:
+            batch = [await topic_queue.get()]
+            while len(batch) < WIKIPEDIA_TITLES_PER_REQUEST:
+                try:
+                    batch.append(topic_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            if batch[-1] is _DONE:
+                batch.pop()
+                finished = True
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            with span("wikipedia.lookup") as lookup_span:
+                resolved, misses = await _async_lookup_pages(batch)
+                lookup_span.add(items=len(batch))
+            lookup_stats.record(len(batch), time.monotonic() - started)
+            for topic in resolved:
+                await done_queue.put((topic, False))
+            for item in misses:
+                await page_queue.put(item)
+        for _ in range(concurrency):
+            await page_queue.put(_DONE)
+
+    async def fetch_worker():
+        while True:
+            item = await page_queue.get()
+            if item is _DONE:
+                await done_queue.put(_DONE)
+                return
+            topic, page = item
+            started = time.monotonic()
+            with span("wikipedia.fetch_page") as fetch_span:
+                cacheable = await _async_enrich_from_page(topic, topic["title"], page)
+                fetch_span.add(items=1, bytes=len(topic.get("content", "")))
+            fetch_stats.record(1, time.monotonic() - started)
+            await done_queue.put((topic, cacheable))
+
+    async def flush(batch, to_cache):
+        started = time.monotonic()
+        # Articles are cleaned in the process pool, one task per few articles
+        await normalize_topics(batch)
+        # Freshly fetched pages go to the cache in one pipeline
+        await _cache_wikipedia_data(to_cache)
         if save_to_mongo:
             # Store the collected topics in MongoDB
             success = await store_topics_in_mongo(batch, domain)
@@ -64,75 +187,190 @@ async def enrich_with_wikipedia(
                 logger.info(f"Successfully stored {len(batch)} topics in MongoDB")
             else:
                 logger.warning("Failed to store topics in MongoDB")
+        write_stats.record(len(batch), time.monotonic() - started)
+
+    async def write():
+        pending = []
+        to_cache = []
+        remaining_workers = concurrency
+        while remaining_workers:
+            try:
+                item = await asyncio.wait_for(
+                    done_queue.get(), timeout=ENRICH_WRITE_FLUSH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                remaining_workers -= 1
+            elif item is not None:
+                topic, cacheable = item
+                topic["domain"] = domain
+                pending.append(topic)
+                if cacheable:
+                    to_cache.append(topic)
+            if pending and (
+                len(pending) >= write_batch_size
+                or item is None
+                or not remaining_workers
+            ):
+                await flush(pending, to_cache)
+                if checkpoint is not None:
+                    checkpoint.append((topic["id"], topic) for topic in pending)
+                logger.info(
+                    f"Enriched {write_stats.items}/{len(pending_topics)} topics"
+                )
+                pending = []
+                to_cache = []
+
+    stages = [
+        asyncio.create_task(produce()),
+        asyncio.create_task(lookup()),
+        *[asyncio.create_task(fetch_worker()) for _ in range(concurrency)],
+        asyncio.create_task(write()),
+    ]
+    try:
+        await asyncio.gather(*stages)
+    finally:
+        # A failing stage must not leave the others blocked on a full queue
+        for stage in stages:
+            stage.cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
 
-        # Add a small delay between batches to avoid rate limiting
-        if batch_idx < len(batches) - 1:
-            await asyncio.sleep(1)
+    for stats in (lookup_stats, fetch_stats, write_stats):
+        logger.info(f"Enrichment stage {stats.report()}")
+    logger.info(get_topic_cache("wikipedia").report())
 
     return topics
 
 
-async def async_enrich_single_topic(topic: Dict[str, Any], redis_client) -> None:
-    """Enrich a single topic with Wikipedia data asynchronously.
+async def _get_cached_wikipedia_data(
+    titles: List[str],
+) -> List[Optional[Dict[str, Any]]]:
+    """Read cached Wikipedia data for many titles from the topic cache.
 
     Args:
-        topic: The topic dictionary to enrich
-        redis_client: Redis client for caching
-    """
-    title = topic["title"]
-
-    try:
-        # Try to get the Wikipedia page from cache first
-        cache_key = f"wikipedia:{title}"
-        cached_data = redis_client.get(cache_key)
+        titles: The topic titles
 
-        if cached_data:
-            try:
-                page_data = json.loads(cached_data)
-                topic.update(page_data)
-                logger.debug(f"Retrieved Wikipedia data for '{title}' from cache")
-                return
-            except json.JSONDecodeError:
-                logger.warning(f"Invalid cache data for '{title}', fetching fresh data")
-                # Continue to fetch fresh data
+    Returns:
+        The cached page data per title, None on a miss
+    """
+    cached = await get_topic_cache("wikipedia").get_many(titles)
+    return [cached.get(title) for title in titles]
 
-        # No valid cache, fetch from Wikipedia API
-        # Wikipedia doesn't have an async API, so we'll use synchronous calls
-        # but within separate tasks to allow concurrency
-        try:
-            # This part still uses the synchronous Wikipedia API
-            # but is executed in a ThreadPoolExecutor via loop.run_in_executor
-            loop = asyncio.get_event_loop()
-            page = await loop.run_in_executor(
-                None, lambda: wikipedia.page(title, auto_suggest=False)
-            )
 
-            await async_add_wikipedia_data(topic, page)
+async def _cache_wikipedia_data(topics: List[Dict[str, Any]]) -> None:
+    """Cache the Wikipedia fields of enriched topics in one pipeline.
 
-            # Cache the Wikipedia data
-            page_data = {
+    Args:
+        topics: The enriched topic dictionaries, cached under their titles
+    """
+    await get_topic_cache("wikipedia").set_many(
+        {
+            topic["title"]: {
                 "url": topic.get("url", ""),
                 "summary": topic.get("summary", ""),
                 "categories": topic.get("categories", []),
                 "content": topic.get("content", ""),
                 "sections": topic.get("sections", []),
             }
+            for topic in topics
+        }
+    )
 
-            try:
-                redis_client.set(
-                    cache_key, json.dumps(page_data), ex=REDIS_CACHE_EXPIRATION
-                )
-                logger.debug(f"Cached Wikipedia data for '{title}'")
-            except Exception as cache_error:
-                logger.warning(
-                    f"Failed to cache data for '{title}': {str(cache_error)}"
-                )
 
-        except wikipedia.exceptions.DisambiguationError as e:
-            await async_handle_disambiguation(topic, title, e.options)
-        except wikipedia.exceptions.PageError:
-            await async_handle_page_not_found(topic, title)
-        except (requests.exceptions.RequestException, aiohttp.ClientError) as e:
+async def _async_lookup_pages(
+    topics: List[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]]:
+    """Resolve topics from the cache and look up page metadata for the rest.
+
+    Args:
+        topics: The topic dictionaries to enrich
+
+    Returns:
+        Tuple of (topics already fully enriched, (topic, page) pairs that
+        still need their page details fetched)
+    """
+    resolved = []
+    misses = []
+    cached_pages = await _get_cached_wikipedia_data(
+        [topic["title"] for topic in topics]
+    )
+    for topic, cached in zip(topics, cached_pages):
+        if cached is not None:
+            topic.update(cached)
+            logger.debug(f"Retrieved Wikipedia data for '{topic['title']}' from cache")
+            resolved.append(topic)
+        else:
+            misses.append(topic)
+
+    if not misses:
+        return resolved, []
+
+    try:
+        pages = await mediawiki.fetch_pages([topic["title"] for topic in misses])
+    except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+        logger.warning(f"Network error while fetching {len(misses)} pages: {str(e)}")
+        for topic in misses:
+            set_empty_wikipedia_data(topic, f"Network error: {str(e)}")
+        return resolved + misses, []
+
+    return resolved, [(topic, pages.get(topic["title"])) for topic in misses]
+
+
+async def async_enrich_topics(topics: List[Dict[str, Any]]) -> None:
+    """Enrich several topics, looking up page metadata in one batched request.
+
+    Args:
+        topics: The topic dictionaries to enrich
+    """
+    _, misses = await _async_lookup_pages(topics)
+    cacheable = await asyncio.gather(
+        *[
+            _async_enrich_from_page(topic, topic["title"], page)
+            for topic, page in misses
+        ]
+    )
+    await normalize_topics(topics)
+    await _cache_wikipedia_data(
+        [topic for (topic, _), ok in zip(misses, cacheable) if ok]
+    )
+
+
+async def async_enrich_single_topic(topic: Dict[str, Any]) -> None:
+    """Enrich a single topic with Wikipedia data asynchronously.
+
+    Args:
+        topic: The topic dictionary to enrich
+    """
+    await async_enrich_topics([topic])
+
+
+async def _async_enrich_from_page(
+    topic: Dict[str, Any],
+    title: str,
+    page: Optional[Dict[str, Any]],
+) -> bool:
+    """Enrich a topic from prefetched page metadata.
+
+    Args:
+        topic: The topic dictionary to enrich
+        title: The original topic title
+        page: Page metadata from ``mediawiki.fetch_pages``, None if missing
+
+    Returns:
+        True if the topic was enriched directly from its page and should be cached
+    """
+    try:
+        try:
+            if page is None:
+                await async_handle_page_not_found(topic, title)
+            elif page["disambiguation"]:
+                options = await mediawiki.fetch_disambiguation_options(page["title"])
+                await async_handle_disambiguation(topic, title, options)
+            else:
+                await async_add_wikipedia_data(topic, page)
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.warning(f"Network error while fetching '{title}': {str(e)}")
             set_empty_wikipedia_data(topic, f"Network error: {str(e)}")
         except Exception as e:
@@ -142,6 +380,7 @@ async def async_enrich_single_topic(topic: Dict[str, Any], redis_client) -> None
     except Exception as e:
         logger.error(f"Unexpected error for topic '{title}': {str(e)}", exc_info=True)
         set_empty_wikipedia_data(topic, "Internal processing error")
+    return False
 
 
 async def async_handle_disambiguation(
@@ -154,47 +393,39 @@ async def async_handle_disambiguation(
         title: The original topic title
         options: List of disambiguation options from Wikipedia
     """
-    found = False
-    loop = asyncio.get_event_loop()
-
-    # Try with programming-related suffixes
-    for suffix in [
-        "programming",
-        "programming language",
-        "computer science",
-        "software",
-    ]:
+    if not options:
+        set_empty_wikipedia_data(topic, f"No suitable Wikipedia page found for {title}")
+        return
+
+    # Options matching a programming-related suffix first, then the first option
+    candidates = []
+    for suffix in DISAMBIGUATION_SUFFIXES:
         for option in options:
-            if suffix.lower() in option.lower():
-                try:
-                    # Run synchronous Wikipedia page lookup in executor
-                    page = await loop.run_in_executor(
-                        None, lambda: wikipedia.page(option, auto_suggest=False)
-                    )
-                    await async_add_wikipedia_data(topic, page)
-                    found = True
-                    break
-                except Exception as ex:
-                    logger.debug(f"Failed with option '{option}': {str(ex)}")
-                    continue
-        if found:
-            break
-
-    # Fallback to first option if no match found
-    if not found and options:
+            if suffix.lower() in option.lower() and option not in candidates:
+                candidates.append(option)
+    if options[0] not in candidates:
+        candidates.append(options[0])
+
+    try:
+        pages = await mediawiki.fetch_pages(candidates)
+    except Exception as ex:
+        logger.warning(f"Failed to resolve disambiguation for '{title}': {str(ex)}")
+        set_empty_wikipedia_data(topic, f"Could not resolve disambiguation for {title}")
+        return
+
+    for option in candidates:
+        page = pages.get(option)
+        if page is None or page["disambiguation"]:
+            logger.debug(f"Failed with option '{option}'")
+            continue
         try:
-            # Run synchronous Wikipedia page lookup in executor
-            page = await loop.run_in_executor(
-                None, lambda: wikipedia.page(options[0], auto_suggest=False)
-            )
             await async_add_wikipedia_data(topic, page)
+            return
         except Exception as ex:
-            logger.warning(f"Failed with fallback option '{options[0]}': {str(ex)}")
-            set_empty_wikipedia_data(
-                topic, f"Could not resolve disambiguation for {title}"
-            )
-    else:
-        set_empty_wikipedia_data(topic, f"No suitable Wikipedia page found for {title}")
+            logger.debug(f"Failed with option '{option}': {str(ex)}")
+
+    logger.warning(f"No disambiguation option could be resolved for '{title}'")
+    set_empty_wikipedia_data(topic, f"Could not resolve disambiguation for {title}")
 
 
 async def async_handle_page_not_found(topic: Dict[str, Any], title: str) -> None:
@@ -211,71 +442,57 @@ async def async_handle_page_not_found(topic: Dict[str, Any], title: str) -> None
         f"{title} software",
     ]
 
-    found = False
-    loop = asyncio.get_event_loop()
-
-    for term in search_terms:
+    # Run all searches at once and keep the term order as priority
+    results = await asyncio.gather(
+        *[mediawiki.search(term) for term in search_terms], return_exceptions=True
+    )
+    candidates = []
+    for term, result in zip(search_terms, results):
+        if isinstance(result, Exception):
+            logger.debug(f"Search failed for '{term}': {str(result)}")
+        elif result and result[0] not in candidates:
+            candidates.append(result[0])
+
+    if candidates:
         try:
-            # Run synchronous Wikipedia search in executor
-            results = await loop.run_in_executor(None, lambda: wikipedia.search(term))
-
-            if results:
-                # Run synchronous Wikipedia page lookup in executor
-                page = await loop.run_in_executor(
-                    None, lambda: wikipedia.page(results[0], auto_suggest=False)
-                )
-                await async_add_wikipedia_data(topic, page)
-                found = True
-                break
+            pages = await mediawiki.fetch_pages(candidates)
+            for candidate in candidates:
+                page = pages.get(candidate)
+                if page is not None and not page["disambiguation"]:
+                    await async_add_wikipedia_data(topic, page)
+                    return
         except Exception as ex:
-            logger.debug(f"Search failed for '{term}': {str(ex)}")
-            continue
+            logger.debug(f"Search candidates failed for '{title}': {str(ex)}")
 
-    if not found:
-        set_empty_wikipedia_data(topic, f"No Wikipedia page found for {title}")
+    set_empty_wikipedia_data(topic, f"No Wikipedia page found for {title}")
 
 
-async def async_add_wikipedia_data(
-    topic: Dict[str, Any], page: wikipedia.WikipediaPage
-) -> None:
+async def async_add_wikipedia_data(topic: Dict[str, Any], page: Dict[str, Any]) -> None:
     """Add Wikipedia data to a topic asynchronously.
 
     Args:
         topic: The topic dictionary to update
-        page: The Wikipedia page object
+        page: Page metadata from ``mediawiki.fetch_pages``
     """
-    # Extract clean content without citation markers
-    content = re.sub(r"\[\d+]", "", page.content)
-
-    # Get page sections from Table of Contents (TOC)
-    sections = []
-    try:
-        # Use aiohttp for async HTTP requests
-        async with aiohttp.ClientSession() as session:
-            headers = {"User-Agent": WIKIPEDIA_USER_AGENT}
-            async with session.get(page.url, headers=headers, timeout=10) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, features="html.parser")
-                    toc = soup.find(id="toc")
-                    if toc:
-                        sections = [
-                            li.a.text.strip() for li in toc.find_all("li") if li.a
-                        ]
-                else:
-                    logger.warning(
-                        f"Failed to fetch TOC for {page.title}: HTTP status {response.status}"
-                    )
-    except aiohttp.ClientError as e:
-        logger.warning(f"Failed to fetch TOC for {page.title}: {str(e)}")
-    except Exception as e:
-        logger.debug(f"Error parsing TOC for {page.title}: {str(e)}")
-
+    # Full content and sections need per-page requests; run them together
+    content, sections = await asyncio.gather(
+        mediawiki.fetch_content(page["title"]),
+        mediawiki.fetch_sections(page["title"]),
+        return_exceptions=True,
+    )
+    if isinstance(content, Exception):
+        raise content
+    if isinstance(sections, Exception):
+        logger.debug(f"Error fetching sections for {page['title']}: {str(sections)}")
+        sections = []
+
+    # Citation markers are stripped later by normalize_topics, off the event loop
+    topic.pop("content_for_embedding", None)
     topic.update(
         {
-            "url": page.url,
-            "summary": page.summary,
-            "categories": page.categories,
+            "url": page["url"],
+            "summary": page["summary"],
+            "categories": page["categories"],
             "content": content,
             "sections": sections,
         }
@@ -289,6 +506,7 @@ def handle_page_not_found(topic: Dict[str, Any], title: str) -> None:
         topic: The topic dictionary to update
         title: The original topic title
     """
+    wikipedia = _get_wikipedia()
     search_terms = [
         f"{title} programming",
         f"{title} computing",
@@ -313,15 +531,17 @@ def handle_page_not_found(topic: Dict[str, Any], title: str) -> None:
         set_empty_wikipedia_data(topic, f"No Wikipedia page found for {title}")
 
 
-def add_wikipedia_data(topic: Dict[str, Any], page: wikipedia.WikipediaPage) -> None:
+def add_wikipedia_data(topic: Dict[str, Any], page: "wikipedia.WikipediaPage") -> None:
     """Add Wikipedia data to a topic.
 
     Args:
         topic: The topic dictionary to update
         page: The Wikipedia page object
     """
+    import requests
+
     # Extract clean content without citation markers
-    content = re.sub(r"\[\d+]", "", page.content)
+    content, content_for_embedding = clean_article(page.content)
 
     # Get page sections from TOC
     sections = []
@@ -331,10 +551,7 @@ def add_wikipedia_data(topic: Dict[str, Any], page: wikipedia.WikipediaPage) ->
         response = requests.get(page.url, headers=headers, timeout=10)
         response.raise_for_status()  # Raise an exception for HTTP errors
 
-        soup = BeautifulSoup(response.text, features="html.parser")
-        toc = soup.find(id="toc")
-        if toc:
-            sections = [li.a.text.strip() for li in toc.find_all("li") if li.a]
+        sections = parse_toc(response.text)
     except requests.RequestException as e:
         logger.warning(f"Failed to fetch TOC for {page.title}: {str(e)}")
     except Exception as e:
@@ -346,6 +563,7 @@ def add_wikipedia_data(topic: Dict[str, Any], page: wikipedia.WikipediaPage) ->
             "summary": page.summary,
             "categories": page.categories,
             "content": content,
+            "content_for_embedding": content_for_embedding,
             "sections": sections,
         }
     )
@@ -0,0 +1,244 @@
+"""Asynchronous MediaWiki Action API client.
+
+Replaces the blocking ``wikipedia`` library in the async enrichment path.
+Page metadata (URL, summary, categories, redirects and disambiguation flags)
+is fetched for up to ``WIKIPEDIA_TITLES_PER_REQUEST`` titles per request.
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional
+
+from src.logger import get_logger
+from src.metrics import span
+from src.config import (
+    WIKIPEDIA_API_URL,
+    WIKIPEDIA_USER_AGENT,
+    WIKIPEDIA_TITLES_PER_REQUEST,
+)
+from ..http_client import request
+
+logger = get_logger(__name__)
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+async def _api_get(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Send a GET request to the MediaWiki Action API.
+
+    Args:
+        params: Query parameters for the API call
+
+    Returns:
+        Decoded JSON response
+
+    Raises:
+        RuntimeError: If the API returns a non-200 status or an error payload
+    """
+    params = {"format": "json", "formatversion": 2, **params}
+    kind = params.get("list") or params.get("prop", "")
+    with span("mediawiki.request", action=params.get("action", ""), kind=kind):
+        status, data = await request(
+            "GET",
+            WIKIPEDIA_API_URL,
+            params=params,
+            headers={"User-Agent": WIKIPEDIA_USER_AGENT},
+        )
+    if status != 200:
+        raise RuntimeError(f"MediaWiki API returned HTTP status {status}")
+    if "error" in data:
+        raise RuntimeError(
+            f"MediaWiki API error: {data['error'].get('info', data['error'])}"
+        )
+    return data
+
+
+async def _query_with_continuation(params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run an ``action=query`` request, following ``continue`` until exhausted.
+
+    Args:
+        params: Query parameters (``action=query`` is added)
+
+    Returns:
+        List of the ``query`` sections of every response
+    """
+    responses = []
+    continuation: Dict[str, Any] = {}
+    while True:
+        data = await _api_get({"action": "query", **params, **continuation})
+        if "query" in data:
+            responses.append(data["query"])
+        if "continue" not in data:
+            return responses
+        continuation = data["continue"]
+
+
+def _resolve_title(title: str, query: Dict[str, Any]) -> str:
+    """Follow normalization and redirects for a requested title."""
+    for item in query.get("normalized", []):
+        if item["from"] == title:
+            title = item["to"]
+    for item in query.get("redirects", []):
+        if item["from"] == title:
+            title = item["to"]
+    return title
+
+
+async def fetch_pages(titles: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch page metadata for many titles, batching up to 50 per request.
+
+    Args:
+        titles: Page titles to look up
+
+    Returns:
+        Mapping of each requested title to a page dict with title, url,
+        summary, categories and disambiguation flag, or None if it is missing
+    """
+    unique_titles = list(dict.fromkeys(t for t in titles if t))
+    batches = [
+        unique_titles[i : i + WIKIPEDIA_TITLES_PER_REQUEST]
+        for i in range(0, len(unique_titles), WIKIPEDIA_TITLES_PER_REQUEST)
+    ]
+    results = await asyncio.gather(*[_fetch_pages_batch(batch) for batch in batches])
+
+    pages: Dict[str, Optional[Dict[str, Any]]] = {}
+    for batch_pages in results:
+        pages.update(batch_pages)
+    return pages
+
+
+async def _fetch_pages_batch(titles: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """Fetch page metadata for at most ``WIKIPEDIA_TITLES_PER_REQUEST`` titles."""
+    responses = await _query_with_continuation(
+        {
+            "titles": "|".join(titles),
+            "redirects": 1,
+            "prop": "info|extracts|categories|pageprops",
+            "inprop": "url",
+            "exintro": 1,
+            "explaintext": 1,
+            "exlimit": "max",
+            "cllimit": "max",
+            "ppprop": "disambiguation",
+        }
+    )
+
+    # Merge the partial page records returned across continuation responses
+    by_title: Dict[str, Dict[str, Any]] = {}
+    for query in responses:
+        for raw in query.get("pages", []):
+            page = by_title.setdefault(
+                raw["title"],
+                {
+                    "title": raw["title"],
+                    "url": "",
+                    "summary": "",
+                    "categories": [],
+                    "disambiguation": False,
+                    "missing": False,
+                },
+            )
+            if raw.get("missing") or raw.get("invalid"):
+                page["missing"] = True
+            if raw.get("fullurl"):
+                page["url"] = raw["fullurl"]
+            if raw.get("extract"):
+                page["summary"] = raw["extract"]
+            if "disambiguation" in raw.get("pageprops", {}):
+                page["disambiguation"] = True
+            for category in raw.get("categories", []):
+                page["categories"].append(re.sub(r"^Category:", "", category["title"]))
+
+    pages: Dict[str, Optional[Dict[str, Any]]] = {}
+    for title in titles:
+        resolved = title
+        for query in responses:
+            resolved = _resolve_title(resolved, query)
+        page = by_title.get(resolved)
+        pages[title] = None if page is None or page["missing"] else page
+    return pages
+
+
+async def fetch_content(title: str) -> str:
+    """Fetch the full plain-text extract of a page.
+
+    TextExtracts only returns one full (non-intro) extract per request, so
+    this call is made per page.
+
+    Args:
+        title: Resolved page title
+
+    Returns:
+        Plain-text page content with ``== Section ==`` headings
+    """
+    responses = await _query_with_continuation(
+        {"titles": title, "redirects": 1, "prop": "extracts", "explaintext": 1}
+    )
+    for query in responses:
+        for raw in query.get("pages", []):
+            if raw.get("extract"):
+                return raw["extract"]
+    return ""
+
+
+async def fetch_sections(title: str) -> List[str]:
+    """Fetch the section headings of a page via ``action=parse``.
+
+    Args:
+        title: Resolved page title
+
+    Returns:
+        List of section headings in page order
+    """
+    data = await _api_get(
+        {"action": "parse", "page": title, "prop": "sections", "redirects": 1}
+    )
+    sections = data.get("parse", {}).get("sections", [])
+    return [_TAG_RE.sub("", section["line"]).strip() for section in sections]
+
+
+async def fetch_disambiguation_options(title: str) -> List[str]:
+    """Fetch the article links listed on a disambiguation page.
+
+    Args:
+        title: Disambiguation page title
+
+    Returns:
+        Linked article titles in page order
+    """
+    responses = await _query_with_continuation(
+        {
+            "titles": title,
+            "redirects": 1,
+            "prop": "links",
+            "plnamespace": 0,
+            "pllimit": "max",
+        }
+    )
+    options = []
+    for query in responses:
+        for raw in query.get("pages", []):
+            options.extend(link["title"] for link in raw.get("links", []))
+    return options
+
+
+async def search(term: str, limit: int = 1) -> List[str]:
+    """Full-text search for page titles.
+
+    Args:
+        term: Search term
+        limit: Maximum number of titles to return
+
+    Returns:
+        Matching page titles ordered by relevance
+    """
+    data = await _api_get(
+        {
+            "action": "query",
+            "list": "search",
+            "srsearch": term,
+            "srlimit": limit,
+            "srprop": "",
+        }
+    )
+    return [result["title"] for result in data.get("query", {}).get("search", [])]
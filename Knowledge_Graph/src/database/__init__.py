@@ -1,9 +1,33 @@
-from .mongo import get_mongo_client, store_topics_in_mongo, get_topics_from_mongo
-from .redis import get_redis_client, get_redis_pool
-from .chromadb import ChromaDBClient
+# __init__.py for database; submodules are imported on first use of their exports
+from src.lazy import lazy_exports
+
+_EXPORTS = {
+    "get_mongo_client": ".mongo",
+    "store_topics_in_mongo": ".mongo",
+    "get_topics_from_mongo": ".mongo",
+    "bulk_upsert_topics": ".mongo",
+    "iter_topics_from_mongo": ".mongo",
+    "get_redis_client": ".redis",
+    "get_redis_pool": ".redis",
+    "get_async_redis_client": ".redis",
+    "CircuitBreaker": ".redis",
+    "cache_get_many": ".redis",
+    "cache_set_many": ".redis",
+    "TopicCache": ".topic_cache",
+    "LRUCache": ".topic_cache",
+    "get_topic_cache": ".topic_cache",
+    "ChromaDBClient": ".chromadb",
+    "LocalVectorIndex": ".vector_index",
+    "get_vector_store": ".vector_index",
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "get_mongo_client", "store_topics_in_mongo", "get_topics_from_mongo",
-    "get_redis_client", "get_redis_pool",
-    "ChromaDBClient"
+    "bulk_upsert_topics", "iter_topics_from_mongo",
+    "get_redis_client", "get_redis_pool", "get_async_redis_client", "CircuitBreaker",
+    "cache_get_many", "cache_set_many",
+    "TopicCache", "LRUCache", "get_topic_cache",
+    "ChromaDBClient", "LocalVectorIndex", "get_vector_store",
 ]
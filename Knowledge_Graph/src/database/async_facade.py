@@ -0,0 +1,55 @@
+"""Async facade for the synchronous vector store clients.
+
+Vector store I/O runs on a dedicated thread pool so callers inside the event
+loop can overlap it with embedding requests instead of blocking the loop.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import VECTOR_STORE_WORKERS
+
+
+class AsyncStoreMixin:
+    """Adds ``*_async`` variants of the document methods of a vector store.
+
+    With the default single worker, writes run in submission order.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=VECTOR_STORE_WORKERS,
+                thread_name_prefix=type(self).__name__,
+            )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), partial(func, *args, **kwargs)
+        )
+
+    async def add_documents_async(self, *args: Any, **kwargs: Any) -> None:
+        await self._run(self.add_documents, *args, **kwargs)
+
+    async def upsert_documents_async(self, *args: Any, **kwargs: Any) -> None:
+        await self._run(self.upsert_documents, *args, **kwargs)
+
+    async def delete_documents_async(
+        self, collection_name: str, ids: List[str]
+    ) -> None:
+        await self._run(self.delete_documents, collection_name, ids)
+
+    async def query_collection_async(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return await self._run(self.query_collection, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        """Wait for queued store operations and stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,18 +1,20 @@
 import chromadb
 import logging
+import threading
 from typing import Dict, List, Optional, Any
-from chromadb.api import client as ChromaClient
 from chromadb.config import Settings
 from chromadb.errors import InvalidCollectionException
 from src.logger import get_logger
-from src.config import CHROMA_PERSIST_DIR
+from src.metrics import span
+from src.config import CHROMA_PERSIST_DIR, CHROMA_MAX_BATCH_SIZE, CHROMA_QUERY_BATCH_SIZE
+from .async_facade import AsyncStoreMixin
 
 logger = get_logger(__name__)
 
 chromadb_logger = logging.getLogger("chromadb")
 chromadb_logger.setLevel(logging.WARNING)
 
-class ChromaDBClient:
+class ChromaDBClient(AsyncStoreMixin):
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -25,13 +27,13 @@ class ChromaDBClient:
         if self._initialized:
             return
         try:
-            self._client = ChromaClient(
-                Settings(
-                    persist_directory=persist_directory,
-                    is_persistent=True,
-                    anonymized_telemetry=False,
-                )
+            self._client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=Settings(anonymized_telemetry=False),
             )
+            self._collections: Dict[str, Any] = {}
+            self._collections_lock = threading.Lock()
+            self._max_batch_size = self._resolve_max_batch_size()
             logger.info(f"ChromaDB client initialized with dir: {persist_directory}")
             self._initialized = True
         except Exception as e:
@@ -44,22 +46,66 @@ class ChromaDBClient:
             raise RuntimeError("ChromaDB client not initialized.")
         return self._client
 
+    def _resolve_max_batch_size(self) -> int:
+        """Largest write batch accepted by Chroma, capped by CHROMA_MAX_BATCH_SIZE."""
+        try:
+            return min(CHROMA_MAX_BATCH_SIZE, self._client.get_max_batch_size())
+        except Exception:
+            return CHROMA_MAX_BATCH_SIZE
+
     def list_collections(self) -> List[str]:
-        return [c.name for c in self.client.list_collections()]
+        # Chroma >= 0.6 returns names, older versions return collection objects
+        return [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
 
     def collection_exists(self, name: str) -> bool:
+        if name in self._collections:
+            return True
         try:
-            self.client.get_collection(name=name)
+            self._get_collection(name)
             return True
         except (ValueError, InvalidCollectionException):
             return False
 
+    def _get_collection(self, name: str):
+        """Return a cached handle to an existing collection."""
+        coll = self._collections.get(name)
+        if coll is None:
+            coll = self.client.get_collection(name=name)
+            with self._collections_lock:
+                self._collections[name] = coll
+        return coll
+
     def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        coll = self._collections.get(name)
+        if coll is not None:
+            return coll
         try:
-            return self.client.get_collection(name=name)
+            coll = self.client.get_collection(name=name)
         except (ValueError, InvalidCollectionException):
             logger.info(f"Creating new ChromaDB collection: {name}")
-            return self.client.create_collection(name=name, metadata=metadata)
+            coll = self.client.get_or_create_collection(name=name, metadata=metadata)
+        with self._collections_lock:
+            self._collections[name] = coll
+        return coll
+
+    def _write_in_batches(
+        self,
+        write,
+        documents: List[str],
+        embeddings: List[List[float]],
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]],
+    ) -> None:
+        """Call a collection write method once per sub-batch of at most the max batch size."""
+        step = self._max_batch_size
+        for start in range(0, len(ids), step):
+            end = start + step
+            write(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                ids=ids[start:end],
+                metadatas=metadatas[start:end] if metadatas else None,
+            )
 
     def add_documents(
         self,
@@ -70,17 +116,73 @@ class ChromaDBClient:
         metadatas: Optional[List[Dict[str, Any]]] = None,
     ):
         coll = self.get_or_create_collection(collection_name)
-        coll.add(documents=documents, embeddings=embeddings, ids=ids, metadatas=metadatas)
+        with span("vector_store.add", backend="chroma") as write_span:
+            write_span.add(items=len(ids))
+            self._write_in_batches(coll.add, documents, embeddings, ids, metadatas)
         logger.info(f"Added {len(documents)} documents to '{collection_name}'")
 
+    def upsert_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        embeddings: List[List[float]],
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        coll = self.get_or_create_collection(collection_name)
+        with span("vector_store.upsert", backend="chroma") as write_span:
+            write_span.add(items=len(ids))
+            self._write_in_batches(coll.upsert, documents, embeddings, ids, metadatas)
+        logger.info(f"Upserted {len(documents)} documents into '{collection_name}'")
+
+    def delete_documents(self, collection_name: str, ids: List[str]):
+        coll = self.get_or_create_collection(collection_name)
+        with span("vector_store.delete", backend="chroma") as delete_span:
+            delete_span.add(items=len(ids))
+            for start in range(0, len(ids), self._max_batch_size):
+                coll.delete(ids=ids[start : start + self._max_batch_size])
+        logger.info(f"Deleted {len(ids)} documents from '{collection_name}'")
+
+    def get_embeddings(self, collection_name: str, ids: List[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors of the given IDs (unknown IDs are omitted)."""
+        coll = self.get_or_create_collection(collection_name)
+        found: Dict[str, List[float]] = {}
+        with span("vector_store.get", backend="chroma") as get_span:
+            for start in range(0, len(ids), self._max_batch_size):
+                result = coll.get(ids=ids[start : start + self._max_batch_size], include=["embeddings"])
+                found.update(zip(result["ids"], result["embeddings"]))
+            get_span.add(items=len(found))
+        return found
+
     def query_collection(
         self,
         collection_name: str,
         query_embeddings: List[List[float]],
         n_results: int = 5,
         where: Optional[Dict[str, Any]] = None,
+        batch_size: int = CHROMA_QUERY_BATCH_SIZE,
     ):
-        if not self.collection_exists(collection_name):
+        """Query many vectors at once, ``batch_size`` query vectors per Chroma call.
+
+        Results of all sub-batches are merged into one result dict in input order.
+        """
+        try:
+            coll = self._get_collection(collection_name)
+        except (ValueError, InvalidCollectionException):
             raise ValueError(f"Collection '{collection_name}' does not exist.")
-        coll = self.client.get_collection(name=collection_name)
-        return coll.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+        batch_size = max(1, batch_size)
+        merged: Dict[str, Any] = {}
+        for start in range(0, len(query_embeddings), batch_size):
+            batch = query_embeddings[start : start + batch_size]
+            with span("vector_store.query", backend="chroma") as query_span:
+                query_span.add(items=len(batch))
+                result = coll.query(query_embeddings=batch, n_results=n_results, where=where)
+            for key, value in result.items():
+                # Per-query result lists are concatenated; "included" and
+                # fields that were not requested (None) are kept as-is
+                if key == "included" or not isinstance(value, list):
+                    merged.setdefault(key, value)
+                else:
+                    merged.setdefault(key, []).extend(value)
+        return merged
@@ -1,30 +1,114 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Dict, Any, List
-from src.config import MONGO_URI, MONGO_DB, MONGO_COLLECTION
+import asyncio
+from typing import TYPE_CHECKING, Dict, Any, List, AsyncIterator, Optional
+from src.config import (
+    MONGO_URI,
+    MONGO_DB,
+    MONGO_COLLECTION,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_BULK_CHUNK_SIZE,
+    MONGO_READ_BATCH_SIZE,
+)
 from src.logger import get_logger
+from src.metrics import span
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
 
 logger = get_logger(__name__)
+_mongo_client = None
+_mongo_loop = None
+_indexed_collections = set()
+
+def _get_motor_client() -> "AsyncIOMotorClient":
+    """Return the process-wide pooled Motor client for the running event loop."""
+    # motor and pymongo are imported on first use to keep startup fast
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    global _mongo_client, _mongo_loop
+    loop = asyncio.get_running_loop()
+    if _mongo_client is None or _mongo_loop is not loop:
+        # Motor clients are bound to the loop they were first used on
+        _mongo_client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=MONGO_MAX_POOL_SIZE)
+        _mongo_loop = loop
+        _indexed_collections.clear()
+        logger.debug("MongoDB client created")
+    return _mongo_client
 
 async def get_mongo_client():
-    client = AsyncIOMotorClient(MONGO_URI)
-    return client[MONGO_DB]
+    return _get_motor_client()[MONGO_DB]
+
+async def _get_topics_collection():
+    """Return the topics collection, creating its (id, domain) index on first use."""
+    from pymongo import ASCENDING
+
+    collection = (await get_mongo_client())[MONGO_COLLECTION]
+    if MONGO_COLLECTION not in _indexed_collections:
+        await collection.create_index(
+            [("id", ASCENDING), ("domain", ASCENDING)], name="id_domain"
+        )
+        _indexed_collections.add(MONGO_COLLECTION)
+    return collection
+
+async def bulk_upsert_topics(
+    topics: List[Dict[str, Any]], domain: str, chunk_size: int = MONGO_BULK_CHUNK_SIZE
+) -> List[Dict[str, int]]:
+    """Upsert topics with unordered bulk writes, one bulk_write per chunk.
+
+    Args:
+        topics: Topics to upsert, matched on (id, domain)
+        domain: The domain of the topics
+        chunk_size: Maximum number of upserts per bulk_write call
+
+    Returns:
+        Per-chunk counts with "matched", "upserted" and "failed" keys
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    collection = await _get_topics_collection()
+    chunk_size = max(1, chunk_size)
+    results = []
+
+    for i in range(0, len(topics), chunk_size):
+        chunk = topics[i : i + chunk_size]
+        operations = [
+            UpdateOne({"id": topic["id"], "domain": domain}, {"$set": topic}, upsert=True)
+            for topic in chunk
+        ]
+        try:
+            with span("mongo.bulk_write") as write_span:
+                write_span.add(items=len(operations))
+                result = await collection.bulk_write(operations, ordered=False)
+            counts = {
+                "matched": result.matched_count,
+                "upserted": result.upserted_count,
+                "failed": 0,
+            }
+        except BulkWriteError as e:
+            # Unordered writes keep going past failures; report what landed
+            details = e.details
+            counts = {
+                "matched": details.get("nMatched", 0),
+                "upserted": details.get("nUpserted", 0),
+                "failed": len(details.get("writeErrors", [])),
+            }
+            logger.warning(
+                f"{counts['failed']} of {len(chunk)} upserts failed in MongoDB chunk"
+            )
+        results.append(counts)
+
+    return results
 
 async def store_topics_in_mongo(topics: List[Dict[str, Any]], domain: str) -> bool:
     """Store or upsert topics in MongoDB."""
     try:
-        client = AsyncIOMotorClient(MONGO_URI)
-        db = client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
-
         if topics:
-            for topic in topics:
-                await collection.update_one(
-                    {"id": topic["id"], "domain": domain},
-                    {"$set": topic},
-                    upsert=True
-                )
-            logger.info(f"Stored {len(topics)} topics in MongoDB collection '{MONGO_COLLECTION}'")
-            return True
+            results = await bulk_upsert_topics(topics, domain)
+            failed = sum(r["failed"] for r in results)
+            logger.info(
+                f"Stored {len(topics) - failed} topics in MongoDB collection '{MONGO_COLLECTION}'"
+            )
+            return failed == 0
         return False
     except Exception as e:
         logger.error(f"Error storing topics in MongoDB: {str(e)}")
@@ -35,18 +119,75 @@ async def get_topics_from_mongo(
 ) -> List[Dict[str, Any]]:
     """Retrieve topics from MongoDB by domain."""
     try:
-        client = AsyncIOMotorClient(MONGO_URI)
-        db = client[MONGO_DB]
-        collection = db[MONGO_COLLECTION]
+        collection = await _get_topics_collection()
 
         query = {"domain": domain}
         if filter_criteria:
             query.update(filter_criteria)
 
-        cursor = collection.find(query).limit(limit)
-        topics = await cursor.to_list(length=limit)
+        with span("mongo.find") as find_span:
+            cursor = collection.find(query).limit(limit)
+            topics = await cursor.to_list(length=limit)
+            find_span.add(items=len(topics))
         logger.info(f"Retrieved {len(topics)} topics from MongoDB for domain '{domain}'")
         return topics
     except Exception as e:
         logger.error(f"Error retrieving topics from MongoDB: {str(e)}")
         return []
+
+async def iter_topics_from_mongo(
+    domain: str,
+    batch_size: int = MONGO_READ_BATCH_SIZE,
+    projection: Optional[Dict[str, Any]] = None,
+    after_id: Any = None,
+    limit: Optional[int] = None,
+    filter_criteria: Dict[str, Any] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Stream topics from MongoDB by domain, one page at a time.
+
+    Pages are read in ``_id`` order with keyset pagination, so a stream can be
+    resumed by passing the ``_id`` of the last topic already processed.
+
+    Args:
+        domain: The domain of topics to read
+        batch_size: Number of topics per yielded page
+        projection: Optional MongoDB projection (e.g., {"content": 0});
+            ``_id`` is always returned because it drives the pagination
+        after_id: Only return topics whose ``_id`` is greater than this
+        limit: Maximum total number of topics to yield
+        filter_criteria: Extra query conditions
+
+    Yields:
+        Lists of at most ``batch_size`` topic documents
+    """
+    from pymongo import ASCENDING
+
+    collection = await _get_topics_collection()
+    batch_size = max(1, batch_size)
+
+    query = {"domain": domain}
+    if filter_criteria:
+        query.update(filter_criteria)
+    if projection is not None:
+        projection = {k: v for k, v in projection.items() if k != "_id"}
+
+    yielded = 0
+    while limit is None or yielded < limit:
+        page_size = batch_size if limit is None else min(batch_size, limit - yielded)
+        page_query = dict(query)
+        if after_id is not None:
+            page_query["_id"] = {"$gt": after_id}
+
+        with span("mongo.find_page") as page_span:
+            cursor = collection.find(page_query, projection).sort("_id", ASCENDING)
+            page = await cursor.limit(page_size).to_list(length=page_size)
+            page_span.add(items=len(page))
+        if not page:
+            return
+
+        yielded += len(page)
+        after_id = page[-1]["_id"]
+        yield page
+
+        if len(page) < page_size:
+            return
@@ -1,7 +1,21 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
 import redis
 from redis import Redis, ConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
 from src.logger import get_logger
-from src.config import REDIS_HOST, REDIS_PORT, REDIS_DB
+from src.metrics import span, increment
+from src.config import (
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    REDIS_ASYNC_TIMEOUT,
+    REDIS_BREAKER_FAILURES,
+    REDIS_BREAKER_RESET,
+)
 
 logger = get_logger(__name__)
 _redis_pool = None
@@ -31,3 +45,108 @@ def get_redis_client() -> Redis:
         logger.error(f"Failed to connect to Redis: {str(e)}")
         # Return a fallback if needed
         return None
+
+
+class CircuitBreaker:
+    """Stops calling Redis for a while after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    callers skip Redis for ``reset_timeout`` seconds; the first call after
+    that is a trial that closes the breaker again on success.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = REDIS_BREAKER_FAILURES,
+        reset_timeout: float = REDIS_BREAKER_RESET,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        return time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Redis reachable again; cache re-enabled")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, error: Exception) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Redis unavailable ({str(error)}); caching disabled for "
+                    f"{self.reset_timeout:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+        else:
+            logger.warning(f"Redis call failed: {str(error)}")
+
+
+_breaker = CircuitBreaker()
+_async_client: Optional[AsyncRedis] = None
+_async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_async_redis_client() -> AsyncRedis:
+    """Return the shared asyncio Redis client for the running event loop."""
+    global _async_client, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        _async_client = AsyncRedis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=False,
+            socket_timeout=REDIS_ASYNC_TIMEOUT,
+            socket_connect_timeout=REDIS_ASYNC_TIMEOUT,
+        )
+        _async_loop = loop
+        logger.debug("Async Redis client created")
+    return _async_client
+
+
+async def _guarded(
+    operation: Callable[[AsyncRedis], Awaitable[Any]], default: Any, name: str, items: int
+) -> Any:
+    """Run a Redis operation through the circuit breaker, returning ``default`` on failure."""
+    if not _breaker.allow():
+        increment("redis.skipped", operation=name)
+        return default
+    try:
+        with span("redis.call", operation=name) as call_span:
+            call_span.add(items=items)
+            result = await operation(get_async_redis_client())
+    except (RedisError, OSError, asyncio.TimeoutError) as e:
+        _breaker.record_failure(e)
+        return default
+    _breaker.record_success()
+    return result
+
+
+async def cache_get_many(keys: List[str]) -> List[Optional[bytes]]:
+    """MGET string values; misses (and an unreachable Redis) yield None."""
+    if not keys:
+        return []
+    return await _guarded(lambda r: r.mget(keys), [None] * len(keys), "mget", len(keys))
+
+
+async def cache_set_many(values: Dict[str, bytes], ex: Optional[int] = None) -> bool:
+    """SET many string values (with optional expiry) in one pipeline."""
+    if not values:
+        return True
+
+    async def run(r: AsyncRedis):
+        pipe = r.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, value, ex=ex)
+        await pipe.execute()
+        return True
+
+    return await _guarded(run, False, "set", len(values))
@@ -0,0 +1,282 @@
+"""Two-tier cache for collected topic data.
+
+Lookups hit a bounded in-process LRU first and fall back to Redis through the
+pipelined async helpers in ``redis.py``. The LRU holds serialized values and
+every lookup decodes a fresh copy, so callers may mutate what they get back. Redis values are msgpack (when
+installed) or compact JSON, compressed with zstd (when installed) or zlib.
+Every value starts with a two-byte header naming its serializer and codec, so
+payloads written with other settings still decode. Keys carry a schema version
+(``kg:v{TOPIC_CACHE_VERSION}:{namespace}:{key}``) and are written with
+``REDIS_CACHE_EXPIRATION``; bumping the version moves to fresh keys and the
+old versioned ones expire on their own. The unversioned ``wikidata:*`` hashes
+of earlier releases were written without a TTL and are no longer read; delete
+them once, e.g. ``redis-cli --scan --pattern 'wikidata:*' | xargs redis-cli del``.
+"""
+
+import json
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.logger import get_logger
+from src.metrics import increment
+from src.config import (
+    REDIS_CACHE_EXPIRATION,
+    TOPIC_CACHE_LRU_ITEMS,
+    TOPIC_CACHE_LRU_BYTES,
+    TOPIC_CACHE_LRU_TTL,
+    TOPIC_CACHE_CODEC,
+    TOPIC_CACHE_COMPRESS_MIN_BYTES,
+    TOPIC_CACHE_VERSION,
+)
+from .redis import cache_get_many, cache_set_many
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = get_logger(__name__)
+
+_topic_caches: Dict[str, "TopicCache"] = {}
+
+
+def _serialize(value: Any) -> Tuple[bytes, bytes]:
+    if msgpack is not None:
+        return b"m", msgpack.packb(value, use_bin_type=True)
+    return b"j", json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def _deserialize(fmt: bytes, data: bytes) -> Any:
+    if fmt == b"m":
+        if msgpack is None:
+            raise ValueError("msgpack payload but msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+    if fmt == b"j":
+        return json.loads(data)
+    raise ValueError(f"Unknown serializer {fmt!r}")
+
+
+def _resolve_codec(codec: str) -> str:
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    if codec == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed; topic cache falls back to zlib")
+        return "zlib"
+    if codec not in ("zstd", "zlib", "none"):
+        raise ValueError(f"Unknown topic cache codec: {codec}")
+    return codec
+
+
+def _compress(codec: str, data: bytes) -> Tuple[bytes, bytes]:
+    if codec == "zstd":
+        return b"s", zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "zlib":
+        return b"z", zlib.compress(data, 6)
+    return b"-", data
+
+
+def _decompress(flag: bytes, data: bytes) -> bytes:
+    if flag == b"s":
+        if zstandard is None:
+            raise ValueError("zstd payload but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if flag == b"z":
+        return zlib.decompress(data)
+    if flag == b"-":
+        return data
+    raise ValueError(f"Unknown codec {flag!r}")
+
+
+class LRUCache:
+    """In-process LRU bounded by entry count, total size and entry age.
+
+    Values are returned as-is; ``TopicCache`` stores serialized values so
+    callers never share them. Not thread-safe; it is used from the event loop
+    only.
+    """
+
+    def __init__(
+        self,
+        max_items: int = TOPIC_CACHE_LRU_ITEMS,
+        max_bytes: int = TOPIC_CACHE_LRU_BYTES,
+        ttl: float = TOPIC_CACHE_LRU_TTL,
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def set(self, key: str, value: Any, size: int) -> None:
+        if self.max_items <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.size += size
+        while len(self._entries) > self.max_items or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        self.size -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+class TopicCache:
+    """Namespaced two-tier cache for JSON-compatible values.
+
+    Redis failures are handled by the circuit breaker of the async Redis
+    helpers and count as misses.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ex: Optional[int] = REDIS_CACHE_EXPIRATION,
+        codec: str = TOPIC_CACHE_CODEC,
+        version: int = TOPIC_CACHE_VERSION,
+        lru: Optional[LRUCache] = None,
+    ):
+        self.namespace = namespace
+        self.ex = ex
+        self.codec = _resolve_codec(codec)
+        self.prefix = f"kg:v{version}:{namespace}:"
+        self.lru = lru if lru is not None else LRUCache()
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "bytes_read": 0,
+            "bytes_written": 0,
+            "raw_bytes_written": 0,
+        }
+
+    def encode(self, value: Any) -> Tuple[bytes, int]:
+        """Serialize and compress a value; returns (payload, uncompressed size)."""
+        payload, _, data = self._encode(value)
+        return payload, len(data)
+
+    def _encode(self, value: Any) -> Tuple[bytes, bytes, bytes]:
+        """Return (Redis payload, serializer flag, serialized value)."""
+        fmt, data = _serialize(value)
+        codec = self.codec if len(data) >= TOPIC_CACHE_COMPRESS_MIN_BYTES else "none"
+        flag, compressed = _compress(codec, data)
+        return fmt + flag + compressed, fmt, data
+
+    @staticmethod
+    def decode(payload: bytes) -> Tuple[Any, int]:
+        """Inverse of ``encode``; returns (value, uncompressed size)."""
+        data = _decompress(payload[1:2], payload[2:])
+        return _deserialize(payload[:1], data), len(data)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return cached values for the given keys (misses are omitted).
+
+        Every returned value is a fresh copy owned by the caller.
+        """
+        keys = list(dict.fromkeys(keys))
+        redis_hits, bytes_read = self.stats["redis_hits"], self.stats["bytes_read"]
+        found: Dict[str, Any] = {}
+        remote = []
+        for key in keys:
+            entry = self.lru.get(key)
+            if entry is not None:
+                found[key] = _deserialize(*entry)
+            else:
+                remote.append(key)
+        self.stats["local_hits"] += len(found)
+        increment("cache.hits", len(found), cache=self.namespace, tier="local")
+
+        if remote:
+            payloads = await cache_get_many([self.prefix + key for key in remote])
+            for key, payload in zip(remote, payloads):
+                if not payload:
+                    continue
+                try:
+                    fmt, data = payload[:1], _decompress(payload[1:2], payload[2:])
+                    value = _deserialize(fmt, data)
+                except Exception as e:
+                    logger.warning(f"Invalid cache entry {self.prefix}{key}: {str(e)}")
+                    continue
+                self.stats["bytes_read"] += len(payload)
+                self.stats["redis_hits"] += 1
+                self.lru.set(key, (fmt, data), len(data))
+                found[key] = value
+        self.stats["misses"] += len(keys) - len(found)
+        increment(
+            "cache.hits",
+            self.stats["redis_hits"] - redis_hits,
+            cache=self.namespace,
+            tier="redis",
+        )
+        increment("cache.misses", len(keys) - len(found), cache=self.namespace)
+        increment(
+            "cache.bytes_read",
+            self.stats["bytes_read"] - bytes_read,
+            cache=self.namespace,
+        )
+        return found
+
+    async def set_many(self, values: Dict[str, Any]) -> None:
+        """Store values in both tiers with one Redis pipeline."""
+        if not values:
+            return
+        payloads = {}
+        for key, value in values.items():
+            # Serialized now, so later changes to ``value`` do not reach the cache
+            payload, fmt, data = self._encode(value)
+            payloads[self.prefix + key] = payload
+            self.lru.set(key, (fmt, data), len(data))
+            self.stats["raw_bytes_written"] += len(data)
+        if await cache_set_many(payloads, ex=self.ex):
+            written = sum(len(p) for p in payloads.values())
+            self.stats["bytes_written"] += written
+            increment("cache.bytes_written", written, cache=self.namespace)
+
+    def report(self) -> str:
+        s = self.stats
+        lookups = s["local_hits"] + s["redis_hits"] + s["misses"]
+        hit_rate = (s["local_hits"] + s["redis_hits"]) / lookups if lookups else 0.0
+        ratio = (
+            s["raw_bytes_written"] / s["bytes_written"] if s["bytes_written"] else 0.0
+        )
+        return (
+            f"{self.namespace} cache: {s['local_hits']} local hits, "
+            f"{s['redis_hits']} Redis hits, {s['misses']} misses ({hit_rate:.0%} hit rate); "
+            f"read {s['bytes_read']} B, wrote {s['bytes_written']} B "
+            f"(compression {ratio:.1f}x)"
+        )
+
+
+def get_topic_cache(namespace: str) -> TopicCache:
+    """Return the process-wide cache of a namespace."""
+    cache = _topic_caches.get(namespace)
+    if cache is None:
+        cache = _topic_caches[namespace] = TopicCache(namespace)
+    return cache
@@ -0,0 +1,630 @@
+"""Local memory-mapped vector index, an alternative backend to ChromaDBClient.
+
+Each collection is a directory holding:
+
+- ``vectors.npy``: a (capacity, dim) float16/float32 matrix opened with
+  ``np.load(mmap_mode=...)``, so a new process maps it instead of reading it
+- ``records.sqlite3``: the ID sidecar mapping matrix rows to IDs, documents
+  and metadata
+- ``index.json``: dimension, dtype, metric and the number of rows in use
+- ``ivf.npz`` (optional): k-means centroids and row assignments for
+  approximate search
+
+Exact search scores all rows block by block with one matrix product per
+block for every query vector at once. Deleted rows are masked out and never
+reused, so row numbers stay stable for the IVF assignments.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.logger import get_logger
+from src.metrics import span
+from src.config import (
+    CHROMA_PERSIST_DIR,
+    VECTOR_STORE_BACKEND,
+    VECTOR_INDEX_DIR,
+    VECTOR_INDEX_DTYPE,
+    VECTOR_INDEX_METRIC,
+    VECTOR_INDEX_BLOCK_ROWS,
+)
+from .async_facade import AsyncStoreMixin
+
+logger = get_logger(__name__)
+
+METRICS = ("cosine", "l2", "ip")
+_MIN_CAPACITY = 1024
+
+_vector_store = None
+
+
+def nearest_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, n: int, metric: str = "cosine"
+) -> np.ndarray:
+    """Indexes of the ``n`` closest centroids of every vector (unordered)."""
+    scores = vectors @ centroids.T
+    if metric == "l2":
+        scores = 2 * scores - np.einsum("ij,ij->i", centroids, centroids)
+    n = min(n, len(centroids))
+    return np.argpartition(-scores, n - 1, axis=1)[:, :n]
+
+
+def train_centroids(
+    sample: np.ndarray,
+    n_lists: int,
+    iterations: int = 10,
+    metric: str = "cosine",
+    seed: int = 0,
+) -> np.ndarray:
+    """Train IVF centroids on a float32 sample with Lloyd's k-means.
+
+    Args:
+        sample: Training vectors (normalized already for the cosine metric)
+        n_lists: Number of centroids, at most the sample size
+        iterations: Lloyd iterations
+        metric: "cosine", "l2" or "ip"; cosine centroids are re-normalized
+        seed: Seed for picking the initial centroids
+
+    Returns:
+        (n_lists, dim) float32 centroid matrix
+    """
+    rng = np.random.default_rng(seed)
+    n_lists = min(n_lists, len(sample))
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].astype(
+        np.float32
+    )
+    for _ in range(iterations):
+        labels = nearest_centroids(sample, centroids, 1, metric)[:, 0]
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_lists)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        if metric == "cosine":
+            centroids /= np.maximum(
+                np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12
+            )
+    return centroids
+
+
+class _LocalCollection:
+    """One on-disk collection of a LocalVectorIndex."""
+
+    def __init__(self, path: str, dtype: str, metric: str, read_only: bool):
+        self.path = path
+        self.read_only = read_only
+        self.dtype = np.dtype(dtype)
+        self.metric = metric
+        self.count = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._norms: Optional[np.ndarray] = None
+        self._ivf: Optional[Dict[str, np.ndarray]] = None
+
+        db_path = os.path.join(path, "records.sqlite3")
+        if read_only:
+            # Read-only workers never write, not even the schema
+            self._db = sqlite3.connect(
+                f"{Path(db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+            )
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self) -> None:
+        if not os.path.exists(self._file("index.json")):
+            return
+        with open(self._file("index.json")) as f:
+            info = json.load(f)
+        self.dtype = np.dtype(info["dtype"])
+        self.metric = info["metric"]
+        self.count = info["count"]
+        self._vectors = np.load(
+            self._file("vectors.npy"), mmap_mode="r" if self.read_only else "r+"
+        )
+        self._valid = np.zeros(len(self._vectors), dtype=bool)
+        for row, id_ in self._db.execute("SELECT row, id FROM records"):
+            self._rows[id_] = row
+            self._valid[row] = True
+        if os.path.exists(self._file("ivf.npz")):
+            with np.load(self._file("ivf.npz")) as ivf:
+                self._set_ivf(ivf["centroids"], ivf["assignments"])
+
+    def _save_info(self) -> None:
+        info = {
+            "dim": self._vectors.shape[1],
+            "dtype": self.dtype.name,
+            "metric": self.metric,
+            "count": self.count,
+        }
+        tmp = self._file("index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp, self._file("index.json"))
+
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        """Create or grow the vector file so it holds at least ``rows`` rows."""
+        if self._vectors is not None:
+            if self._vectors.shape[1] != dim:
+                raise ValueError(
+                    f"Embedding dimension {dim} does not match index dimension "
+                    f"{self._vectors.shape[1]}"
+                )
+            if rows <= len(self._vectors):
+                return
+
+        capacity = max(_MIN_CAPACITY, rows)
+        if self._vectors is not None:
+            capacity = max(capacity, 2 * len(self._vectors))
+        tmp = self._file("vectors.npy.tmp")
+        grown = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=self.dtype, shape=(capacity, dim)
+        )
+        if self._vectors is not None:
+            grown[: self.count] = self._vectors[: self.count]
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp, self._file("vectors.npy"))
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        valid = np.zeros(capacity, dtype=bool)
+        valid[: len(self._valid)] = self._valid
+        self._valid = valid
+
+    def _prepare(self, embeddings: Any) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("Embeddings must be a list of equal-length vectors")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.maximum(norms, 1e-12)
+        return vectors
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: Any,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        skip_existing: bool = False,
+    ) -> int:
+        """Insert or replace vectors; returns the number of rows written."""
+        if self.read_only:
+            raise RuntimeError("Collection was opened read-only")
+        if not ids:
+            return 0
+        vectors = self._prepare(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError("ids and embeddings must have the same length")
+
+        # Later duplicates win, like repeated upserts
+        positions: Dict[str, int] = {}
+        for position, id_ in enumerate(ids):
+            if skip_existing and id_ in self._rows:
+                continue
+            positions[id_] = position
+        if not positions:
+            return 0
+
+        new_ids = [id_ for id_ in positions if id_ not in self._rows]
+        self._ensure_capacity(self.count + len(new_ids), vectors.shape[1])
+        for id_ in new_ids:
+            self._rows[id_] = self.count
+            self.count += 1
+
+        rows = np.fromiter((self._rows[id_] for id_ in positions), dtype=np.int64)
+        written = vectors[list(positions.values())]
+        self._vectors[rows] = written.astype(self.dtype)
+        self._vectors.flush()
+        self._valid[rows] = True
+
+        self._db.executemany(
+            "INSERT OR REPLACE INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    int(row),
+                    id_,
+                    documents[position] if documents else None,
+                    json.dumps(metadatas[position]) if metadatas else None,
+                )
+                for row, (id_, position) in zip(rows, positions.items())
+            ],
+        )
+        self._db.commit()
+        self._save_info()
+
+        self._norms = None
+        if self._ivf is not None:
+            assignments = np.full(self.count, -1, dtype=np.int32)
+            old = self._ivf["assignments"]
+            assignments[: len(old)] = old
+            assignments[rows] = self._nearest_centroids(written, 1)[:, 0]
+            self._set_ivf(self._ivf["centroids"], assignments)
+            self._save_ivf()
+        return len(rows)
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove IDs from the collection; returns the number removed."""
+        if self.read_only:
+            raise RuntimeError("Collection was opened read-only")
+        rows = [self._rows.pop(id_) for id_ in ids if id_ in self._rows]
+        if not rows:
+            return 0
+        self._valid[rows] = False
+        self._db.executemany("DELETE FROM records WHERE row = ?", [(r,) for r in rows])
+        self._db.commit()
+        return len(rows)
+
+    def get(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored float32 vectors of the given IDs (unknown IDs are omitted)."""
+        known = [id_ for id_ in ids if id_ in self._rows]
+        if not known:
+            return {}
+        rows = np.fromiter((self._rows[id_] for id_ in known), dtype=np.int64)
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+        return dict(zip(known, vectors))
+
+    def _row_norms(self) -> np.ndarray:
+        """Squared L2 norms of every row in use, computed once per change."""
+        if self._norms is None:
+            norms = np.empty(self.count, dtype=np.float32)
+            for start in range(0, self.count, VECTOR_INDEX_BLOCK_ROWS):
+                block = self._vectors[start : start + VECTOR_INDEX_BLOCK_ROWS].astype(
+                    np.float32
+                )
+                block = block[: self.count - start]
+                norms[start : start + len(block)] = np.einsum("ij,ij->i", block, block)
+            self._norms = norms
+        return self._norms
+
+    def _scores(self, queries: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Similarity scores (higher is closer) of queries against ``rows``."""
+        block = np.asarray(self._vectors[rows], dtype=np.float32)
+        scores = queries @ block.T
+        if self.metric == "l2":
+            scores = 2 * scores - self._row_norms()[rows]
+            scores -= np.einsum("ij,ij->i", queries, queries)[:, None]
+        scores[:, ~self._valid[rows]] = -np.inf
+        return scores
+
+    def _top_k(
+        self, queries: np.ndarray, rows: Optional[np.ndarray], k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k over ``rows`` (all rows if None), scanning block by block."""
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        total = self.count if rows is None else len(rows)
+        for start in range(0, total, VECTOR_INDEX_BLOCK_ROWS):
+            end = min(start + VECTOR_INDEX_BLOCK_ROWS, total)
+            block_rows = np.arange(start, end) if rows is None else rows[start:end]
+            scores = np.concatenate(
+                [best_scores, self._scores(queries, block_rows)], axis=1
+            )
+            candidates = np.concatenate(
+                [
+                    best_rows,
+                    np.broadcast_to(block_rows, (len(queries), len(block_rows))),
+                ],
+                axis=1,
+            )
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+            best_scores, best_rows = scores, candidates
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return (
+            np.take_along_axis(best_scores, order, axis=1),
+            np.take_along_axis(best_rows, order, axis=1),
+        )
+
+    def _rows_matching(self, where: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata equals every key/value pair in ``where``."""
+        clauses, params = [], []
+        for key, value in where.items():
+            if key.startswith("$") or isinstance(value, dict):
+                raise ValueError(
+                    "Only equality filters are supported by the local index"
+                )
+            clauses.append("json_extract(metadata, ?) = ?")
+            params.extend([f"$.{key}", value])
+        query = f"SELECT row FROM records WHERE {' AND '.join(clauses)} ORDER BY row"
+        return np.array(
+            [row for (row,) in self._db.execute(query, params)], dtype=np.int64
+        )
+
+    def query(
+        self,
+        query_embeddings: Any,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        approximate: bool = False,
+        n_probe: int = 8,
+    ) -> Dict[str, List[List[Any]]]:
+        """Return the nearest rows for every query vector in Chroma's result shape."""
+        queries = self._prepare(query_embeddings)
+        results: Dict[str, List[List[Any]]] = {
+            "ids": [],
+            "distances": [],
+            "documents": [],
+            "metadatas": [],
+        }
+        if self._vectors is None or not self._rows:
+            for key in results:
+                results[key] = [[] for _ in queries]
+            return results
+
+        rows = self._rows_matching(where) if where else None
+        if approximate and self._ivf is not None and rows is None:
+            scores, found = self._ivf_top_k(queries, n_results, n_probe)
+        else:
+            scores, found = self._top_k(queries, rows, n_results)
+
+        keep = np.isfinite(scores)
+        wanted = sorted({int(r) for r in found[keep]})
+        records = {}
+        for start in range(0, len(wanted), 500):
+            chunk = wanted[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row, id_, document, metadata in self._db.execute(
+                f"SELECT row, id, document, metadata FROM records WHERE row IN ({placeholders})",
+                chunk,
+            ):
+                records[row] = (
+                    id_,
+                    document,
+                    json.loads(metadata) if metadata else None,
+                )
+
+        for query_scores, query_rows, query_keep in zip(scores, found, keep):
+            hits = [
+                (records[int(r)], float(s))
+                for r, s, k in zip(query_rows, query_scores, query_keep)
+                if k and int(r) in records
+            ]
+            results["ids"].append([record[0] for record, _ in hits])
+            results["documents"].append([record[1] for record, _ in hits])
+            results["metadatas"].append([record[2] for record, _ in hits])
+            results["distances"].append([self._distance(s) for _, s in hits])
+        return results
+
+    def _distance(self, score: float) -> float:
+        # Same conventions as Chroma: squared L2, 1 - cosine, 1 - inner product
+        return -score if self.metric == "l2" else 1.0 - score
+
+    def _nearest_centroids(self, vectors: np.ndarray, n: int) -> np.ndarray:
+        return nearest_centroids(vectors, self._ivf["centroids"], n, self.metric)
+
+    def _set_ivf(self, centroids: np.ndarray, assignments: np.ndarray) -> None:
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        self._ivf = {
+            "centroids": centroids.astype(np.float32),
+            "assignments": assignments,
+            "order": order,
+            "bounds": bounds,
+        }
+
+    def _save_ivf(self) -> None:
+        tmp = self._file("ivf.tmp.npz")
+        np.savez(
+            tmp, centroids=self._ivf["centroids"], assignments=self._ivf["assignments"]
+        )
+        os.replace(tmp, self._file("ivf.npz"))
+
+    def _ivf_top_k(
+        self, queries: np.ndarray, k: int, n_probe: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k scanning only the ``n_probe`` closest IVF lists."""
+        order, bounds = self._ivf["order"], self._ivf["bounds"]
+        probes = self._nearest_centroids(queries, n_probe)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_rows = np.zeros((len(queries), k), dtype=np.int64)
+        for i, lists in enumerate(probes):
+            rows = np.sort(
+                np.concatenate([order[bounds[c] : bounds[c + 1]] for c in lists])
+            )
+            scores, found = self._top_k(queries[i : i + 1], rows, k)
+            all_scores[i, : scores.shape[1]] = scores[0]
+            all_rows[i, : found.shape[1]] = found[0]
+        return all_scores, all_rows
+
+    def build_ivf(
+        self,
+        n_lists: Optional[int] = None,
+        iterations: int = 10,
+        sample_size: int = 100_000,
+    ) -> None:
+        """Cluster the vectors with k-means for approximate queries.
+
+        Args:
+            n_lists: Number of inverted lists (defaults to ~sqrt of the row count)
+            iterations: Lloyd iterations run on the training sample
+            sample_size: Maximum number of vectors used to train the centroids
+        """
+        if self.read_only:
+            raise RuntimeError("Collection was opened read-only")
+        valid_rows = np.flatnonzero(self._valid[: self.count])
+        if not len(valid_rows):
+            return
+        n_lists = n_lists or max(1, int(np.sqrt(len(valid_rows))))
+        n_lists = min(n_lists, len(valid_rows))
+
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(
+            rng.choice(valid_rows, min(sample_size, len(valid_rows)), replace=False)
+        )
+        sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+        centroids = train_centroids(sample, n_lists, iterations, self.metric)
+        self._ivf = {"centroids": centroids}
+
+        assignments = np.full(self.count, -1, dtype=np.int32)
+        for start in range(0, len(valid_rows), VECTOR_INDEX_BLOCK_ROWS):
+            rows = valid_rows[start : start + VECTOR_INDEX_BLOCK_ROWS]
+            block = np.asarray(self._vectors[rows], dtype=np.float32)
+            assignments[rows] = self._nearest_centroids(block, 1)[:, 0]
+        self._set_ivf(centroids, assignments)
+        self._save_ivf()
+        logger.info(
+            f"Built IVF index with {n_lists} lists over {len(valid_rows)} vectors"
+        )
+
+
+class LocalVectorIndex(AsyncStoreMixin):
+    """Memory-mapped vector store with the ChromaDBClient document interface.
+
+    Args:
+        directory: Root directory holding one subdirectory per collection
+        dtype: Storage dtype for new collections ("float16" or "float32")
+        metric: Distance for new collections ("cosine", "l2" or "ip")
+        read_only: Map existing collections read-only (for retrieval workers)
+    """
+
+    def __init__(
+        self,
+        directory: str = VECTOR_INDEX_DIR,
+        dtype: str = VECTOR_INDEX_DTYPE,
+        metric: str = VECTOR_INDEX_METRIC,
+        read_only: bool = False,
+    ):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+        self.directory = directory
+        self.dtype = dtype
+        self.metric = metric
+        self.read_only = read_only
+        self._collections: Dict[str, _LocalCollection] = {}
+
+    def list_collections(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if os.path.exists(os.path.join(self.directory, name, "records.sqlite3"))
+        )
+
+    def collection_exists(self, name: str) -> bool:
+        return name in self._collections or name in self.list_collections()
+
+    def get_or_create_collection(
+        self, name: str, metadata: Optional[Dict[str, Any]] = None
+    ):
+        coll = self._collections.get(name)
+        if coll is None:
+            if self.read_only and not self.collection_exists(name):
+                raise ValueError(f"Collection '{name}' does not exist.")
+            coll = _LocalCollection(
+                os.path.join(self.directory, name),
+                self.dtype,
+                self.metric,
+                self.read_only,
+            )
+            self._collections[name] = coll
+        return coll
+
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        embeddings: List[List[float]],
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        coll = self.get_or_create_collection(collection_name)
+        with span("vector_store.add", backend="local") as write_span:
+            added = coll.upsert(
+                ids, embeddings, documents, metadatas, skip_existing=True
+            )
+            write_span.add(items=added)
+        if added < len(ids):
+            logger.warning(
+                f"Skipped {len(ids) - added} existing IDs in '{collection_name}'"
+            )
+        logger.info(f"Added {added} documents to '{collection_name}'")
+
+    def upsert_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        embeddings: List[List[float]],
+        ids: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        coll = self.get_or_create_collection(collection_name)
+        with span("vector_store.upsert", backend="local") as write_span:
+            write_span.add(items=len(ids))
+            coll.upsert(ids, embeddings, documents, metadatas)
+        logger.info(f"Upserted {len(documents)} documents into '{collection_name}'")
+
+    def delete_documents(self, collection_name: str, ids: List[str]):
+        coll = self.get_or_create_collection(collection_name)
+        with span("vector_store.delete", backend="local") as delete_span:
+            deleted = coll.delete(ids)
+            delete_span.add(items=deleted)
+        logger.info(f"Deleted {deleted} documents from '{collection_name}'")
+
+    def get_embeddings(
+        self, collection_name: str, ids: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """Return the stored vectors of the given IDs (unknown IDs are omitted)."""
+        with span("vector_store.get", backend="local") as get_span:
+            found = self.get_or_create_collection(collection_name).get(ids)
+            get_span.add(items=len(found))
+        return found
+
+    def query_collection(
+        self,
+        collection_name: str,
+        query_embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        approximate: bool = False,
+        n_probe: int = 8,
+    ):
+        if not self.collection_exists(collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist.")
+        coll = self.get_or_create_collection(collection_name)
+        with span(
+            "vector_store.query", backend="local", approximate=approximate
+        ) as query_span:
+            query_span.add(items=len(query_embeddings))
+            return coll.query(query_embeddings, n_results, where, approximate, n_probe)
+
+    def build_ivf(
+        self, collection_name: str, n_lists: Optional[int] = None, **kwargs: Any
+    ):
+        """Build the approximate IVF index of a collection (see ``query_collection``)."""
+        self.get_or_create_collection(collection_name).build_ivf(n_lists, **kwargs)
+
+
+def get_vector_store():
+    """Return the process-wide vector store selected by ``VECTOR_STORE_BACKEND``."""
+    global _vector_store
+    if _vector_store is None:
+        if VECTOR_STORE_BACKEND == "local":
+            _vector_store = LocalVectorIndex()
+        elif VECTOR_STORE_BACKEND == "chroma":
+            from .chromadb import ChromaDBClient
+
+            _vector_store = ChromaDBClient(CHROMA_PERSIST_DIR)
+        else:
+            raise ValueError(f"Unknown vector store backend: {VECTOR_STORE_BACKEND}")
+    return _vector_store
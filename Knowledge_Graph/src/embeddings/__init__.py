@@ -1,12 +1,19 @@
-# __init__.py for embeddings
-from .service import (
-    generate_embedding_async,
-    generate_embeddings_batch_async,
-    process_topics_batch_async,
+# __init__.py for embeddings; submodules are imported on first use of their exports
+from src.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "generate_embedding_async": ".service",
+        "generate_embeddings_batch_async": ".service",
+        "process_topics_batch_async": ".service",
+        "iter_topic_chunks": ".chunking",
+    },
 )
 
 __all__ = [
     "generate_embedding_async",
     "generate_embeddings_batch_async",
     "process_topics_batch_async",
+    "iter_topic_chunks",
 ]
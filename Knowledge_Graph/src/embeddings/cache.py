@@ -0,0 +1,179 @@
+"""Persistent embedding cache keyed by a hash of (model name, normalized text)."""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from src.logger import get_logger
+from src.config import (
+    OLLAMA_EMBEDDING_MODEL,
+    EMBEDDING_CACHE_BACKEND,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+)
+
+logger = get_logger(__name__)
+
+_embedding_cache = None
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only changes hash the same."""
+    return " ".join(text.split())
+
+
+def embedding_hash(text: str, model: str = OLLAMA_EMBEDDING_MODEL) -> str:
+    """Return the cache key for embedding ``text`` with ``model``."""
+    payload = f"{model}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(data: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """Embedding store backed by Redis or a local SQLite file.
+
+    Vectors are stored as packed float32 and expire after ``ttl`` seconds
+    (0 keeps them). Redis goes through the async helpers and circuit breaker
+    of ``src.database.redis``; SQLite runs in a worker thread and keeps at
+    most ``max_entries`` vectors, dropping the oldest first. Cache failures
+    are logged and treated as misses so embedding never fails because of the
+    cache.
+    """
+
+    def __init__(
+        self,
+        backend: str = EMBEDDING_CACHE_BACKEND,
+        path: str = EMBEDDING_CACHE_PATH,
+        ttl: int = EMBEDDING_CACHE_TTL,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+    ):
+        self.backend = backend
+        self.ttl = max(0, ttl)
+        self.max_entries = max(0, max_entries)
+        self._db: Optional[sqlite3.Connection] = None
+        # One connection shared by the worker threads, used one call at a time
+        self._db_lock = threading.Lock()
+
+        if backend == "disk":
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(hash TEXT PRIMARY KEY, vector BLOB, stored_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = [
+                row[1] for row in self._db.execute("PRAGMA table_info(embeddings)")
+            ]
+            if "stored_at" not in columns:
+                # Files written before entries expired
+                self._db.execute(
+                    "ALTER TABLE embeddings ADD COLUMN stored_at REAL NOT NULL DEFAULT 0"
+                )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_stored_at ON embeddings (stored_at)"
+            )
+            self._db.commit()
+            self._prune()
+        elif backend not in ("redis", "none"):
+            raise ValueError(f"Unknown embedding cache backend: {backend}")
+
+    async def get_many(self, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the given hashes (misses are omitted)."""
+        hashes = list(dict.fromkeys(hashes))
+        if not hashes:
+            return {}
+        try:
+            if self.backend == "redis":
+                from src.database.redis import cache_get_many
+
+                values = await cache_get_many([f"embedding:{h}" for h in hashes])
+                return {h: _unpack(v) for h, v in zip(hashes, values) if v}
+            if self._db is not None:
+                return await asyncio.to_thread(self._db_get_many, hashes)
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {str(e)}")
+        return {}
+
+    async def set_many(self, vectors: Dict[str, List[float]]) -> None:
+        """Store vectors under their hashes."""
+        if not vectors:
+            return
+        try:
+            if self.backend == "redis":
+                from src.database.redis import cache_set_many
+
+                await cache_set_many(
+                    {f"embedding:{h}": _pack(vector) for h, vector in vectors.items()},
+                    ex=self.ttl or None,
+                )
+            elif self._db is not None:
+                await asyncio.to_thread(self._db_set_many, vectors)
+        except Exception as e:
+            logger.warning(f"Failed to cache {len(vectors)} embeddings: {str(e)}")
+
+    def _db_get_many(self, hashes: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        oldest = time.time() - self.ttl if self.ttl else 0
+        with self._db_lock:
+            # Stay below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT hash, vector FROM embeddings "
+                    f"WHERE hash IN ({placeholders}) AND stored_at >= ?",
+                    [*chunk, oldest],
+                )
+                found.update((h, _unpack(v)) for h, v in rows)
+        return found
+
+    def _db_set_many(self, vectors: Dict[str, List[float]]) -> None:
+        now = time.time()
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vector, stored_at) VALUES (?, ?, ?)",
+                [(h, _pack(vector), now) for h, vector in vectors.items()],
+            )
+            self._db.commit()
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete expired vectors and the oldest ones beyond ``max_entries``."""
+        with self._db_lock:
+            if self.ttl:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE stored_at < ?",
+                    (time.time() - self.ttl,),
+                )
+            if self.max_entries:
+                (count,) = self._db.execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()
+                if count > self.max_entries:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE hash IN "
+                        "(SELECT hash FROM embeddings ORDER BY stored_at LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+            self._db.commit()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
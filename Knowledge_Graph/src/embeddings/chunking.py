@@ -0,0 +1,142 @@
+"""Section- and sentence-aware chunking of topic text for embedding.
+
+Wikipedia content keeps its ``== Section ==`` heading markup, so chunks never
+straddle a section boundary. Within a section, sentences are packed into
+chunks of at most ``chunk_size`` characters, with trailing sentences of up to
+``chunk_overlap`` characters repeated at the start of the next chunk. Offsets
+refer to the text the chunk was cut from.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_HEADING_RE = re.compile(r"(={2,})\s*([^=\n]+?)\s*\1")
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_LEADING_SPACE_RE = re.compile(r"\s*")
+
+Span = Tuple[int, int]
+
+
+def topic_text(topic: Dict[str, Any]) -> str:
+    """Return the text of a topic that gets embedded."""
+    return topic.get("content_for_embedding", "") or topic.get("summary", "")
+
+
+def _section_spans(text: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (section heading, start, end) for the lead and each section body."""
+    section, start = "", 0
+    for match in _HEADING_RE.finditer(text):
+        yield section, start, match.start()
+        section, start = match.group(2), match.end()
+    yield section, start, len(text)
+
+
+def _sentence_spans(text: str, start: int, end: int) -> Iterator[Span]:
+    """Yield non-blank sentence spans of ``text[start:end]`` without surrounding space."""
+    position = start
+    for boundary in _SENTENCE_BOUNDARY_RE.finditer(text, start, end):
+        yield from _trimmed(text, position, boundary.start())
+        position = boundary.end()
+    yield from _trimmed(text, position, end)
+
+
+def _trimmed(text: str, start: int, end: int) -> Iterator[Span]:
+    start = _LEADING_SPACE_RE.match(text, start, end).end()
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if end > start:
+        yield start, end
+
+
+def _split_long(
+    text: str, spans: Iterable[Span], chunk_size: int, chunk_overlap: int
+) -> Iterator[Span]:
+    """Cut spans longer than ``chunk_size`` into overlapping fixed-size windows."""
+    step = chunk_size - chunk_overlap
+    for start, end in spans:
+        if end - start <= chunk_size:
+            yield start, end
+            continue
+        position = start
+        while True:
+            yield from _trimmed(text, position, min(position + chunk_size, end))
+            if position + chunk_size >= end:
+                break
+            position += step
+
+
+def chunk_spans(
+    text: str, chunk_size: Optional[int], chunk_overlap: int = 0
+) -> Iterator[Tuple[str, int, int]]:
+    """Yield (section heading, start, end) chunk spans of ``text``.
+
+    Args:
+        text: Text to chunk
+        chunk_size: Maximum chunk length in characters; None keeps the text whole
+        chunk_overlap: Characters of trailing sentences repeated in the next chunk
+
+    Raises:
+        ValueError: If ``chunk_overlap`` is not smaller than ``chunk_size``
+    """
+    if chunk_size is None:
+        for start, end in _trimmed(text, 0, len(text)):
+            yield "", start, end
+        return
+    if not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap must be >= 0 and smaller than chunk_size")
+
+    for section, section_start, section_end in _section_spans(text):
+        window: List[Span] = []
+        sentences = _sentence_spans(text, section_start, section_end)
+        for span in _split_long(text, sentences, chunk_size, chunk_overlap):
+            if window and span[1] - window[0][0] > chunk_size:
+                yield section, window[0][0], window[-1][1]
+
+                # Carry whole trailing sentences that fit in the overlap
+                carried = 0
+                keep = len(window)
+                while keep > 0:
+                    size = window[keep - 1][1] - window[keep - 1][0]
+                    if carried + size > chunk_overlap:
+                        break
+                    keep -= 1
+                    carried += size
+                window = window[keep:]
+                while window and span[1] - window[0][0] > chunk_size:
+                    window.pop(0)
+            window.append(span)
+        if window:
+            yield section, window[0][0], window[-1][1]
+
+
+def iter_topic_chunks(
+    topics: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int],
+    chunk_overlap: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the chunks of every topic, one topic at a time.
+
+    Args:
+        topics: Topics to chunk
+        chunk_size: Maximum chunk length in characters; None keeps each text whole
+        chunk_overlap: Characters of overlap between consecutive chunks
+
+    Yields:
+        Chunk dicts with id (f"{topic_id}_{chunk_index}"), topic_id,
+        chunk_index, section, start, end and text
+    """
+    for topic in topics:
+        topic_id = str(topic.get("id", "unknown"))
+        text = topic_text(topic)
+        for chunk_index, (section, start, end) in enumerate(
+            chunk_spans(text, chunk_size, chunk_overlap)
+        ):
+            yield {
+                "id": f"{topic_id}_{chunk_index}",
+                "topic_id": topic_id,
+                "chunk_index": chunk_index,
+                "section": section,
+                "start": start,
+                "end": end,
+                "text": text[start:end],
+            }
@@ -1,59 +1,288 @@
 import asyncio
-import uuid
+import random
 import time
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple
 import ollama
 
 from src.logger import get_logger
-from src.config import OLLAMA_BASE_URL, OLLAMA_EMBEDDING_MODEL
-from src.database.chromadb import ChromaDBClient
+from src.metrics import span, increment, timed
+from src.config import (
+    OLLAMA_BASE_URL,
+    OLLAMA_EMBEDDING_MODEL,
+    OLLAMA_EMBED_BATCH_SIZE,
+    OLLAMA_EMBED_MAX_BATCH_CHARS,
+    OLLAMA_EMBED_CONCURRENCY,
+    OLLAMA_EMBED_MAX_RETRIES,
+    EMBEDDING_CHUNK_BUFFER_SIZE,
+)
+from src.database.vector_index import get_vector_store
+from .cache import embedding_hash, get_embedding_cache
+from .chunking import iter_topic_chunks, topic_text
 
 logger = get_logger(__name__)
 
-async def generate_embedding_async(text: str) -> List[float]:
-    try:
-        client = ollama.AsyncClient(host=OLLAMA_BASE_URL)
-        response = await client.embed(model=OLLAMA_EMBEDDING_MODEL, input=text)
-        return response.embeddings
-    except Exception as e:
-        logger.error(f"Error generating embedding: {str(e)}")
+_ollama_client = None
+_ollama_loop = None
+
+def _get_ollama_client() -> ollama.AsyncClient:
+    """Return the shared Ollama client for the running event loop."""
+    global _ollama_client, _ollama_loop
+    loop = asyncio.get_running_loop()
+    if _ollama_client is None or _ollama_loop is not loop:
+        _ollama_client = ollama.AsyncClient(host=OLLAMA_BASE_URL)
+        _ollama_loop = loop
+    return _ollama_client
+
+def _pack_batches(texts: List[str], max_count: int, max_chars: int) -> List[List[int]]:
+    """Group text indexes into request batches bounded by count and total characters.
+
+    A single text longer than ``max_chars`` still gets a batch of its own.
+    """
+    batches = []
+    current: List[int] = []
+    current_chars = 0
+    for index, text in enumerate(texts):
+        length = len(text)
+        if current and (len(current) >= max_count or current_chars + length > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(index)
+        current_chars += length
+    if current:
+        batches.append(current)
+    return batches
+
+async def _embed_with_retries(
+    texts: List[str], semaphore: asyncio.Semaphore, max_retries: int
+) -> List[List[float]]:
+    """Embed one request batch, retrying it with backoff and splitting it on failure.
+
+    Raises:
+        RuntimeError: If a single text still fails after all retries
+    """
+    client = _get_ollama_client()
+    for attempt in range(max_retries + 1):
+        try:
+            async with semaphore:
+                with span("ollama.embed") as embed_span:
+                    embed_span.add(items=len(texts), bytes=sum(len(t) for t in texts))
+                    response = await client.embed(model=OLLAMA_EMBEDDING_MODEL, input=texts)
+            if len(response.embeddings) != len(texts):
+                raise RuntimeError(
+                    f"Expected {len(texts)} embeddings, got {len(response.embeddings)}"
+                )
+            return response.embeddings
+        except Exception as e:
+            if attempt == max_retries:
+                last_error = e
+                break
+            delay = random.uniform(0, min(30, 2**attempt))
+            increment("ollama.retries")
+            logger.warning(
+                f"Embedding batch of {len(texts)} failed: {str(e)}; retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+    if len(texts) == 1:
+        raise RuntimeError(f"Error generating embedding: {str(last_error)}")
+
+    # Isolate the text that keeps failing by retrying each half on its own;
+    # a persistent failure is likely content-specific, so halves retry once
+    middle = len(texts) // 2
+    logger.warning(f"Splitting failed embedding batch of {len(texts)} texts")
+    split_retries = min(1, max_retries)
+    first, second = await asyncio.gather(
+        _embed_with_retries(texts[:middle], semaphore, split_retries),
+        _embed_with_retries(texts[middle:], semaphore, split_retries),
+    )
+    return first + second
+
+async def generate_embedding_async(text: str) -> List[List[float]]:
+    """Embed one text.
+
+    Returns:
+        A one-element list holding the text's embedding, the shape of the
+        Ollama ``embed`` response this function has always returned
+
+    Raises:
+        RuntimeError: If the text cannot be embedded
+    """
+    return await generate_embeddings_batch_async([text])
+
+async def generate_embeddings_batch_async(
+    texts: List[str],
+    batch_size: int = OLLAMA_EMBED_BATCH_SIZE,
+    max_batch_chars: int = OLLAMA_EMBED_MAX_BATCH_CHARS,
+    concurrency: int = OLLAMA_EMBED_CONCURRENCY,
+    max_retries: int = OLLAMA_EMBED_MAX_RETRIES,
+) -> List[List[float]]:
+    """Embed texts with batched Ollama requests, keeping output aligned with input.
+
+    Args:
+        texts: Texts to embed
+        batch_size: Maximum number of texts per request
+        max_batch_chars: Maximum total characters per request
+        concurrency: Maximum number of requests in flight
+        max_retries: Retries per request batch before it is split
+
+    Returns:
+        One embedding per input text, in input order
+
+    Raises:
+        RuntimeError: If any text cannot be embedded
+    """
+    if not texts:
         return []
 
-async def generate_embeddings_batch_async(texts: List[str]) -> List[List[float]]:
-    tasks = [generate_embedding_async(t) for t in texts]
-    all_embeddings = await asyncio.gather(*tasks)
-    return all_embeddings
+    batches = _pack_batches(texts, max(1, batch_size), max_batch_chars)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    embeddings: List[List[float]] = [None] * len(texts)
+
+    async def run(indexes: List[int]):
+        vectors = await _embed_with_retries(
+            [texts[i] for i in indexes], semaphore, max_retries
+        )
+        for i, vector in zip(indexes, vectors):
+            embeddings[i] = vector
 
+    started = time.monotonic()
+    await asyncio.gather(*[run(indexes) for indexes in batches])
+    logger.info(
+        f"Generated {len(texts)} embeddings in {len(batches)} requests "
+        f"({time.monotonic() - started:.2f}s)"
+    )
+    return embeddings
+
+async def _embed_chunks(
+    chunks: List[Dict[str, Any]]
+) -> Tuple[List[List[float]], List[str], int]:
+    """Embed a group of chunks through the embedding cache.
+
+    Returns:
+        Tuple of (vectors, content hashes, number of chunks sent to Ollama)
+    """
+    hashes = [embedding_hash(chunk["text"]) for chunk in chunks]
+    cache = get_embedding_cache()
+    vectors = await cache.get_many(hashes)
+    missing = list({h: c["text"] for h, c in zip(hashes, chunks) if h not in vectors}.items())
+    increment("cache.hits", len(hashes) - len(missing), cache="embedding")
+    increment("cache.misses", len(missing), cache="embedding")
+    if missing:
+        new_vectors = await generate_embeddings_batch_async([text for _, text in missing])
+        fresh = {h: vector for (h, _), vector in zip(missing, new_vectors)}
+        await cache.set_many(fresh)
+        vectors.update(fresh)
+    return [vectors[h] for h in hashes], hashes, len(missing)
+
+async def _upsert_chunks(
+    chunks: List[Dict[str, Any]],
+    vectors: List[List[float]],
+    hashes: List[str],
+    collection_name: str,
+) -> None:
+    """Upsert embedded chunks on the vector store's worker thread."""
+    await get_vector_store().upsert_documents_async(
+        collection_name=collection_name,
+        documents=[chunk["text"] for chunk in chunks],
+        embeddings=vectors,
+        ids=[chunk["id"] for chunk in chunks],
+        metadatas=[
+            {
+                "topic_id": chunk["topic_id"],
+                "chunk_index": chunk["chunk_index"],
+                "section": chunk["section"],
+                "start": chunk["start"],
+                "end": chunk["end"],
+                "embedding_hash": h,
+            }
+            for h, chunk in zip(hashes, chunks)
+        ],
+    )
+
+@timed("stage.embedding")
 async def process_topics_batch_async(
     topics: List[Dict[str, Any]],
-    collection_name: str = "programming_embeddings"
+    collection_name: str = "programming_embeddings",
+    chunk_size: Optional[int] = None,
+    chunk_overlap: int = 0,
 ) -> List[Dict[str, Any]]:
+    """Chunk and embed topics, upserting one vector per chunk into the vector store.
+
+    Topics whose ``embedding_hash`` matches their current text and chunking
+    settings are skipped entirely. Chunks are produced lazily and embedded
+    ``EMBEDDING_CHUNK_BUFFER_SIZE`` at a time; chunk vectors are looked up in
+    the embedding cache first and only cache misses are sent to Ollama. Each
+    group is written to the vector store while the next one is embedded.
+
+    Args:
+        topics: Topics to embed; updated in place with embedding_ids,
+            embedding_id (the first chunk) and embedding_hash
+        collection_name: Vector store collection to upsert into
+        chunk_size: Maximum chunk length in characters; None embeds each text whole
+        chunk_overlap: Characters of overlap between consecutive chunks
+
+    Returns:
+        The same list of topics
+    """
     if not topics:
         return []
-    texts = [t.get("content_for_embedding", "") or t.get("summary", "") for t in topics]
-    embeddings = await generate_embeddings_batch_async(texts)
 
-    # Store embeddings in Chroma
-    chroma_client = ChromaDBClient()
-    ids = []
+    pending = []
     for topic in topics:
-        # Make an ID that is unique
-        topic_id = f"{topic.get('id','unknown')}_{uuid.uuid4()}"
-        ids.append(topic_id)
+        content_hash = embedding_hash(f"{chunk_size}:{chunk_overlap}\0{topic_text(topic)}")
+        if topic.get("embedding_hash") == content_hash:
+            continue
+        pending.append((topic, content_hash))
 
-    # For metadata, you can store anything relevant
-    metadatas = [{"topic_id": t.get("id")} for t in topics]
+    if not pending:
+        logger.info(f"All {len(topics)} topics unchanged; skipping embedding")
+        return topics
 
-    chroma_client.add_documents(
-        collection_name=collection_name,
-        documents=texts,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=metadatas
-    )
+    # Same topic and chunk index, same ID: reruns overwrite instead of appending
+    chunk_ids: Dict[str, List[str]] = {str(t.get("id", "unknown")): [] for t, _ in pending}
+    chunks = iter_topic_chunks((t for t, _ in pending), chunk_size, chunk_overlap)
+    generated = 0
+    write = None
+    try:
+        while True:
+            group = list(islice(chunks, EMBEDDING_CHUNK_BUFFER_SIZE))
+            if not group:
+                break
+            vectors, hashes, sent = await _embed_chunks(group)
+            generated += sent
+            if write is not None:
+                await write
+            write = asyncio.ensure_future(
+                _upsert_chunks(group, vectors, hashes, collection_name)
+            )
+            for chunk in group:
+                chunk_ids[chunk["topic_id"]].append(chunk["id"])
+        if write is not None:
+            await write
+    except BaseException:
+        if write is not None and not write.done():
+            write.cancel()
+        raise
+
+    vector_store = get_vector_store()
+    chunk_count = 0
+    for topic, content_hash in pending:
+        ids = chunk_ids[str(topic.get("id", "unknown"))]
+        chunk_count += len(ids)
 
-    # Attach an embedding reference back to each topic if needed
-    for i, topic in enumerate(topics):
-        topic["embedding_id"] = ids[i]
+        # Drop vectors of chunks the topic no longer has
+        previous = topic.get("embedding_ids") or [topic.get("embedding_id")]
+        stale = [i for i in previous if i and i not in ids]
+        if stale:
+            await vector_store.delete_documents_async(collection_name, stale)
 
+        topic["embedding_ids"] = ids
+        topic["embedding_id"] = ids[0] if ids else None
+        topic["embedding_hash"] = content_hash
+
+    logger.info(
+        f"Embedded {len(pending)}/{len(topics)} changed topics as {chunk_count} chunks "
+        f"({chunk_count - generated} cache hits, {generated} generated)"
+    )
     return topics
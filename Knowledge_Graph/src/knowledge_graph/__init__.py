@@ -1,4 +1,31 @@
-# __init__.py for knowledge_graph
-from .graph_builder import build_knowledge_graph, GraphDocument, Node, Relationship
+# __init__.py for knowledge_graph; submodules are imported on first use of their exports
+from src.lazy import lazy_exports
 
-__all__ = ["build_knowledge_graph", "GraphDocument", "Node", "Relationship"]
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "build_knowledge_graph": ".graph_builder",
+        "build_knowledge_graph_from_mongo": ".graph_builder",
+        "build_compact_graph": ".graph_builder",
+        "merge_domain_topics": ".graph_builder",
+        "GraphDocument": ".graph_builder",
+        "Node": ".graph_builder",
+        "Relationship": ".graph_builder",
+        "CompactGraph": ".graph_store",
+        "NodeView": ".graph_store",
+        "GraphState": ".incremental",
+    },
+)
+
+__all__ = [
+    "build_knowledge_graph",
+    "build_knowledge_graph_from_mongo",
+    "build_compact_graph",
+    "merge_domain_topics",
+    "CompactGraph",
+    "NodeView",
+    "GraphState",
+    "GraphDocument",
+    "Node",
+    "Relationship",
+]
@@ -1,16 +1,118 @@
 from src.logger import get_logger
-import re
-from typing import Dict, List, Any, Set
+from src.metrics import timed
+from src.data_collection.text_processing import normalize_for_embedding
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Set, Tuple
 import json
 
 logger = get_logger(__name__)
 
 
-def create_knowledge_graph_data(topics: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _extract_references(topic: Dict[str, Any]) -> Set[str]:
+    """Collect the Wikidata IDs a topic's properties point to.
+
+    Args:
+        topic: Topic dictionary with a "properties" mapping
+
+    Returns:
+        Set of referenced Wikidata entity IDs
+    """
+    references: Set[str] = set()
+
+    # Look through all properties for Wikidata IDs
+    for prop_name, prop_values in topic["properties"].items():
+        if isinstance(prop_values, str):
+            # If the property was stored as a string (legacy format), try to parse it
+            try:
+                prop_values = json.loads(prop_values)
+            except json.JSONDecodeError:
+                logger.warning(
+                    f"Could not parse property {prop_name} for topic {topic['id']}"
+                )
+                continue
+
+        # Handle both list and non-list property formats
+        if isinstance(prop_values, list):
+            for value in prop_values:
+                # Handle both dictionary values and string values
+                if (
+                    isinstance(value, dict)
+                    and "id" in value
+                    and value["id"].startswith("Q")
+                ):
+                    references.add(value["id"])
+                elif isinstance(value, str) and value.startswith("Q"):
+                    references.add(value)
+        elif (
+            isinstance(prop_values, dict)
+            and "id" in prop_values
+            and prop_values["id"].startswith("Q")
+        ):
+            references.add(prop_values["id"])
+
+    return references
+
+
+def _prepare_topic(topic: Dict[str, Any]) -> None:
+    """Add "references" and "content_for_embedding" to a topic in place."""
+    # Add references to topic
+    topic["references"] = list(_extract_references(topic))
+
+    # Clean up content for embedding generation, unless the enrichment step
+    # already did (see src/data_collection/text_processing.py)
+    if "content" in topic and "content_for_embedding" not in topic:
+        topic["content_for_embedding"] = normalize_for_embedding(topic["content"])
+
+
+def _build_edge_indexes(
+    topics: List[Dict[str, Any]],
+) -> Tuple[Dict[str, List[int]], Dict[str, List[int]]]:
+    """Build inverted indexes from topic type and category to topic positions.
+
+    Args:
+        topics: List of topic dictionaries
+
+    Returns:
+        Tuple of (topic_type -> positions, category -> positions); positions
+        in each bucket are in ascending order
+    """
+    type_index: Dict[str, List[int]] = defaultdict(list)
+    category_index: Dict[str, List[int]] = defaultdict(list)
+
+    for position, topic in enumerate(topics):
+        if topic.get("topic_type"):
+            type_index[topic["topic_type"]].append(position)
+        if "categories" in topic:
+            for category in set(topic["categories"]):
+                category_index[category].append(position)
+
+    return type_index, category_index
+
+
+@timed("stage.kg_data")
+def create_knowledge_graph_data(
+    topics: List[Dict[str, Any]],
+    max_category_size: Optional[int] = None,
+    max_type_size: Optional[int] = None,
+    embeddings: Optional[Dict[str, Any]] = None,
+    semantic_k: Optional[int] = None,
+    semantic_threshold: Optional[float] = None,
+    semantic_approximate: bool = False,
+) -> Dict[str, Any]:
     """Structure the data for knowledge graph creation.
 
     Args:
         topics: List of topic dictionaries with properties and content
+        max_category_size: Skip categories shared by more topics than this when
+            creating "shared_category" edges (None keeps every category)
+        max_type_size: Skip topic types shared by more topics than this when
+            creating "same_type" edges (None keeps every type)
+        embeddings: Topic ID -> embedding vector; when given, topics are also
+            linked by "semantic_similarity" edges
+        semantic_k: Maximum similar topics linked per topic (defaults to KG_SEMANTIC_K)
+        semantic_threshold: Minimum cosine similarity (defaults to KG_SEMANTIC_THRESHOLD)
+        semantic_approximate: Use approximate (clustered) neighbour search
 
     Returns:
         Dictionary containing topics and edges for knowledge graph creation
@@ -22,49 +124,7 @@ def create_knowledge_graph_data(topics: List[Dict[str, Any]]) -> Dict[str, Any]:
 
     # Process topics to add reference links and prepare for embedding
     for topic in topics:
-        # Extract all related topics from properties
-        references: Set[str] = set()
-
-        # Look through all properties for Wikidata IDs
-        for prop_name, prop_values in topic["properties"].items():
-            if isinstance(prop_values, str):
-                # If the property was stored as a string (legacy format), try to parse it
-                try:
-                    prop_values = json.loads(prop_values)
-                except json.JSONDecodeError:
-                    logger.warning(
-                        f"Could not parse property {prop_name} for topic {topic['id']}"
-                    )
-                    continue
-
-            # Handle both list and non-list property formats
-            if isinstance(prop_values, list):
-                for value in prop_values:
-                    # Handle both dictionary values and string values
-                    if (
-                        isinstance(value, dict)
-                        and "id" in value
-                        and value["id"].startswith("Q")
-                    ):
-                        references.add(value["id"])
-                    elif isinstance(value, str) and value.startswith("Q"):
-                        references.add(value)
-            elif (
-                isinstance(prop_values, dict)
-                and "id" in prop_values
-                and prop_values["id"].startswith("Q")
-            ):
-                references.add(prop_values["id"])
-
-        # Add references to topic
-        topic["references"] = list(references)
-
-        # Clean up content for embedding generation
-        if "content" in topic:
-            # Remove citations and normalize whitespace
-            cleaned_content = re.sub(r"\[\d+]", "", topic["content"])
-            cleaned_content = re.sub(r"\s+", " ", cleaned_content)
-            topic["content_for_embedding"] = cleaned_content.strip()
+        _prepare_topic(topic)
 
     # Create edges data structure
     edges: List[Dict[str, Any]] = []
@@ -92,45 +152,63 @@ def create_knowledge_graph_data(topics: List[Dict[str, Any]]) -> Dict[str, Any]:
                     edge_tracker.add(edge_key)
 
     # Second pass: Add edges based on shared properties
-    # This helps connect more topics, especially when direct references are sparse
+    # This helps connect more topics, especially when direct references are sparse.
+    # Candidates come straight from the type and category buckets instead of
+    # comparing every pair of topics.
+    type_index, category_index = _build_edge_indexes(topics)
+
     for i, topic1 in enumerate(topics):
-        for topic2 in topics[i + 1 :]:
+        same_type = set()
+        topic_type = topic1.get("topic_type")
+        if topic_type:
+            bucket = type_index[topic_type]
+            if max_type_size is None or len(bucket) <= max_type_size:
+                same_type.update(bucket[bisect_right(bucket, i) :])
+
+        shared_category = set()
+        if "categories" in topic1:
+            for category in set(topic1["categories"]):
+                bucket = category_index[category]
+                if max_category_size is not None and len(bucket) > max_category_size:
+                    continue
+                shared_category.update(bucket[bisect_right(bucket, i) :])
+
+        # Same-type wins over shared categories, as in a pairwise comparison
+        for j in sorted(same_type | shared_category):
+            topic2 = topics[j]
+
             # Skip if already connected
             edge_key = tuple(sorted([topic1["id"], topic2["id"]]))
             if edge_key in edge_tracker:
                 continue
 
-            # Check if they share the same type
-            if topic1.get("topic_type") == topic2.get("topic_type") and topic1.get(
-                "topic_type"
-            ):
-                edges.append(
-                    {
-                        "source": topic1["id"],
-                        "target": topic2["id"],
-                        "weight": 0.5,
-                        "type": "same_type",
-                    }
-                )
+            edges.append(
+                {
+                    "source": topic1["id"],
+                    "target": topic2["id"],
+                    "weight": 0.5 if j in same_type else 0.3,
+                    "type": "same_type" if j in same_type else "shared_category",
+                }
+            )
+            edge_tracker.add(edge_key)
+
+    # Third pass: link topics whose embeddings are close, unless already connected
+    if embeddings:
+        from .semantic_edges import semantic_similarity_edges
+
+        embedded_ids = [t["id"] for t in topics if t["id"] in embeddings]
+        options = {"approximate": semantic_approximate}
+        if semantic_k is not None:
+            options["k"] = semantic_k
+        if semantic_threshold is not None:
+            options["threshold"] = semantic_threshold
+        for edge in semantic_similarity_edges(
+            embedded_ids, [embeddings[i] for i in embedded_ids], **options
+        ):
+            edge_key = tuple(sorted([edge["source"], edge["target"]]))
+            if edge_key not in edge_tracker:
+                edges.append(edge)
                 edge_tracker.add(edge_key)
-                continue
-
-            # Check for other commonalities that could justify a connection
-            # For example, check if they share categories from Wikipedia
-            if "categories" in topic1 and "categories" in topic2:
-                shared_categories = set(topic1["categories"]) & set(
-                    topic2["categories"]
-                )
-                if shared_categories:
-                    edges.append(
-                        {
-                            "source": topic1["id"],
-                            "target": topic2["id"],
-                            "weight": 0.3,
-                            "type": "shared_category",
-                        }
-                    )
-                    edge_tracker.add(edge_key)
 
     logger.info(
         f"Created knowledge graph with {len(topics)} nodes and {len(edges)} edges"
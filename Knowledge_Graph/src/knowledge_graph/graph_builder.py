@@ -1,4 +1,8 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from src.config import MONGO_READ_BATCH_SIZE
+from src.metrics import timed
+from .graph_store import CompactGraph, topic_node_properties
 
 # Define which keys in the nested "properties" should generate relationships.
 RELATIONSHIP_PROPERTIES = {
@@ -9,7 +13,10 @@ RELATIONSHIP_PROPERTIES = {
     "official website": "official_website",
 }
 
+
 class Node:
+    __slots__ = ("id", "type", "properties")
+
     def __init__(self, id: str, type: str, properties: Dict[str, Any] = None):
         self.id = id
         self.type = type
@@ -18,8 +25,13 @@ class Node:
     def to_dict(self):
         return {"id": self.id, "type": self.type, "properties": self.properties}
 
+
 class Relationship:
-    def __init__(self, source: Node, target: Node, type: str, properties: Dict[str, Any] = None):
+    __slots__ = ("source", "target", "type", "properties")
+
+    def __init__(
+        self, source: Node, target: Node, type: str, properties: Dict[str, Any] = None
+    ):
         self.source = source
         self.target = target
         self.type = type
@@ -30,39 +42,177 @@ class Relationship:
             "source": self.source.id,
             "target": self.target.id,
             "type": self.type,
-            "properties": self.properties
+            "properties": self.properties,
         }
 
+
 class GraphDocument:
-    def __init__(self, nodes: List[Node], relationships: List[Relationship]):
-        self.nodes = nodes
-        self.relationships = relationships
+    """Graph of nodes and relationships, optionally backed by a CompactGraph.
+
+    When built from a store, ``nodes`` and ``relationships`` are materialized
+    only on first access and ``to_dict()`` exports straight from the store.
+    """
+
+    def __init__(
+        self,
+        nodes: Optional[List[Node]] = None,
+        relationships: Optional[List[Relationship]] = None,
+        store: Optional[CompactGraph] = None,
+    ):
+        self._nodes = nodes
+        self._relationships = relationships
+        self.store = store
+
+    @property
+    def nodes(self) -> List[Node]:
+        if self._nodes is None:
+            self._materialize()
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: List[Node]):
+        self._nodes = nodes
+
+    @property
+    def relationships(self) -> List[Relationship]:
+        if self._relationships is None:
+            self._materialize()
+        return self._relationships
+
+    @relationships.setter
+    def relationships(self, relationships: List[Relationship]):
+        self._relationships = relationships
+
+    def _materialize(self):
+        if self.store is None:
+            self._nodes = self._nodes or []
+            self._relationships = self._relationships or []
+            return
+        nodes = [
+            Node(id=v.id, type=v.type, properties=v.properties)
+            for v in self.store.nodes()
+        ]
+        by_id = {n.id: n for n in nodes}
+        self._nodes = nodes
+        self._relationships = [
+            Relationship(source=by_id[s], target=by_id[t], type=rel_type)
+            for s, t, rel_type in self.store.edges()
+        ]
 
     def to_dict(self):
+        if self.store is not None and self._nodes is None:
+            return {
+                "nodes": [n.to_dict() for n in self.store.nodes()],
+                "relationships": [
+                    {"source": s, "target": t, "type": rel_type, "properties": {}}
+                    for s, t, rel_type in self.store.edges()
+                ],
+            }
         return {
             "nodes": [n.to_dict() for n in self.nodes],
-            "relationships": [r.to_dict() for r in self.relationships]
+            "relationships": [r.to_dict() for r in self.relationships],
         }
 
-def build_knowledge_graph(topics: List[Dict[str, Any]]) -> GraphDocument:
+
+def _create_topic_node(topic: Dict[str, Any]) -> Node:
+    # Use topic title as node id (strip extra spaces)
+    node_id = topic.get("title", "Unknown").strip()
+    node_type = topic.get("topic_type", "entity")
+
+    # Copy all keys from the topic except "title", "topic_type", and "properties" (which we handle separately),
+    # with the original nested "properties" kept under "relationship_properties".
+    return Node(id=node_id, type=node_type, properties=topic_node_properties(topic))
+
+
+def _add_relationships(
+    source_node: Node,
+    prop_dict: Dict[str, Any],
+    nodes_map: Dict[str, Node],
+    relationships: List[Relationship],
+) -> None:
+    for prop_key, values in prop_dict.items():
+        if prop_key not in RELATIONSHIP_PROPERTIES:
+            continue
+
+        rel_type = RELATIONSHIP_PROPERTIES[prop_key]
+        for val in values:
+            target_label = val.get("label", "").strip()
+            if not target_label:
+                continue
+
+            # If the target node already exists (from topics), use it; otherwise create an external node.
+            if target_label in nodes_map:
+                target_node = nodes_map[target_label]
+            else:
+                # Create a new node with type "entity" and with the value object as its property.
+                target_node = Node(id=target_label, type="entity", properties=val)
+                nodes_map[target_label] = target_node
+
+            rel = Relationship(source=source_node, target=target_node, type=rel_type)
+            relationships.append(rel)
+
+
+def _add_compact_relationships(
+    graph: CompactGraph, source: int, prop_dict: Dict[str, Any]
+) -> None:
+    for prop_key, values in prop_dict.items():
+        if prop_key not in RELATIONSHIP_PROPERTIES:
+            continue
+
+        rel_type = RELATIONSHIP_PROPERTIES[prop_key]
+        for val in values:
+            target_label = val.get("label", "").strip()
+            if not target_label:
+                continue
+
+            # Reuse the topic node if there is one; otherwise add an external node.
+            target = graph.node_index(target_label)
+            if target is None:
+                target = graph.add_node(target_label, "entity", val)
+            graph.add_edge(source, target, rel_type)
+
+
+def build_compact_graph(topics: List[Dict[str, Any]]) -> CompactGraph:
+    """Build the knowledge graph into a CompactGraph without copying topics.
+
+    Produces the same nodes and relationships as ``build_knowledge_graph``;
+    topic dicts are referenced, not copied.
+
+    Args:
+        topics: List of enriched topic dictionaries
+
+    Returns:
+        The compact graph store
+    """
+    graph = CompactGraph()
+
+    # First, create nodes for each topic.
+    for topic in topics:
+        node_id = topic.get("title", "Unknown").strip()
+        graph.add_node(node_id, topic.get("topic_type", "entity"), topic, is_topic=True)
+
+    # Now, create relationships from the nested "properties" field.
+    for topic in topics:
+        source = graph.node_index(topic.get("title", "Unknown").strip())
+        _add_compact_relationships(graph, source, topic.get("properties", {}))
+
+    return graph
+
+
+@timed("stage.build_graph")
+def build_knowledge_graph(
+    topics: List[Dict[str, Any]], compact: bool = False
+) -> GraphDocument:
+    if compact:
+        return GraphDocument(store=build_compact_graph(topics))
+
     nodes_map = {}  # key: node id, value: Node instance
     relationships = []
 
     # First, create nodes for each topic.
     for topic in topics:
-        # Use topic title as node id (strip extra spaces)
-        node_id = topic.get("title", "Unknown").strip()
-        node_type = topic.get("topic_type", "entity")
-        
-        # Copy all keys from the topic except "title", "topic_type", and "properties" (which we handle separately)
-        node_details = {k: v for k, v in topic.items() if k not in ["title", "topic_type", "properties", "references"]}
-        # Also merge the original nested "properties" (which holds relationship data) into node_details.
-        if "properties" in topic:
-            # If you want to keep them separate, you might nest them under a key like "relationship_properties".
-            node_details["relationship_properties"] = topic["properties"]
-        
-        node = Node(id=node_id, type=node_type, properties=node_details)
-        nodes_map[node_id] = node
+        node = _create_topic_node(topic)
+        nodes_map[node.id] = node
 
     # Now, create relationships from the nested "properties" field.
     for topic in topics:
@@ -72,27 +222,88 @@ def build_knowledge_graph(topics: List[Dict[str, Any]]) -> GraphDocument:
             continue
 
         # Use the original "properties" key from the topic (if present) for relationship generation.
-        prop_dict = topic.get("properties", {})
-        for prop_key, values in prop_dict.items():
-            if prop_key not in RELATIONSHIP_PROPERTIES:
-                continue
+        _add_relationships(
+            source_node, topic.get("properties", {}), nodes_map, relationships
+        )
 
-            rel_type = RELATIONSHIP_PROPERTIES[prop_key]
-            for val in values:
-                target_label = val.get("label", "").strip()
-                if not target_label:
-                    continue
+    all_nodes = list(nodes_map.values())
+    return GraphDocument(nodes=all_nodes, relationships=relationships)
 
-                # If the target node already exists (from topics), use it; otherwise create an external node.
-                if target_label in nodes_map:
-                    target_node = nodes_map[target_label]
-                else:
-                    # Create a new node with type "entity" and with the value object as its property.
-                    target_node = Node(id=target_label, type="entity", properties=val)
-                    nodes_map[target_label] = target_node
 
-                rel = Relationship(source=source_node, target=target_node, type=rel_type)
-                relationships.append(rel)
+def merge_domain_topics(
+    topics_by_domain: Dict[str, List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Unify the topics of several domains into one list, one topic per Wikidata ID.
 
-    all_nodes = list(nodes_map.values())
-    return GraphDocument(nodes=all_nodes, relationships=relationships)
+    A topic found in several domains keeps the fields of the first domain it
+    appears in and lists every domain under "domains". Input topics are not
+    modified.
+
+    Args:
+        topics_by_domain: Enriched topics per domain, in domain order
+
+    Returns:
+        The merged topics, in order of first appearance
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for domain, topics in topics_by_domain.items():
+        for topic in topics:
+            existing = merged.get(topic["id"])
+            if existing is None:
+                merged[topic["id"]] = {**topic, "domains": [domain]}
+            elif domain not in existing["domains"]:
+                existing["domains"].append(domain)
+    return list(merged.values())
+
+
+# Topic fields the graph never uses; skipped when streaming from MongoDB
+GRAPH_PROJECTION = {"content": 0, "content_for_embedding": 0}
+
+
+async def build_knowledge_graph_from_mongo(
+    domain: str,
+    batch_size: int = MONGO_READ_BATCH_SIZE,
+    limit: Optional[int] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> GraphDocument:
+    """Build the knowledge graph by streaming topics out of MongoDB.
+
+    Article content is projected away and each document is shaped into its
+    node properties as it arrives, so only one page of raw documents is held
+    at a time and memory grows with the graph, not with the corpus text.
+
+    Args:
+        domain: The domain of topics to read
+        batch_size: Number of topics read per page
+        limit: Maximum number of topics to include
+        projection: MongoDB projection (defaults to ``GRAPH_PROJECTION``)
+
+    Returns:
+        The knowledge graph document
+    """
+    from src.database.mongo import iter_topics_from_mongo
+
+    graph = CompactGraph()
+    topic_nodes = []  # (node index, raw properties) in topic order
+
+    async for page in iter_topics_from_mongo(
+        domain,
+        batch_size=batch_size,
+        projection=GRAPH_PROJECTION if projection is None else projection,
+        limit=limit,
+    ):
+        for topic in page:
+            # The MongoDB ObjectId only drives pagination and is not a node property
+            topic.pop("_id", None)
+            node_id = topic.get("title", "Unknown").strip()
+            # Keep only the node properties so the raw document can be released
+            index = graph.add_node(
+                node_id, topic.get("topic_type", "entity"), topic_node_properties(topic)
+            )
+            topic_nodes.append((index, topic.get("properties", {})))
+
+    # Relationships are resolved once every topic node is known
+    for source, prop_dict in topic_nodes:
+        _add_compact_relationships(graph, source, prop_dict)
+
+    return GraphDocument(store=graph)
@@ -0,0 +1,198 @@
+"""Compact integer-indexed graph store backing GraphDocument.
+
+Node IDs are interned to consecutive integers, node and relationship types are
+stored as small integer codes, and edges live in flat typed arrays that are
+turned into a CSR adjacency on demand. Topic payloads are kept by reference and
+only shaped into node properties when the graph is exported.
+"""
+
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Topic keys that never end up in node properties
+EXCLUDED_TOPIC_KEYS = frozenset(["title", "topic_type", "properties", "references"])
+
+
+def topic_node_properties(topic: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a topic dict into the properties of its graph node.
+
+    Args:
+        topic: The topic dictionary
+
+    Returns:
+        Node properties with the raw Wikidata properties nested under
+        "relationship_properties"
+    """
+    node_details = {k: v for k, v in topic.items() if k not in EXCLUDED_TOPIC_KEYS}
+    if "properties" in topic:
+        node_details["relationship_properties"] = topic["properties"]
+    return node_details
+
+
+class NodeView:
+    """Lightweight read-only view of one node in a CompactGraph."""
+
+    __slots__ = ("_graph", "index")
+
+    def __init__(self, graph: "CompactGraph", index: int):
+        self._graph = graph
+        self.index = index
+
+    @property
+    def id(self) -> str:
+        return self._graph._ids[self.index]
+
+    @property
+    def type(self) -> str:
+        return self._graph._type_names[self._graph._node_types[self.index]]
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        payload = self._graph._payloads[self.index]
+        if payload is None:
+            return {}
+        if self._graph._is_topic[self.index]:
+            return topic_node_properties(payload)
+        return payload
+
+    def neighbors(self) -> List[Tuple["NodeView", str]]:
+        """Return (target node, relationship type) pairs for outgoing edges."""
+        return self._graph.neighbors(self.index)
+
+    def to_dict(self):
+        return {"id": self.id, "type": self.type, "properties": self.properties}
+
+
+class CompactGraph:
+    """Directed multigraph with interned node IDs and array-backed edges."""
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._is_topic = bytearray()
+        self._node_types = array("H")
+        self._type_names: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+
+        self._sources = array("i")
+        self._targets = array("i")
+        self._rel_types = array("B")
+        self._rel_names: List[str] = []
+        self._rel_codes: Dict[str, int] = {}
+
+        self._csr = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._sources)
+
+    @staticmethod
+    def _code(name: str, names: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = len(names)
+            names.append(name)
+            codes[name] = code
+        return code
+
+    def node_index(self, node_id: str) -> Optional[int]:
+        """Return the integer index of a node ID, or None if it is unknown."""
+        return self._index.get(node_id)
+
+    def add_node(
+        self,
+        node_id: str,
+        node_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        is_topic: bool = False,
+    ) -> int:
+        """Add a node, or replace the type and payload of an existing one.
+
+        Args:
+            node_id: External node ID
+            node_type: Node type name
+            payload: Topic dict (for topic nodes) or property dict, kept by reference
+            is_topic: Whether ``payload`` is a full topic to shape on export
+
+        Returns:
+            Integer index of the node
+        """
+        type_code = self._code(node_type, self._type_names, self._type_codes)
+        index = self._index.get(node_id)
+        if index is not None:
+            self._node_types[index] = type_code
+            self._payloads[index] = payload
+            self._is_topic[index] = is_topic
+            return index
+
+        index = len(self._ids)
+        self._ids.append(node_id)
+        self._index[node_id] = index
+        self._node_types.append(type_code)
+        self._payloads.append(payload)
+        self._is_topic.append(is_topic)
+        return index
+
+    def add_edge(self, source: int, target: int, rel_type: str) -> None:
+        """Add a directed edge between two node indexes."""
+        self._sources.append(source)
+        self._targets.append(target)
+        self._rel_types.append(self._code(rel_type, self._rel_names, self._rel_codes))
+        self._csr = None
+
+    def csr(self):
+        """Return the CSR adjacency as (indptr, indices, rel_types, edge_ids).
+
+        ``indices[indptr[i]:indptr[i + 1]]`` are the targets of node ``i``;
+        ``edge_ids`` maps each CSR slot back to its insertion-order edge.
+        """
+        if self._csr is None:
+            import numpy as np
+
+            sources = np.frombuffer(self._sources, dtype=np.int32)
+            order = np.argsort(sources, kind="stable").astype(np.int32)
+            counts = np.bincount(sources, minlength=self.num_nodes)
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+            indices = np.frombuffer(self._targets, dtype=np.int32)[order]
+            rel_types = np.frombuffer(self._rel_types, dtype=np.uint8)[order]
+            self._csr = (indptr, indices, rel_types, order)
+        return self._csr
+
+    def node(self, index: int) -> NodeView:
+        return NodeView(self, index)
+
+    def nodes(self) -> Iterator[NodeView]:
+        for index in range(self.num_nodes):
+            yield NodeView(self, index)
+
+    def neighbors(self, index: int) -> List[Tuple[NodeView, str]]:
+        """Return (target node, relationship type) pairs for a node's edges."""
+        indptr, indices, rel_types, _ = self.csr()
+        start, end = indptr[index], indptr[index + 1]
+        return [
+            (NodeView(self, int(target)), self._rel_names[int(code)])
+            for target, code in zip(indices[start:end], rel_types[start:end])
+        ]
+
+    def edges(self) -> Iterator[Tuple[str, str, str]]:
+        """Yield (source ID, target ID, relationship type) in insertion order."""
+        ids = self._ids
+        names = self._rel_names
+        for source, target, code in zip(self._sources, self._targets, self._rel_types):
+            yield ids[source], ids[target], names[code]
+
+    def nbytes(self) -> int:
+        """Approximate size of the array-backed edge and type storage."""
+        return (
+            self._sources.itemsize * len(self._sources)
+            + self._targets.itemsize * len(self._targets)
+            + self._rel_types.itemsize * len(self._rel_types)
+            + self._node_types.itemsize * len(self._node_types)
+            + len(self._is_topic)
+        )
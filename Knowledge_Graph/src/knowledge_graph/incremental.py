@@ -0,0 +1,513 @@
+"""Incremental knowledge-graph updates from topic deltas.
+
+``GraphState`` keeps the topics and edges produced by
+``create_knowledge_graph_data`` together with the reference, type and
+category indexes behind them. ``apply_delta`` re-evaluates only the pairs that
+involve added, changed or removed topics (plus the members of a category whose
+or type whose size crossed its cap), so the work follows the size of the
+change rather than the corpus.
+
+Each pair of topics has at most one edge, chosen with the same precedence as a
+full build: reference, then same_type, then shared_category. Edge direction
+follows the full build too (referencing topic first, otherwise the topic that
+was added first); only the order of the edge list differs. semantic_similarity
+edges are carried over as they are and dropped with their topics.
+
+``save`` writes a full snapshot every ``KG_STATE_SNAPSHOT_EVERY`` versions and
+only the topics and edges changed since the previous version in between;
+``load`` replays the deltas on top of the last snapshot.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src.logger import get_logger
+from src.config import KG_STATE_SNAPSHOT_EVERY
+from .generate_kg import _prepare_topic
+from .semantic_edges import SEMANTIC_EDGE_TYPE
+
+logger = get_logger(__name__)
+
+# Topic fields derived by the graph build that do not count as changes
+DERIVED_TOPIC_KEYS = frozenset(["_id", "references", "content_for_embedding"])
+
+PairKey = Tuple[str, str]
+
+
+def topic_fingerprint(topic: Dict[str, Any]) -> str:
+    """Hash of a topic's source fields, used to detect changed topics."""
+    payload = {k: v for k, v in topic.items() if k not in DERIVED_TOPIC_KEYS}
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def _pair_key(a: str, b: str) -> PairKey:
+    return (a, b) if a <= b else (b, a)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"), default=str)
+    os.replace(tmp, path)
+
+
+class GraphState:
+    """Persisted graph snapshot that can be updated with topic deltas.
+
+    Args:
+        max_category_size: Categories shared by more topics than this produce
+            no "shared_category" edges (None keeps every category)
+        max_type_size: Topic types shared by more topics than this produce no
+            "same_type" edges (None keeps every type)
+    """
+
+    def __init__(
+        self,
+        max_category_size: Optional[int] = None,
+        max_type_size: Optional[int] = None,
+    ):
+        self.version = 0
+        self.max_category_size = max_category_size
+        self.max_type_size = max_type_size
+        self.topics: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[PairKey, Dict[str, Any]] = {}
+        self._positions: Dict[str, int] = {}
+        self._next_position = 0
+        self._fingerprints: Dict[str, str] = {}
+        # Index keys each topic was filed under: (references, topic_type, categories)
+        self._indexed: Dict[str, Tuple[List[str], Optional[str], List[str]]] = {}
+        self._referrers: Dict[str, Set[str]] = defaultdict(set)
+        self._type_index: Dict[str, Set[str]] = defaultdict(set)
+        self._category_index: Dict[str, Set[str]] = defaultdict(set)
+        self._adjacency: Dict[str, Set[str]] = defaultdict(set)
+        # Version of the last full snapshot and what changed since the last save
+        self._snapshot_version: Optional[int] = None
+        self._dirty_topics: Set[str] = set()
+        self._dirty_edges: Set[PairKey] = set()
+
+    @classmethod
+    def from_topics(
+        cls,
+        topics: List[Dict[str, Any]],
+        max_category_size: Optional[int] = None,
+        max_type_size: Optional[int] = None,
+    ) -> "GraphState":
+        """Build a state from scratch, equivalent to a full graph build."""
+        state = cls(max_category_size, max_type_size)
+        state.apply_delta(added=topics)
+        return state
+
+    @classmethod
+    def from_graph_data(
+        cls,
+        data: Dict[str, Any],
+        max_category_size: Optional[int] = None,
+        max_type_size: Optional[int] = None,
+    ) -> "GraphState":
+        """Adopt the output of ``create_knowledge_graph_data`` without rebuilding edges."""
+        state = cls(max_category_size, max_type_size)
+        for topic in data["topics"]:
+            state._add_topic(topic)
+        for edge in data["edges"]:
+            state._store_edge(edge)
+        return state
+
+    # -- indexes -----------------------------------------------------------
+
+    def _add_topic(self, topic: Dict[str, Any]) -> None:
+        topic_id = topic["id"]
+        if "references" not in topic:
+            _prepare_topic(topic)
+        if topic_id not in self._positions:
+            self._positions[topic_id] = self._next_position
+            self._next_position += 1
+        self.topics[topic_id] = topic
+        self._fingerprints[topic_id] = topic_fingerprint(topic)
+        self._index(topic)
+        self._dirty_topics.add(topic_id)
+
+    def _index(self, topic: Dict[str, Any]) -> None:
+        topic_id = topic["id"]
+        references = list(topic["references"])
+        topic_type = topic.get("topic_type") or None
+        categories = sorted(set(topic.get("categories", [])))
+        self._indexed[topic_id] = (references, topic_type, categories)
+        for ref_id in references:
+            self._referrers[ref_id].add(topic_id)
+        if topic_type:
+            self._type_index[topic_type].add(topic_id)
+        for category in categories:
+            self._category_index[category].add(topic_id)
+
+    def _remove_topic(self, topic_id: str) -> None:
+        # Use the recorded keys: callers may have mutated the topic dict in place
+        del self.topics[topic_id]
+        self._dirty_topics.add(topic_id)
+        references, topic_type, categories = self._indexed.pop(topic_id)
+        for ref_id in references:
+            self._discard(self._referrers, ref_id, topic_id)
+        if topic_type:
+            self._discard(self._type_index, topic_type, topic_id)
+        for category in categories:
+            self._discard(self._category_index, category, topic_id)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, topic_id: str) -> None:
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(topic_id)
+            if not bucket:
+                del index[key]
+
+    def _type_allowed(self, topic_type: str) -> bool:
+        return (
+            self.max_type_size is None
+            or len(self._type_index.get(topic_type, ())) <= self.max_type_size
+        )
+
+    def _category_allowed(self, category: str) -> bool:
+        return (
+            self.max_category_size is None
+            or len(self._category_index.get(category, ())) <= self.max_category_size
+        )
+
+    # -- edges -------------------------------------------------------------
+
+    def _store_edge(self, edge: Dict[str, Any]) -> None:
+        key = _pair_key(edge["source"], edge["target"])
+        self.edges[key] = edge
+        self._dirty_edges.add(key)
+        self._adjacency[edge["source"]].add(edge["target"])
+        self._adjacency[edge["target"]].add(edge["source"])
+
+    def _drop_edge(self, a: str, b: str) -> None:
+        key = _pair_key(a, b)
+        if self.edges.pop(key, None) is not None:
+            self._dirty_edges.add(key)
+            self._adjacency[a].discard(b)
+            self._adjacency[b].discard(a)
+
+    def _edge_for(self, a: str, b: str) -> Optional[Dict[str, Any]]:
+        """The edge a full build would create between two present topics."""
+        refs_a, type_a, categories_a = self._indexed[a]
+        refs_b, type_b, categories_b = self._indexed[b]
+        a_refs_b = b in refs_a
+        b_refs_a = a in refs_b
+        first, second = (a, b) if self._positions[a] <= self._positions[b] else (b, a)
+
+        if a_refs_b or b_refs_a:
+            if a_refs_b and b_refs_a:
+                source, target = first, second
+            else:
+                source, target = (a, b) if a_refs_b else (b, a)
+            return {
+                "source": source,
+                "target": target,
+                "weight": 1,
+                "type": "reference",
+            }
+        if a == b:
+            return None
+        if type_a and type_a == type_b and self._type_allowed(type_a):
+            return {
+                "source": first,
+                "target": second,
+                "weight": 0.5,
+                "type": "same_type",
+            }
+        shared = set(categories_a) & set(categories_b)
+        if any(self._category_allowed(c) for c in shared):
+            return {
+                "source": first,
+                "target": second,
+                "weight": 0.3,
+                "type": "shared_category",
+            }
+        return None
+
+    def _refresh_pair(self, a: str, b: str) -> None:
+        edge = self._edge_for(a, b)
+        existing = self.edges.get(_pair_key(a, b))
+        if edge is not None:
+            if existing is not None:
+                self._drop_edge(a, b)
+            self._store_edge(edge)
+        elif existing is not None and existing["type"] != SEMANTIC_EDGE_TYPE:
+            self._drop_edge(a, b)
+
+    def _candidates(self, topic_id: str) -> Set[str]:
+        """Topics that may share an edge with ``topic_id`` in the current state."""
+        topic = self.topics[topic_id]
+        candidates = set(self._adjacency.get(topic_id, ()))
+        candidates.update(r for r in topic["references"] if r in self.topics)
+        candidates.update(self._referrers.get(topic_id, ()))
+        if topic.get("topic_type") and self._type_allowed(topic["topic_type"]):
+            candidates.update(self._type_index[topic["topic_type"]])
+        for category in set(topic.get("categories", [])):
+            if self._category_allowed(category):
+                candidates.update(self._category_index[category])
+        return candidates
+
+    # -- deltas ------------------------------------------------------------
+
+    def diff(
+        self, topics: Iterable[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[str]]:
+        """Split a full topic list into (added, changed, removed IDs) against this state."""
+        added, changed, seen = [], [], set()
+        for topic in topics:
+            seen.add(topic["id"])
+            fingerprint = self._fingerprints.get(topic["id"])
+            if fingerprint is None:
+                added.append(topic)
+            elif fingerprint != topic_fingerprint(topic):
+                changed.append(topic)
+        removed = [topic_id for topic_id in self.topics if topic_id not in seen]
+        return added, changed, removed
+
+    def apply_delta(
+        self,
+        added: Iterable[Dict[str, Any]] = (),
+        changed: Iterable[Dict[str, Any]] = (),
+        removed: Iterable[str] = (),
+    ) -> Dict[str, int]:
+        """Update topics, indexes and only the edges the delta can affect.
+
+        Args:
+            added: New topics (an ID that already exists is treated as changed)
+            changed: New versions of existing topics
+            removed: IDs of topics to drop
+
+        Returns:
+            Counts of added, changed and removed topics and edges before/after
+        """
+        started = time.monotonic()
+        edges_before = len(self.edges)
+        upserts = list(added) + list(changed)
+        removed = [topic_id for topic_id in removed if topic_id in self.topics]
+        for topic in upserts:
+            _prepare_topic(topic)
+
+        # Bucket sizes before the delta, to detect buckets crossing their cap
+        touched: Set[str] = set()
+        touched_types: Set[str] = set()
+        for topic_id in removed + [t["id"] for t in upserts if t["id"] in self.topics]:
+            touched.update(self._indexed[topic_id][2])
+            if self._indexed[topic_id][1]:
+                touched_types.add(self._indexed[topic_id][1])
+        for topic in upserts:
+            touched.update(topic.get("categories", []))
+            if topic.get("topic_type"):
+                touched_types.add(topic["topic_type"])
+        allowed_before = {c: self._category_allowed(c) for c in touched}
+        type_allowed_before = {t: self._type_allowed(t) for t in touched_types}
+
+        affected: Set[str] = set()
+        for topic_id in removed:
+            for partner in list(self._adjacency.get(topic_id, ())):
+                self._drop_edge(topic_id, partner)
+            self._adjacency.pop(topic_id, None)
+            self._remove_topic(topic_id)
+            del self._positions[topic_id]
+            del self._fingerprints[topic_id]
+
+        counts = {"added": 0, "changed": 0, "removed": len(removed)}
+        for topic in upserts:
+            if topic["id"] in self.topics:
+                self._remove_topic(topic["id"])
+                counts["changed"] += 1
+            else:
+                counts["added"] += 1
+            self._add_topic(topic)
+            affected.add(topic["id"])
+
+        for category, was_allowed in allowed_before.items():
+            if self._category_allowed(category) != was_allowed:
+                affected.update(self._category_index.get(category, ()))
+        for topic_type, was_allowed in type_allowed_before.items():
+            if self._type_allowed(topic_type) != was_allowed:
+                affected.update(self._type_index.get(topic_type, ()))
+
+        for topic_id in affected:
+            for partner in self._candidates(topic_id):
+                self._refresh_pair(topic_id, partner)
+
+        counts.update(edges_before=edges_before, edges_after=len(self.edges))
+        logger.info(
+            f"Applied graph delta (+{counts['added']} ~{counts['changed']} "
+            f"-{counts['removed']} topics) touching {len(affected)} topics: "
+            f"{edges_before} -> {len(self.edges)} edges in {time.monotonic() - started:.2f}s"
+        )
+        return counts
+
+    # -- output and persistence --------------------------------------------
+
+    def to_graph_data(self) -> Dict[str, Any]:
+        """Return the graph in the ``create_knowledge_graph_data`` format."""
+        topics = sorted(self.topics.values(), key=lambda t: self._positions[t["id"]])
+        return {"topics": topics, "edges": list(self.edges.values())}
+
+    def save(
+        self,
+        directory: Union[str, Path],
+        metadata: Optional[Dict[str, Any]] = None,
+        snapshot_every: int = KG_STATE_SNAPSHOT_EVERY,
+    ) -> Path:
+        """Write the next graph version; ``LATEST`` points at the newest one.
+
+        A full snapshot is ``graph_v{N}.json`` (topics, edges, metadata) plus
+        ``state_v{N}.json`` (positions, fingerprints, indexes). It is written
+        for the first version and once ``snapshot_every`` versions have passed
+        since the last one; other versions are ``delta_v{N}.json`` with only
+        the topics and edges that changed since the previous version.
+
+        Returns:
+            Path of the written graph or delta file
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.version += 1
+        meta = {
+            **(metadata or {}),
+            "version": self.version,
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "topic_count": len(self.topics),
+            "edge_count": len(self.edges),
+        }
+
+        if (
+            self._snapshot_version is None
+            or self.version - self._snapshot_version >= max(1, snapshot_every)
+        ):
+            path = self._save_snapshot(directory, meta)
+            self._snapshot_version = self.version
+        else:
+            path = self._save_delta(directory, meta)
+        self._dirty_topics.clear()
+        self._dirty_edges.clear()
+        (directory / "LATEST").write_text(str(self.version))
+        logger.info(f"Saved graph version {self.version} to {path}")
+        return path
+
+    def _save_snapshot(self, directory: Path, meta: Dict[str, Any]) -> Path:
+        graph = self.to_graph_data()
+        graph["metadata"] = {**meta, "snapshot": True}
+        graph_path = directory / f"graph_v{self.version}.json"
+        _write_json(graph_path, graph)
+        _write_json(
+            directory / f"state_v{self.version}.json",
+            {
+                "version": self.version,
+                "max_category_size": self.max_category_size,
+                "max_type_size": self.max_type_size,
+                "next_position": self._next_position,
+                "positions": self._positions,
+                "fingerprints": self._fingerprints,
+                "referrers": {k: sorted(v) for k, v in self._referrers.items()},
+                "type_index": {k: sorted(v) for k, v in self._type_index.items()},
+                "category_index": {
+                    k: sorted(v) for k, v in self._category_index.items()
+                },
+            },
+        )
+        return graph_path
+
+    def _save_delta(self, directory: Path, meta: Dict[str, Any]) -> Path:
+        upserted = sorted(t for t in self._dirty_topics if t in self.topics)
+        delta = {
+            "metadata": {**meta, "snapshot": False},
+            "next_position": self._next_position,
+            "topics": [self.topics[t] for t in upserted],
+            "positions": {t: self._positions[t] for t in upserted},
+            "fingerprints": {t: self._fingerprints[t] for t in upserted},
+            "removed_topics": sorted(
+                t for t in self._dirty_topics if t not in self.topics
+            ),
+            "edges": [
+                self.edges[k] for k in sorted(self._dirty_edges) if k in self.edges
+            ],
+            "removed_edges": sorted(
+                k for k in self._dirty_edges if k not in self.edges
+            ),
+        }
+        delta_path = directory / f"delta_v{self.version}.json"
+        _write_json(delta_path, delta)
+        return delta_path
+
+    @classmethod
+    def load(
+        cls, directory: Union[str, Path], version: Optional[int] = None
+    ) -> "GraphState":
+        """Load a saved graph version (the latest by default)."""
+        directory = Path(directory)
+        if version is None:
+            version = int((directory / "LATEST").read_text().strip())
+        base = version
+        while not (directory / f"state_v{base}.json").exists():
+            if base <= 1 or not (directory / f"delta_v{base}.json").exists():
+                raise FileNotFoundError(
+                    f"No graph state for version {version} in {directory}"
+                )
+            base -= 1
+
+        with open(directory / f"state_v{base}.json", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        with open(directory / f"graph_v{base}.json", encoding="utf-8") as f:
+            graph = json.load(f)
+
+        state = cls(snapshot["max_category_size"], snapshot.get("max_type_size"))
+        state._next_position = snapshot["next_position"]
+        state._positions = snapshot["positions"]
+        state._fingerprints = snapshot["fingerprints"]
+        for name in ("referrers", "type_index", "category_index"):
+            index = getattr(state, f"_{name}")
+            for key, members in snapshot[name].items():
+                index[key] = set(members)
+        state.topics = {topic["id"]: topic for topic in graph["topics"]}
+        for topic in graph["topics"]:
+            state._indexed[topic["id"]] = (
+                list(topic["references"]),
+                topic.get("topic_type") or None,
+                sorted(set(topic.get("categories", []))),
+            )
+        for edge in graph["edges"]:
+            state._store_edge(edge)
+
+        for delta_version in range(base + 1, version + 1):
+            with open(
+                directory / f"delta_v{delta_version}.json", encoding="utf-8"
+            ) as f:
+                state._replay(json.load(f))
+
+        state.version = version
+        state._snapshot_version = base
+        state._dirty_topics.clear()
+        state._dirty_edges.clear()
+        return state
+
+    def _replay(self, delta: Dict[str, Any]) -> None:
+        """Apply a saved delta without re-evaluating any edges."""
+        for a, b in delta["removed_edges"]:
+            self._drop_edge(a, b)
+        for topic_id in delta["removed_topics"]:
+            if topic_id in self.topics:
+                self._remove_topic(topic_id)
+                self._positions.pop(topic_id, None)
+                self._fingerprints.pop(topic_id, None)
+                self._adjacency.pop(topic_id, None)
+        for topic in delta["topics"]:
+            if topic["id"] in self.topics:
+                self._remove_topic(topic["id"])
+            self.topics[topic["id"]] = topic
+            self._index(topic)
+        self._positions.update(delta["positions"])
+        self._fingerprints.update(delta["fingerprints"])
+        self._next_position = delta["next_position"]
+        for edge in delta["edges"]:
+            self._store_edge(edge)
@@ -2,7 +2,13 @@ import json
 import time
 
 from src.logger import get_logger
-from src.config import DOMAIN_CONFIGS
+from src.config import (
+    DOMAIN_CONFIGS,
+    KG_MAX_CATEGORY_SIZE,
+    KG_MAX_TYPE_SIZE,
+    KG_SEMANTIC_EDGES,
+    KG_SEMANTIC_APPROXIMATE,
+)
 from .generate_kg import create_knowledge_graph_data
 from .visualize_graph import generate_graphml_and_save_as_html
 
@@ -14,8 +20,21 @@ async def get_and_save_kg(domain, enriched_topics: list, save_dir: str) -> dict:
         f"Generating knowledge graph for domain: {DOMAIN_CONFIGS[domain]['name']} (async mode)"
     )
     output_file = save_dir / f"{domain}_knowledge_graph.json"
+    # Topic embeddings from the vector store, for semantic_similarity edges
+    embeddings = None
+    if KG_SEMANTIC_EDGES:
+        from .semantic_edges import load_topic_embeddings
+
+        embeddings = load_topic_embeddings(enriched_topics, f"{domain}_embeddings")
+
     # Create knowledge graph data
-    knowledge_graph_data = create_knowledge_graph_data(enriched_topics)
+    knowledge_graph_data = create_knowledge_graph_data(
+        enriched_topics,
+        max_category_size=KG_MAX_CATEGORY_SIZE,
+        max_type_size=KG_MAX_TYPE_SIZE,
+        embeddings=embeddings,
+        semantic_approximate=KG_SEMANTIC_APPROXIMATE,
+    )
 
     # Add metadata to the output
     knowledge_graph_data["metadata"] = {
@@ -0,0 +1,205 @@
+"""Embedding-similarity edges between topics.
+
+Each topic is linked to its ``k`` most similar topics by cosine similarity,
+keeping only pairs at or above a threshold. Exact search scores row blocks of
+the normalized embedding matrix against all topics with one matrix product per
+block, so memory is bounded by ``KG_SEMANTIC_BLOCK_ELEMENTS`` scores. The
+approximate mode clusters topics with the same k-means IVF used by the local
+vector index and only compares topics in nearby clusters.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.logger import get_logger
+from src.config import (
+    KG_SEMANTIC_K,
+    KG_SEMANTIC_THRESHOLD,
+    KG_SEMANTIC_N_PROBE,
+    KG_SEMANTIC_BLOCK_ELEMENTS,
+)
+from src.database.vector_index import nearest_centroids, train_centroids
+
+logger = get_logger(__name__)
+
+SEMANTIC_EDGE_TYPE = "semantic_similarity"
+
+# (query rows, neighbour indexes, similarity scores) for a block of topics
+NeighborBlock = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def _normalize(embeddings: Any) -> np.ndarray:
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indexes and values of the ``k`` largest scores of every row."""
+    k = min(k, scores.shape[1])
+    index = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return index, np.take_along_axis(scores, index, axis=1)
+
+
+def _exact_neighbors(
+    vectors: np.ndarray, k: int, block_rows: int
+) -> Iterator[NeighborBlock]:
+    n = len(vectors)
+    for start in range(0, n, block_rows):
+        end = min(start + block_rows, n)
+        scores = vectors[start:end] @ vectors.T
+        rows = np.arange(start, end)
+        scores[rows - start, rows] = -np.inf
+        index, values = _top_k(scores, k)
+        yield rows, index, values
+
+
+def _approximate_neighbors(
+    vectors: np.ndarray, k: int, block_rows: int, n_lists: Optional[int], n_probe: int
+) -> Iterator[NeighborBlock]:
+    n = len(vectors)
+    n_lists = min(n_lists or max(1, int(np.sqrt(n))), n)
+    rng = np.random.default_rng(0)
+    sample = vectors[np.sort(rng.choice(n, min(n, 100_000), replace=False))]
+    centroids = train_centroids(sample, n_lists)
+
+    labels = np.concatenate(
+        [
+            nearest_centroids(vectors[s : s + block_rows], centroids, 1)[:, 0]
+            for s in range(0, n, block_rows)
+        ]
+    )
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+    # Topics of one cluster are compared with the topics of its nearest clusters
+    probes = nearest_centroids(centroids, centroids, n_probe)
+
+    for cluster in range(n_lists):
+        members = order[bounds[cluster] : bounds[cluster + 1]]
+        if not len(members):
+            continue
+        candidates = np.concatenate(
+            [order[bounds[c] : bounds[c + 1]] for c in probes[cluster]]
+        )
+        step = max(1, KG_SEMANTIC_BLOCK_ELEMENTS // len(candidates))
+        for start in range(0, len(members), step):
+            rows = members[start : start + step]
+            scores = vectors[rows] @ vectors[candidates].T
+            scores[rows[:, None] == candidates[None, :]] = -np.inf
+            index, values = _top_k(scores, k)
+            yield rows, candidates[index], values
+
+
+def semantic_similarity_edges(
+    topic_ids: Sequence[str],
+    embeddings: Any,
+    k: int = KG_SEMANTIC_K,
+    threshold: float = KG_SEMANTIC_THRESHOLD,
+    approximate: bool = False,
+    n_lists: Optional[int] = None,
+    n_probe: int = KG_SEMANTIC_N_PROBE,
+) -> List[Dict[str, Any]]:
+    """Create "semantic_similarity" edges between the nearest topics.
+
+    Every topic contributes edges to at most ``k`` neighbours; a pair found
+    from both sides becomes one edge, so a topic can end up with more than
+    ``k`` edges when it is a close neighbour of many others.
+
+    Args:
+        topic_ids: Topic IDs, aligned with the rows of ``embeddings``
+        embeddings: (n, dim) embedding matrix or list of vectors
+        k: Maximum neighbours selected per topic
+        threshold: Minimum cosine similarity of an edge
+        approximate: Only compare topics within nearby k-means clusters
+        n_lists: Number of clusters in approximate mode (defaults to ~sqrt(n))
+        n_probe: Clusters compared with each cluster in approximate mode
+
+    Returns:
+        Edge dicts with source, target, weight (the similarity) and type,
+        strongest pairs first
+    """
+    n = len(topic_ids)
+    if n < 2 or k < 1:
+        return []
+    vectors = _normalize(embeddings)
+    if len(vectors) != n:
+        raise ValueError("topic_ids and embeddings must have the same length")
+
+    block_rows = max(1, KG_SEMANTIC_BLOCK_ELEMENTS // n)
+    blocks = (
+        _approximate_neighbors(vectors, k, block_rows, n_lists, n_probe)
+        if approximate
+        else _exact_neighbors(vectors, k, block_rows)
+    )
+
+    # Pairs are keyed as low * n + high so each undirected pair is kept once
+    keys, weights = [], []
+    for rows, index, values in blocks:
+        keep = values >= threshold
+        sources = np.broadcast_to(rows[:, None], index.shape)[keep].astype(np.int64)
+        targets = index[keep].astype(np.int64)
+        keys.append(np.minimum(sources, targets) * n + np.maximum(sources, targets))
+        weights.append(values[keep])
+    if not keys:
+        return []
+    keys = np.concatenate(keys)
+    weights = np.concatenate(weights)
+
+    keys, first = np.unique(keys, return_index=True)
+    weights = weights[first]
+    order = np.argsort(-weights, kind="stable")
+
+    edges = [
+        {
+            "source": topic_ids[int(key // n)],
+            "target": topic_ids[int(key % n)],
+            "weight": round(float(weight), 4),
+            "type": SEMANTIC_EDGE_TYPE,
+        }
+        for key, weight in zip(keys[order], weights[order])
+    ]
+    logger.info(
+        f"Created {len(edges)} {SEMANTIC_EDGE_TYPE} edges for {n} topics "
+        f"(k={k}, threshold={threshold}, {'approximate' if approximate else 'exact'})"
+    )
+    return edges
+
+
+def load_topic_embeddings(
+    topics: List[Dict[str, Any]], collection_name: str, vector_store=None
+) -> Dict[str, np.ndarray]:
+    """Average each topic's chunk vectors from the vector store into one embedding.
+
+    Args:
+        topics: Topics with the ``embedding_ids`` (or ``embedding_id``) set by
+            the embedding pipeline
+        collection_name: Vector store collection holding the chunk vectors
+        vector_store: Store to read from (defaults to ``get_vector_store()``)
+
+    Returns:
+        Mapping of topic ID to its mean chunk embedding; topics without
+        stored vectors are omitted
+    """
+    if vector_store is None:
+        from src.database.vector_index import get_vector_store
+
+        vector_store = get_vector_store()
+
+    chunk_ids = {
+        topic["id"]: topic.get("embedding_ids") or [topic["embedding_id"]]
+        for topic in topics
+        if topic.get("embedding_ids") or topic.get("embedding_id")
+    }
+    if not chunk_ids:
+        return {}
+    vectors = vector_store.get_embeddings(
+        collection_name, [i for ids in chunk_ids.values() for i in ids]
+    )
+
+    embeddings = {}
+    for topic_id, ids in chunk_ids.items():
+        found = [vectors[i] for i in ids if i in vectors]
+        if found:
+            embeddings[topic_id] = _normalize(found).mean(axis=0)
+    return embeddings
@@ -1,25 +1,38 @@
 import networkx as nx
+import numpy as np
+import pyvis
 from pyvis.network import Network
 import random
 import json
+import gzip
+import shutil
 from pathlib import Path
 import os
-from src.config import DOMAIN_COLORS, DOMAIN, TOPIC_TYPE_COLORS
+from src.config import (
+    DOMAIN_COLORS,
+    DOMAIN,
+    TOPIC_TYPE_COLORS,
+    LARGE_GRAPH_NODE_THRESHOLD,
+    LARGE_GRAPH_TOP_K_EDGES,
+    LARGE_GRAPH_MAX_NODES,
+)
 from src.logger import get_logger
+from src.metrics import span
 
 logger = get_logger(__name__)
 
+# Buffer size for the streaming GraphML writer
+GRAPHML_WRITE_BUFFER = 1 << 16
+
+_XML_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&apos;"}
+)
+
 def _escape_xml(text):
     """Escape special characters for XML."""
     if not isinstance(text, str):
         text = str(text)
-    return (
-        text.replace("&", "&amp;")
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-            .replace('"', "&quot;")
-            .replace("'", "&apos;")
-    )
+    return text.translate(_XML_ESCAPE_TABLE)
 
 def _get_color_for_topic_type(topic_type, color_scheme=None):
     """Return a color hex code based on topic type for consistent coloring."""
@@ -30,16 +43,21 @@ def _get_color_for_topic_type(topic_type, color_scheme=None):
         topic_type = topic_type.lower().strip()
     return color_scheme.get(topic_type, color_scheme.get("unknown", "#cccccc"))
 
-def _save_graphml(graphml, filename):
-    """Save GraphML data to a file."""
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(graphml)
-    logger.info(f"GraphML data saved to {filename}")
-
-def _convert_to_graphml(knowledge_graph_data):
-    """Convert knowledge graph data to GraphML format."""
-    logger.info("Converting knowledge graph data to GraphML format.")
+_GRAPHML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+    '  <key id="description" for="node" attr.name="description" attr.type="string"/>\n'
+    '  <key id="topic_type" for="node" attr.name="topic_type" attr.type="string"/>\n'
+    '  <key id="color" for="node" attr.name="color" attr.type="string"/>\n'
+    '  <key id="edge_type" for="edge" attr.name="type" attr.type="string"/>\n'
+    '  <key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n'
+    '  <graph id="G" edgedefault="undirected">\n'
+)
+_GRAPHML_FOOTER = "  </graph>\n</graphml>"
 
+def _write_graphml(knowledge_graph_data, out):
+    """Write knowledge graph data as GraphML to a text stream, node by node."""
     # Use "topics" if available; fallback to "nodes"
     nodes = knowledge_graph_data.get("topics", knowledge_graph_data.get("nodes", []))
     # Use edges if available; otherwise empty list
@@ -49,46 +67,48 @@ def _convert_to_graphml(knowledge_graph_data):
     domain = knowledge_graph_data.get("metadata", {}).get("domain", DOMAIN)
     color_scheme = DOMAIN_COLORS.get(domain, DOMAIN_COLORS[DOMAIN])
 
-    graphml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-    graphml += '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
-    graphml += '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
-    graphml += '  <key id="description" for="node" attr.name="description" attr.type="string"/>\n'
-    graphml += '  <key id="topic_type" for="node" attr.name="topic_type" attr.type="string"/>\n'
-    graphml += '  <key id="color" for="node" attr.name="color" attr.type="string"/>\n'
-    graphml += '  <key id="edge_type" for="edge" attr.name="type" attr.type="string"/>\n'
-    graphml += '  <key id="weight" for="edge" attr.name="weight" attr.type="double"/>\n'
-    graphml += '  <graph id="G" edgedefault="undirected">\n'
+    write = out.write
+    write(_GRAPHML_HEADER)
 
     for node in nodes:
         # Use node's "id" as label
-        label = node.get("id", "unknown")
+        label = _escape_xml(node.get("id", "unknown"))
         description = ""
         if "properties" in node:
             description = node["properties"].get("description", "")
         topic_type = node.get("type", "unknown").lower()
         color = _get_color_for_topic_type(topic_type, color_scheme)
 
-        graphml += f'    <node id="{label}">\n'
-        graphml += f'      <data key="label">{_escape_xml(label)}</data>\n'
+        write(f'    <node id="{label}">\n')
+        write(f'      <data key="label">{label}</data>\n')
         if description:
-            graphml += f'      <data key="description">{_escape_xml(description)}</data>\n'
-        graphml += f'      <data key="topic_type">{_escape_xml(topic_type)}</data>\n'
-        graphml += f'      <data key="color">{color}</data>\n'
-        graphml += "    </node>\n"
+            write(f'      <data key="description">{_escape_xml(description)}</data>\n')
+        write(f'      <data key="topic_type">{_escape_xml(topic_type)}</data>\n')
+        write(f'      <data key="color">{_escape_xml(color)}</data>\n')
+        write("    </node>\n")
 
     for edge in edges:
-        edge_type = edge.get("type", "unknown")
-        weight = edge.get("weight", 1)
-        source = edge.get("source")
-        target = edge.get("target")
-        graphml += f'    <edge source="{source}" target="{target}">\n'
-        graphml += f'      <data key="edge_type">{edge_type}</data>\n'
-        graphml += f'      <data key="weight">{weight}</data>\n'
-        graphml += "    </edge>\n"
+        edge_type = _escape_xml(edge.get("type", "unknown"))
+        weight = _escape_xml(edge.get("weight", 1))
+        source = _escape_xml(edge.get("source"))
+        target = _escape_xml(edge.get("target"))
+        write(f'    <edge source="{source}" target="{target}">\n')
+        write(f'      <data key="edge_type">{edge_type}</data>\n')
+        write(f'      <data key="weight">{weight}</data>\n')
+        write("    </edge>\n")
 
-    graphml += "  </graph>\n"
-    graphml += "</graphml>"
-    return graphml
+    write(_GRAPHML_FOOTER)
+
+def _stream_graphml(knowledge_graph_data, filename, compress=False):
+    """Stream knowledge graph data as GraphML to a (optionally gzipped) file."""
+    logger.info("Streaming knowledge graph data to GraphML.")
+    if compress:
+        f = gzip.open(filename, "wt", encoding="utf-8")
+    else:
+        f = open(filename, "w", encoding="utf-8", buffering=GRAPHML_WRITE_BUFFER)
+    with f:
+        _write_graphml(knowledge_graph_data, f)
+    logger.info(f"GraphML data saved to {filename}")
 
 def _create_networkx_graph(knowledge_graph_data):
     """Create a NetworkX graph from knowledge graph data."""
@@ -183,21 +203,269 @@ def _save_as_html(G, output_path):
     net.write_html(output_path, notebook=False)
     logger.info(f"Interactive visualization saved to {output_path}")
 
-def generate_graphml_and_save_as_html(knowledge_graph_data, save_dir="output"):
-    """Generate and save the knowledge graph as GraphML and HTML files."""
+def _prune_edges_top_k(G, k):
+    """Keep each node's ``k`` heaviest edges; an edge survives if either end keeps it."""
+    keep = set()
+    for node in G.nodes:
+        ranked = sorted(
+            G.edges(node, data="weight", default=1), key=lambda e: e[2], reverse=True
+        )
+        keep.update((u, v) for u, v, _ in ranked[:k])
+
+    pruned = nx.Graph()
+    pruned.add_nodes_from(G.nodes(data=True))
+    pruned.add_edges_from((u, v, G.edges[u, v]) for u, v in keep)
+    return pruned
+
+def _collapse_graph(G, groups):
+    """Collapse node groups into single weighted nodes.
+
+    Args:
+        G: NetworkX graph
+        groups: Lists of member nodes; the first member represents the group
+
+    Returns:
+        Graph with one node per group, a "size" attribute holding the member
+        count and edge weights summed across merged edges
+    """
+    group_of = {}
+    H = nx.Graph()
+    for members in groups:
+        representative = members[0]
+        attrs = dict(G.nodes[representative])
+        label = attrs.get("label", representative)
+        if len(members) > 1:
+            attrs["label"] = f"{label} (+{len(members) - 1})"
+            attrs["title"] = f"{label}<br>{len(members)} topics"
+        attrs["size"] = len(members)
+        H.add_node(representative, **attrs)
+        for member in members:
+            group_of[member] = representative
+
+    for u, v, data in G.edges(data=True):
+        gu, gv = group_of[u], group_of[v]
+        if gu == gv:
+            continue
+        weight = data.get("weight", 1)
+        if H.has_edge(gu, gv):
+            H.edges[gu, gv]["weight"] += weight
+        else:
+            H.add_edge(gu, gv, type=data.get("type", "unknown"), weight=weight)
+    return H
+
+def _aggregate_by_degree(G, max_nodes):
+    """Fold all but the ``max_nodes`` highest-degree nodes into their best kept neighbour."""
+    ranked = sorted(G.nodes, key=G.degree, reverse=True)
+    kept = set(ranked[:max_nodes])
+    groups = {node: [node] for node in ranked[:max_nodes]}
+    orphans = {}
+    for node in ranked[max_nodes:]:
+        neighbours = [n for n in G.neighbors(node) if n in kept]
+        if neighbours:
+            groups[max(neighbours, key=G.degree)].append(node)
+        else:
+            # No kept neighbour: pool with other orphans of the same topic type
+            topic_type = G.nodes[node].get("topic_type", "unknown")
+            orphans.setdefault(topic_type, []).append(node)
+    return _collapse_graph(G, list(groups.values()) + list(orphans.values()))
+
+def _aggregate_by_community(G):
+    """Collapse each Louvain community into one node represented by its hub."""
+    communities = nx.community.louvain_communities(G, weight="weight", seed=42)
+    groups = [sorted(c, key=G.degree, reverse=True) for c in communities]
+    return _collapse_graph(G, groups)
+
+def _compute_layout(G, iterations=50, block_size=1024, seed=42, scale=1000):
+    """Fruchterman-Reingold layout vectorized with NumPy.
+
+    Repulsion is computed in row blocks of ``block_size`` nodes so memory stays
+    at O(block_size * n) instead of O(n^2).
+
+    Returns:
+        Mapping of node to (x, y) scaled to [-scale, scale]
+    """
+    nodes = list(G.nodes)
+    n = len(nodes)
+    if n == 0:
+        return {}
+    if n == 1:
+        return {nodes[0]: (0.0, 0.0)}
+
+    index = {node: i for i, node in enumerate(nodes)}
+    edge_list = list(G.edges(data="weight", default=1))
+    edges = np.array([(index[u], index[v]) for u, v, _ in edge_list], dtype=np.int64)
+    weights = np.array([w for _, _, w in edge_list], dtype=np.float32)
+
+    pos = np.random.default_rng(seed).random((n, 2), dtype=np.float32)
+    k = np.sqrt(1.0 / n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        disp = np.zeros((n, 2), dtype=np.float32)
+        x, y = pos[:, 0], pos[:, 1]
+        for start in range(0, n, block_size):
+            end = start + block_size
+            dx = x[start:end, None] - x[None, :]
+            dy = y[start:end, None] - y[None, :]
+            repulsion = k * k / np.maximum(dx * dx + dy * dy, 1e-9)
+            disp[start:end, 0] += (dx * repulsion).sum(axis=1)
+            disp[start:end, 1] += (dy * repulsion).sum(axis=1)
+
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            dist = np.maximum(np.linalg.norm(delta, axis=1), 1e-9)
+            force = delta * (dist * weights / k)[:, None]
+            np.add.at(disp, edges[:, 0], -force)
+            np.add.at(disp, edges[:, 1], force)
+
+        length = np.maximum(np.linalg.norm(disp, axis=1), 1e-9)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    pos *= scale / max(np.abs(pos).max(), 1e-9)
+    return {node: (pos[i, 0], pos[i, 1]) for i, node in enumerate(nodes)}
+
+_LARGE_GRAPH_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Knowledge Graph</title>
+<link rel="stylesheet" href="lib/vis-9.1.2/vis-network.css">
+<script src="lib/vis-9.1.2/vis-network.min.js"></script>
+<style>html, body, #graph {{ margin: 0; width: 100%; height: 100%; }}</style>
+</head>
+<body>
+<div id="graph"></div>
+<script>
+const data = {data};
+const nodes = data.nodes.map((n, i) => ({{
+  id: i, label: n[0], x: n[1], y: n[2], color: n[3], value: n[4], title: n[5]
+}}));
+const edges = data.edges.map((e) => ({{ from: e[0], to: e[1], value: e[2], title: e[3] }}));
+new vis.Network(
+  document.getElementById("graph"),
+  {{ nodes: new vis.DataSet(nodes), edges: new vis.DataSet(edges) }},
+  {{
+    physics: false,
+    layout: {{ improvedLayout: false }},
+    nodes: {{ shape: "dot", font: {{ size: 14, face: "Tahoma", color: "#333333" }} }},
+    edges: {{ smooth: false, color: {{ inherit: false, opacity: 0.4 }} }},
+    interaction: {{ hover: true, tooltipDelay: 200, hideEdgesOnDrag: true }}
+  }}
+);
+</script>
+</body>
+</html>
+"""
+
+# vis-network build bundled with pyvis, the same one its local HTML output uses
+_VIS_NETWORK_LIB = Path(pyvis.__file__).parent / "templates" / "lib" / "vis-9.1.2"
+
+def _save_as_large_html(G, output_path, aggregate=None, top_k=LARGE_GRAPH_TOP_K_EDGES):
+    """Write a large graph as a thin HTML shell with its data inlined as compact JSON.
+
+    Layout positions are computed offline so the browser renders with physics
+    disabled. The layout is quadratic in the node count, so graphs are
+    aggregated down to ``LARGE_GRAPH_MAX_NODES`` nodes unless ``aggregate``
+    is "none".
+
+    Args:
+        G: NetworkX graph
+        output_path: Path of the HTML file
+        aggregate: None (degree aggregation when needed), "degree",
+            "community" or "none"
+        top_k: Number of heaviest edges kept per node (None keeps all)
+    """
+    if aggregate == "community":
+        G = _aggregate_by_community(G)
+    elif aggregate not in (None, "degree", "none"):
+        raise ValueError(f"Unknown aggregation mode: {aggregate}")
+    if aggregate != "none" and G.number_of_nodes() > LARGE_GRAPH_MAX_NODES:
+        G = _aggregate_by_degree(G, LARGE_GRAPH_MAX_NODES)
+    elif aggregate == "none" and G.number_of_nodes() > LARGE_GRAPH_MAX_NODES:
+        logger.warning(
+            f"Laying out {G.number_of_nodes()} nodes without aggregation; "
+            f"this is quadratic in the node count"
+        )
+    if top_k is not None:
+        G = _prune_edges_top_k(G, top_k)
+    logger.info(
+        f"Laying out {G.number_of_nodes()} nodes and {G.number_of_edges()} edges offline"
+    )
+
+    positions = _compute_layout(G)
+    index = {node: i for i, node in enumerate(G.nodes)}
+    data = {
+        "nodes": [
+            [
+                attrs.get("label", str(node)),
+                round(float(positions[node][0]), 1),
+                round(float(positions[node][1]), 1),
+                attrs.get("color", "#CCCCCC"),
+                attrs.get("size", 1),
+                attrs.get("title", str(node)),
+            ]
+            for node, attrs in G.nodes(data=True)
+        ],
+        "edges": [
+            [index[u], index[v], attrs.get("weight", 1), attrs.get("type", "unknown")]
+            for u, v, attrs in G.edges(data=True)
+        ],
+    }
+
+    # Inlined rather than fetched so the page also opens from file://;
+    # "</" is escaped so labels cannot close the script element
+    inline_data = json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace(
+        "</", "<\\/"
+    )
+    # The page loads vis-network from lib/ next to it, like pyvis's local mode
+    vis_lib = Path(output_path).parent / "lib" / _VIS_NETWORK_LIB.name
+    if not vis_lib.exists():
+        shutil.copytree(_VIS_NETWORK_LIB, vis_lib)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(_LARGE_GRAPH_HTML.format(data=inline_data))
+    logger.info(f"Large-graph visualization saved to {output_path}")
+
+def generate_graphml_and_save_as_html(
+    knowledge_graph_data,
+    save_dir="output",
+    compress_graphml=False,
+    large_graph=None,
+    aggregate=None,
+):
+    """Generate and save the knowledge graph as GraphML and HTML files.
+
+    ``large_graph`` forces the precomputed-layout HTML mode on or off; by
+    default it is used once the graph exceeds ``LARGE_GRAPH_NODE_THRESHOLD``
+    nodes. ``aggregate`` ("degree", "community" or "none") only applies in
+    that mode; by default nodes are aggregated by degree above
+    ``LARGE_GRAPH_MAX_NODES``.
+    """
     logger.info("Generating and saving knowledge graph visualizations.")
     save_dir = Path(save_dir)
     save_dir.mkdir(exist_ok=True, parents=True)
 
     base_name = "knowledge_graph"
-    graphml_file = save_dir / f"{base_name}.graphml"
+    graphml_file = save_dir / (
+        f"{base_name}.graphml.gz" if compress_graphml else f"{base_name}.graphml"
+    )
     html_file = save_dir / f"{base_name}.html"
 
-    graphml = _convert_to_graphml(knowledge_graph_data)
-    _save_graphml(graphml, graphml_file)
+    with span("export.graphml", compressed=compress_graphml) as graphml_span:
+        _stream_graphml(knowledge_graph_data, graphml_file, compress=compress_graphml)
+        graphml_span.add(bytes=graphml_file.stat().st_size)
 
     G = _create_networkx_graph(knowledge_graph_data)
-    _save_as_html(G, str(html_file))
+    if large_graph is None:
+        large_graph = G.number_of_nodes() > LARGE_GRAPH_NODE_THRESHOLD
+    with span("export.html", mode="large" if large_graph else "pyvis") as html_span:
+        html_span.add(items=G.number_of_nodes())
+        if large_graph:
+            _save_as_large_html(G, html_file, aggregate=aggregate)
+        else:
+            _save_as_html(G, str(html_file))
 
     return str(html_file)
 
@@ -216,6 +484,21 @@ if __name__ == "__main__":
         choices=list(DOMAIN_COLORS.keys()),
         help=f"Domain to use for visualization colors (default: {DOMAIN})",
     )
+    parser.add_argument(
+        "--gzip-graphml", action="store_true", help="Write the GraphML file gzip-compressed"
+    )
+    parser.add_argument(
+        "--large-graph",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Force the precomputed-layout HTML mode on or off (default: by node count)",
+    )
+    parser.add_argument(
+        "--aggregate",
+        choices=["degree", "community", "none"],
+        default=None,
+        help="Node aggregation for the large-graph mode (default: by degree when needed)",
+    )
 
     args = parser.parse_args()
 
@@ -238,5 +521,10 @@ if __name__ == "__main__":
             elif "domain" not in data["metadata"]:
                 data["metadata"]["domain"] = args.domain
 
-    html_path = generate_graphml_and_save_as_html(data)
+    html_path = generate_graphml_and_save_as_html(
+        data,
+        compress_graphml=args.gzip_graphml,
+        large_graph=args.large_graph,
+        aggregate=args.aggregate,
+    )
     print(f"Knowledge graph visualization created at {html_path}")
@@ -0,0 +1,38 @@
+"""Lazy package exports (PEP 562).
+
+Package ``__init__`` modules declare which submodule provides each public
+name; the submodule is only imported when the name is first accessed, so
+importing a package does not pull in the heavy dependencies of all of its
+modules::
+
+    __getattr__, __dir__ = lazy_exports(__name__, {"get_vector_store": ".vector_index"})
+    __all__ = [...]
+"""
+
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """Return module ``__getattr__`` and ``__dir__`` functions for ``package``.
+
+    Args:
+        package: ``__name__`` of the package
+        exports: Public name -> relative module providing it (e.g. ".mongo")
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
@@ -3,50 +3,320 @@ import json
 import argparse
 from pathlib import Path
 from datetime import datetime
+from typing import List, Optional, Tuple
 from src.logger import get_logger
-from src.config import DATA_DIR, DEFAULT_DOMAIN
-from src.data_collection import get_and_save_from_wiki
-from src.database.mongo import store_topics_in_mongo
-from src.knowledge_graph import build_knowledge_graph
+from src.config import (
+    DATA_DIR,
+    DEFAULT_DOMAIN,
+    DOMAIN_CONFIGS,
+    KG_MAX_CATEGORY_SIZE,
+    KG_MAX_TYPE_SIZE,
+    METRICS_PROMETHEUS_PORT,
+)
+from src import metrics
+from src.checkpoint import RunCheckpoint
 
 logger = get_logger(__name__)
 
-async def main(domain: str, limit: int, save_graph: bool):
-    # Create an output folder with a timestamp
+
+def update_graph_state(state_dir: Path, topics: list, domain: str) -> Path:
+    """Apply the difference between the fetched topics and the last saved graph version."""
+    from src.knowledge_graph.incremental import GraphState
+
+    if (state_dir / "LATEST").exists():
+        state = GraphState.load(state_dir)
+        added, changed, removed = state.diff(topics)
+        state.apply_delta(added=added, changed=changed, removed=removed)
+    else:
+        state = GraphState.from_topics(
+            topics,
+            max_category_size=KG_MAX_CATEGORY_SIZE,
+            max_type_size=KG_MAX_TYPE_SIZE,
+        )
+    return state.save(state_dir, metadata={"domain": domain})
+
+
+def resolve_domains(
+    domain: str, domains: Optional[str] = None, all_domains: bool = False
+) -> List[str]:
+    """Return the domains selected on the command line, in order and without duplicates."""
+    if all_domains:
+        return list(DOMAIN_CONFIGS)
+    selected = (
+        [d.strip() for d in domains.split(",") if d.strip()] if domains else [domain]
+    )
+    unknown = [d for d in selected if d not in DOMAIN_CONFIGS]
+    if unknown:
+        raise ValueError(
+            f"Unknown domains: {unknown}. Available domains: {list(DOMAIN_CONFIGS)}"
+        )
+    return list(dict.fromkeys(selected))
+
+
+async def main(
+    domains: List[str],
+    limit: int,
+    save_graph: bool,
+    graph_state: str = None,
+    resume: str = None,
+    merge: bool = False,
+):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = Path(DATA_DIR) / timestamp
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
+    if resume:
+        # Continue an interrupted run with its original parameters
+        checkpoint = RunCheckpoint.resume(resume)
+        output_dir = checkpoint.run_dir
+        params = checkpoint.params
+        # The manifest stores the "domains" list; runs started before
+        # multi-domain support stored a single "domain" instead
+        domains = params.get("domains") or [params["domain"]]
+        limit = params["limit"]
+        save_graph = params["save_graph"]
+        graph_state = params["graph_state"]
+        merge = params.get("merge", False)
+        logger.info(f"Resuming run in {output_dir}")
+    else:
+        # Create an output folder with a timestamp
+        output_dir = Path(DATA_DIR) / timestamp
+        output_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = RunCheckpoint(
+            output_dir,
+            params={
+                "domains": domains,
+                "limit": limit,
+                "save_graph": save_graph,
+                "graph_state": graph_state,
+                "merge": merge,
+            },
+        )
+    if METRICS_PROMETHEUS_PORT:
+        metrics.start_prometheus_server(METRICS_PROMETHEUS_PORT)
+
+    try:
+        await _run(
+            domains, limit, save_graph, graph_state, merge, output_dir, checkpoint
+        )
+    finally:
+        checkpoint.close()
+        metrics.write_report(
+            output_dir / "run_report.json",
+            metadata={
+                "domains": domains,
+                "limit": limit,
+                "started": timestamp,
+                "resumed": bool(resume),
+            },
+        )
+        metrics.stop_prometheus_server()
+
+
+async def _run(
+    domains: List[str],
+    limit: int,
+    save_graph: bool,
+    graph_state: str,
+    merge: bool,
+    output_dir: Path,
+    checkpoint: RunCheckpoint,
+):
+    """Run every domain concurrently, then write the optional merged graph.
+
+    All domains share the process-wide HTTP session (and its per-host rate
+    limits), the topic caches, the text processing pool and the MongoDB client.
+    """
+    # Pipeline modules are imported here so that --help and argument errors return fast
+    from src.data_collection.http_client import close_http_session
+    from src.data_collection.text_processing import close_text_pool
+    from src.knowledge_graph import merge_domain_topics
+
+    if len(domains) == 1:
+        # A single domain keeps its checkpoints and graph state at the top level
+        domain_runs = {domains[0]: (checkpoint, graph_state)}
+    else:
+        domain_runs = {
+            domain: (
+                RunCheckpoint(output_dir / domain),
+                str(Path(graph_state) / domain) if graph_state else None,
+            )
+            for domain in domains
+        }
+
+    try:
+        results = await asyncio.gather(
+            *[
+                _run_domain(
+                    domain, limit, save_graph, state, output_dir, domain_checkpoint
+                )
+                for domain, (domain_checkpoint, state) in domain_runs.items()
+            ]
+        )
+    finally:
+        await close_http_session()
+        close_text_pool()
+        for domain_checkpoint, _ in domain_runs.values():
+            if domain_checkpoint is not checkpoint:
+                domain_checkpoint.close()
+
+    topics_by_domain = {
+        domain: topics for domain, (topics, _) in zip(domains, results) if topics
+    }
+    graphs = {
+        domain: graph
+        for domain, (_, graph) in zip(domains, results)
+        if graph is not None
+    }
+
+    if merge and len(topics_by_domain) > 1:
+        out_path = output_dir / f"graph_merged_limit{limit}.json"
+        if save_graph and checkpoint.is_complete("graph_merged") and out_path.exists():
+            logger.info(f"Merged graph already saved to {out_path}")
+        else:
+            merged_topics = merge_domain_topics(topics_by_domain)
+            shared = sum(len(topics) for topics in topics_by_domain.values()) - len(
+                merged_topics
+            )
+            logger.info(
+                f"Merged {len(topics_by_domain)} domains into {len(merged_topics)} topics "
+                f"({shared} shared)"
+            )
+            merged_graph = _build_graph(merged_topics)
+            if save_graph:
+                _save_graph(merged_graph, out_path)
+                checkpoint.complete("graph_merged", str(out_path))
+            else:
+                graphs["merged"] = merged_graph
+
+    if not save_graph and graphs:
+        output = graphs[domains[0]] if len(domains) == 1 else graphs
+        print(json.dumps(output, indent=2))
+
+
+def _build_graph(topics: list) -> dict:
+    from src.knowledge_graph import build_knowledge_graph
+
+    return build_knowledge_graph(topics, compact=True).to_dict()
+
+
+def _save_graph(graph: dict, out_path: Path) -> None:
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(graph, indent=2))
+    logger.info(f"Saved graph to {out_path}")
+
+
+async def _run_domain(
+    domain: str,
+    limit: int,
+    save_graph: bool,
+    graph_state: Optional[str],
+    output_dir: Path,
+    checkpoint: RunCheckpoint,
+) -> Tuple[list, Optional[dict]]:
+    """Fetch, store and build the graph of one domain.
+
+    Returns:
+        Tuple of (enriched topics, graph dict when it is not saved to a file)
+    """
+    from src.data_collection import get_and_save_from_wiki
+    from src.database.mongo import store_topics_in_mongo
+
     # Dynamically fetch and save enriched topics
-    topics = await get_and_save_from_wiki(domain=domain, limit=limit, save_dir=output_dir, save_to_mongo=False)
+    topics = await get_and_save_from_wiki(
+        domain=domain,
+        limit=limit,
+        save_dir=output_dir,
+        save_to_mongo=False,
+        checkpoint=checkpoint,
+    )
     if not topics:
-        logger.warning("No topics retrieved; exiting.")
-        return
+        logger.warning(f"No topics retrieved for domain '{domain}'.")
+        return [], None
 
     # Optionally store topics in MongoDB
-    stored = await store_topics_in_mongo(topics, domain=domain)
-    logger.info(f"Stored in MongoDB: {stored}")
+    if not checkpoint.is_complete("mongo"):
+        stored = await store_topics_in_mongo(topics, domain=domain)
+        logger.info(f"Stored in MongoDB ({domain}): {stored}")
+        if stored:
+            checkpoint.complete("mongo")
+
+    # Update the versioned graph with only the topics that changed
+    if graph_state and not checkpoint.is_complete("graph_state"):
+        graph_path = update_graph_state(Path(graph_state), topics, domain)
+        logger.info(f"Wrote incremental graph version to {graph_path}")
+        checkpoint.complete("graph_state", str(graph_path))
+
+    out_path = output_dir / f"graph_{domain}_limit{limit}.json"
+    if save_graph and checkpoint.is_complete("graph") and out_path.exists():
+        logger.info(f"Graph already saved to {out_path}")
+        return topics, None
 
     # Build the knowledge graph
-    graph_document = build_knowledge_graph(topics)
-    graph_json = json.dumps(graph_document.to_dict(), indent=2)
-    
+    graph = _build_graph(topics)
+
     # Save the graph JSON to a file
     if save_graph:
-        out_path = output_dir / f"graph_{domain}_limit{limit}.json"
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(graph_json)
-        logger.info(f"Saved graph to {out_path}")
-    else:
-        print(graph_json)
+        _save_graph(graph, out_path)
+        checkpoint.complete("graph", str(out_path))
+        return topics, None
+    return topics, graph
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Generate a Knowledge Graph from domain-specific topics dynamically."
     )
-    parser.add_argument("--domain", type=str, default=DEFAULT_DOMAIN, help="Domain to fetch topics for")
-    parser.add_argument("--limit", type=int, default=10, help="Number of topics to fetch")
-    parser.add_argument("--save-graph", action="store_true", help="Save the JSON output to a file instead of printing")
+    parser.add_argument(
+        "--domain", type=str, default=DEFAULT_DOMAIN, help="Domain to fetch topics for"
+    )
+    parser.add_argument(
+        "--domains",
+        type=str,
+        default=None,
+        help="Comma-separated domains to run concurrently (overrides --domain)",
+    )
+    parser.add_argument(
+        "--all-domains",
+        action="store_true",
+        help="Run every configured domain concurrently",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="With several domains, also write a merged graph with shared Wikidata IDs unified",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=10, help="Number of topics to fetch"
+    )
+    parser.add_argument(
+        "--save-graph",
+        action="store_true",
+        help="Save the JSON output to a file instead of printing",
+    )
+    parser.add_argument(
+        "--graph-state",
+        type=str,
+        default=None,
+        help="Directory of the versioned graph state to update incrementally",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        metavar="RUN_DIR",
+        help="Resume an interrupted run from its output directory, skipping completed work",
+    )
     args = parser.parse_args()
+    try:
+        domains = resolve_domains(args.domain, args.domains, args.all_domains)
+    except ValueError as e:
+        parser.error(str(e))
 
-    asyncio.run(main(args.domain, args.limit, args.save_graph))
+    asyncio.run(
+        main(
+            domains,
+            args.limit,
+            args.save_graph,
+            args.graph_state,
+            args.resume,
+            args.merge,
+        )
+    )
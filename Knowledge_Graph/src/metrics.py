@@ -0,0 +1,333 @@
+"""Run metrics: timing spans, counters, a JSON run report and a Prometheus endpoint.
+
+Spans time a block of code and count the items and bytes it handled::
+
+    with span("sparql.query", kind="properties") as s:
+        status, results = await _run_sparql_query(query)
+        s.add(items=len(results["results"]["bindings"]))
+
+Counters track events such as cache hits or retries::
+
+    increment("cache.hits", cache="wikipedia", tier="redis")
+
+Durations go into fixed histogram buckets, so memory stays constant however
+many calls are timed. With ``METRICS_ENABLED`` off, ``span`` returns a shared
+no-op object and ``increment`` returns immediately.
+"""
+
+import functools
+import inspect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.logger import get_logger
+from src.config import METRICS_ENABLED
+
+logger = get_logger(__name__)
+
+# Upper bounds (seconds) of the duration histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_enabled = METRICS_ENABLED
+_started = time.time()
+_spans: Dict[MetricKey, "_SpanStats"] = {}
+_counters: Dict[MetricKey, float] = {}
+_prometheus_server: Optional[ThreadingHTTPServer] = None
+
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _SpanStats:
+    __slots__ = ("count", "errors", "total", "max", "items", "bytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.items = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, elapsed: float, items: int, nbytes: int, error: bool) -> None:
+        self.count += 1
+        self.errors += error
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.items += items
+        self.bytes += nbytes
+        for i, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": round(self.total, 6),
+            "mean_seconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+            "items": self.items,
+            "bytes": self.bytes,
+        }
+
+
+class Span:
+    """Times a ``with`` block; failures are counted as errors."""
+
+    __slots__ = ("key", "items", "bytes", "_started")
+
+    def __init__(self, key: MetricKey):
+        self.key = key
+        self.items = 0
+        self.bytes = 0
+
+    def add(self, items: int = 0, bytes: int = 0) -> None:
+        self.items += items
+        self.bytes += bytes
+
+    def __enter__(self) -> "Span":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._started
+        with _lock:
+            stats = _spans.get(self.key)
+            if stats is None:
+                stats = _spans[self.key] = _SpanStats()
+            stats.record(elapsed, self.items, self.bytes, exc_type is not None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def add(self, items: int = 0, bytes: int = 0) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = value
+
+
+def span(name: str, **labels: Any):
+    """Return a context manager timing a block under ``name`` and ``labels``."""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(_key(name, labels))
+
+
+def timed(name: str, **labels: Any) -> Callable:
+    """Decorator timing every call of a sync or async function as a span."""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def increment(name: str, value: float = 1, **labels: Any) -> None:
+    """Add ``value`` to the counter ``name`` with ``labels``."""
+    if not _enabled or not value:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def _format_key(key: MetricKey) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={v}" for k, v in labels) + "}"
+
+
+def snapshot() -> Dict[str, Any]:
+    """Return all spans and counters recorded so far."""
+    with _lock:
+        return {
+            "uptime_seconds": round(time.time() - _started, 3),
+            "spans": {_format_key(k): s.to_dict() for k, s in sorted(_spans.items())},
+            "counters": {_format_key(k): v for k, v in sorted(_counters.items())},
+        }
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+    global _started
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+def write_report(
+    path: Any, metadata: Optional[Dict[str, Any]] = None
+) -> Optional[Path]:
+    """Write the run report as JSON; returns the path, or None when metrics are disabled."""
+    if not _enabled:
+        return None
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {"metadata": metadata or {}, **snapshot()}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote run metrics to {path}")
+    return path
+
+
+def _prometheus_name(name: str) -> str:
+    return "kg_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def prometheus_text() -> str:
+    """Render spans as histograms and counters in the Prometheus text format."""
+    lines = []
+    with _lock:
+        spans = sorted(_spans.items())
+        counters = sorted(_counters.items())
+
+    # Samples grouped by metric family, each family under its own TYPE line
+    families: Dict[str, Tuple[str, List[str]]] = {}
+
+    def sample(metric: str, kind: str, line: str) -> None:
+        families.setdefault(metric, (kind, []))[1].append(line)
+
+    for (name, labels), stats in spans:
+        metric = _prometheus_name(name) + "_seconds"
+        cumulative = 0
+        for bound, n in zip(BUCKETS, stats.buckets):
+            cumulative += n
+            bucket_labels = _prometheus_labels(labels, le=str(bound))
+            sample(metric, "histogram", f"{metric}_bucket{bucket_labels} {cumulative}")
+        inf_labels = _prometheus_labels(labels, le="+Inf")
+        sample(metric, "histogram", f"{metric}_bucket{inf_labels} {stats.count}")
+        sample(
+            metric,
+            "histogram",
+            f"{metric}_sum{_prometheus_labels(labels)} {stats.total}",
+        )
+        sample(
+            metric,
+            "histogram",
+            f"{metric}_count{_prometheus_labels(labels)} {stats.count}",
+        )
+        for suffix, value in (
+            ("errors", stats.errors),
+            ("items", stats.items),
+            ("bytes", stats.bytes),
+        ):
+            derived = f"{_prometheus_name(name)}_{suffix}_total"
+            sample(derived, "counter", f"{derived}{_prometheus_labels(labels)} {value}")
+
+    for (name, labels), value in counters:
+        metric = _prometheus_name(name) + "_total"
+        sample(metric, "counter", f"{metric}{_prometheus_labels(labels)} {value}")
+
+    for metric, (kind, samples) in families.items():
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_prometheus_server(
+    port: int, host: str = "0.0.0.0"
+) -> Optional[ThreadingHTTPServer]:
+    """Serve ``/metrics`` in the Prometheus text format from a daemon thread."""
+    global _prometheus_server
+    if not _enabled or _prometheus_server is not None:
+        return _prometheus_server
+    _prometheus_server = ThreadingHTTPServer((host, port), _PrometheusHandler)
+    thread = threading.Thread(
+        target=_prometheus_server.serve_forever, name="metrics-http", daemon=True
+    )
+    thread.start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return _prometheus_server
+
+
+def stop_prometheus_server() -> None:
+    global _prometheus_server
+    if _prometheus_server is not None:
+        _prometheus_server.shutdown()
+        _prometheus_server.server_close()
+        _prometheus_server = None